@@ -7,47 +7,118 @@
 
 import os
 import sys
+import time
+import atexit
+import asyncio
 import logging
-from datetime import datetime, date
+from datetime import datetime
 from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import uvicorn
+from fastapi.responses import JSONResponse, Response
 import traceback
-from typing import List, Dict, Any, Optional
+from typing import Optional
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # 导入服务模块
 from services.biorhythm_service import (
-    get_history, get_today_biorhythm, get_date_biorhythm, get_biorhythm_range
+    get_history, get_today_biorhythm, get_date_biorhythm, update_history, calculate_biorhythm_range
 )
 from services.dress_service import (
-    get_today_dress_info, get_date_dress_info, get_dress_info_range
+    get_today_dress_info, get_date_dress_info, get_dress_info_range_compressed, dress_calendar
 )
 from services.maya_service import (
-    get_today_maya_info, get_date_maya_info, get_maya_info_range,
-    get_maya_birth_info, get_maya_history
+    get_today_maya_info, get_date_maya_info, get_maya_info_range_compressed, get_maya_day_info,
+    get_maya_birth_info, get_maya_history, maya_range_variants
 )
 from services.api_docs_service import api_docs_service
-from utils.date_utils import normalize_date_string
+from config.settings import settings
+from utils.date_utils import normalize_date_string, seconds_until_midnight, get_date_context
+from utils.http_cache import ConditionalCacheMiddleware, ResponseCache
+from utils.route_aliases import RouteAliasMiddleware, RouteStats, ROUTE_TABLE
+from utils.log_utils import JsonLinesFormatter, AccessLogSampler, exclude_logger, start_queue_logging
+from utils.system_metrics import SystemMetricsSampler
+from utils.request_metrics import RequestMetrics, MetricsMiddleware, PROMETHEUS_CONTENT_TYPE
+from utils.offload import OffloadExecutor, ExecutorSaturatedError
+from utils.shared_store import shared_store
+from utils.internal_client import create_internal_client, dispatch, dispatch_many, is_internal_request
+from utils.rate_limit import RateLimiter, LoadShedder, RateLimitMiddleware, client_id_from_scope, parse_trusted_proxies, rate_limit_enabled
+from utils.batch_dispatch import MAX_BATCH_SIZE, build_batch_routes, batch_cost, calls_cost, run_batch
+from utils.json_response import FastJSONResponse, RawJSONResponse
+from utils.compression import Compressor, CompressionMiddleware, encoding_headers
+
 
 class UnifiedBackendService:
     """统一后端服务类"""
     
+    # 日志后台写入线程，进程内只保留一个
+    _log_listener = None
+    
     def __init__(self):
         self.setup_logging()
+        self.response_cache = ResponseCache()
+        compression_config = settings.snapshot.section('compression')
+        self.compressor = Compressor(
+            minimum_size=compression_config.get('minimum_size', 1024),
+            gzip_level=compression_config.get('gzip_level', 6),
+            brotli_quality=compression_config.get('brotli_quality', 5),
+            # 关闭压缩时不协商任何编码，区间接口也直接返回原始内容
+            encodings=compression_config.get('encodings') if compression_config.get('enabled', True) else ()
+        )
+        self.route_stats = RouteStats()
+        offload_config = settings.snapshot.section('offload')
+        self.offload_executor = OffloadExecutor(
+            mode=offload_config.get('mode', 'thread'),
+            max_workers=offload_config.get('max_workers', 4),
+            max_queue=offload_config.get('max_queue', 16),
+            inline_threshold=offload_config.get('inline_threshold_days', 60),
+            retry_after=offload_config.get('retry_after', 1)
+        )
+        rate_limit_config = settings.snapshot.section('rate_limit')
+        self.rate_limiter = RateLimiter(
+            rate=rate_limit_config.get('rate', 10.0),
+            burst=rate_limit_config.get('burst', 40.0),
+            max_clients=rate_limit_config.get('max_clients', 10000),
+            route_costs=rate_limit_config.get('route_costs', {}),
+            range_days_per_token=rate_limit_config.get('range_days_per_token', 30.0)
+        )
+        self.load_shedder = LoadShedder(
+            lambda: self.metrics_sampler.loop_lag,
+            max_loop_lag=rate_limit_config.get('shed_loop_lag', 0.5)
+        )
+        # 反向代理的地址，来自这些地址的请求按X-Real-IP/X-Forwarded-For识别客户端
+        self.trusted_proxies = parse_trusted_proxies(rate_limit_config.get('trusted_proxies', []))
+        # 进程内调用客户端，启动时创建，供接口测试等功能复用
+        self.internal_client = None
+        self.request_metrics = RequestMetrics()
+        self.request_metrics.register_cache('http_response', lambda: (self.response_cache.hits, self.response_cache.misses))
+        self.request_metrics.register_cache('dress_calendar', lambda: (dress_calendar.hits, dress_calendar.misses))
+        self.request_metrics.register_cache(
+            'dress_range_variants', lambda: (dress_calendar.range_variants.hits, dress_calendar.range_variants.misses)
+        )
+        self.request_metrics.register_cache(
+            'maya_range_variants', lambda: (maya_range_variants.hits, maya_range_variants.misses)
+        )
+        metrics_config = settings.snapshot.section('system_metrics')
+        self.metrics_sampler = SystemMetricsSampler(
+            interval=metrics_config.get('interval', 5.0),
+            history_size=metrics_config.get('history_size', 60)
+        )
         self.app = FastAPI(
             title="统一后端API服务",
             description="整合生物节律、玛雅历法和穿搭建议的统一API服务",
             version="1.0.0",
-            docs_url="/api/docs",
+            # /api/docs是API文档管理接口，Swagger UI放在/api/swagger，避免框架路由遮住文档列表
+            docs_url="/api/swagger",
             redoc_url="/api/redoc",
-            openapi_url="/api/openapi.json"
+            openapi_url="/api/openapi.json",
+            # 默认使用orjson序列化响应（未安装时回退到标准库json）
+            default_response_class=FastJSONResponse
         )
         self.setup_middleware()
         self.setup_routes()
+        self.setup_background_tasks()
         
     def setup_logging(self):
         """配置优化的日志系统"""
@@ -95,28 +166,101 @@ class UnifiedBackendService:
             encoding='utf-8'
         )
         api_handler.setLevel(logging.INFO)
-        api_format = logging.Formatter(
-            '%(asctime)s | %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        api_handler.setFormatter(api_format)
+        api_handler.setFormatter(JsonLinesFormatter())
+        api_handler.addFilter(logging.Filter('APIAccess'))
+        
+        # 业务日志处理器不接收访问日志
+        for handler in (console_handler, file_handler, error_handler):
+            handler.addFilter(exclude_logger('APIAccess'))
+        
+        # 停止上一个实例的后台写入线程
+        UnifiedBackendService.stop_logging()
         
-        # 添加处理器
-        self.logger.addHandler(console_handler)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(error_handler)
+        # 队列日志管道 - 请求路径只入队，由后台线程统一写入磁盘
+        queue_handler, UnifiedBackendService._log_listener = start_queue_logging(
+            [console_handler, file_handler, error_handler, api_handler]
+        )
+        self.logger.addHandler(queue_handler)
         
         # 创建API访问日志记录器
         self.api_logger = logging.getLogger('APIAccess')
         self.api_logger.setLevel(logging.INFO)
-        self.api_logger.addHandler(api_handler)
+        self.api_logger.handlers.clear()
+        self.api_logger.addHandler(queue_handler)
+        
+        # 访问日志采样配置，配置重新加载时整体替换
+        self.access_log_sampler = self.build_access_log_sampler(settings.snapshot)
         
         self.logger.info("=" * 60)
         self.logger.info("统一后端服务启动")
         self.logger.info("=" * 60)
         
+    @staticmethod
+    def build_access_log_sampler(snapshot):
+        """根据配置创建访问日志采样器"""
+        logging_config = snapshot.section('logging')
+        return AccessLogSampler(
+            default_rate=logging_config.get('access_sample_rate', 1.0),
+            route_rates=logging_config.get('access_route_sample_rates', {}),
+            slow_threshold=logging_config.get('access_slow_threshold', 1.0)
+        )
+    
+    def on_config_reload(self, snapshot):
+        """配置重新加载后清理依赖旧配置的缓存，在配置检测线程中执行"""
+        self.response_cache.clear()
+        self.access_log_sampler = self.build_access_log_sampler(snapshot)
+        # 进程池的工作进程持有旧配置，重建后新任务使用新配置
+        if self.offload_executor.mode == "process":
+            self.offload_executor.recycle()
+        
+    @classmethod
+    def stop_logging(cls):
+        """停止日志后台写入线程，写完队列中剩余的日志并关闭文件"""
+        listener, cls._log_listener = cls._log_listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        
     def setup_middleware(self):
         """配置中间件"""
+        # 条件请求缓存中间件 - 为按日期确定结果的接口提供ETag和Cache-Control
+        # 需在CORS之前添加，使缓存命中的响应同样带有CORS头；缓存项同时保存压缩版本
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.app.add_middleware(
+            ConditionalCacheMiddleware,
+            cache=self.response_cache,
+            compressor=self.compressor,
+            source_files=[
+                os.path.join(base_dir, 'config', 'app_config.json'),
+                os.path.join(base_dir, 'config', 'maya_config.py'),
+                os.path.join(base_dir, 'services', 'biorhythm_service.py'),
+                os.path.join(base_dir, 'services', 'dress_service.py'),
+                os.path.join(base_dir, 'services', 'maya_service.py'),
+            ]
+        )
+        
+        # 压缩中间件 - 按Accept-Encoding压缩超过阈值的响应，已压缩的缓存内容原样转发
+        compression_config = settings.snapshot.section('compression')
+        if compression_config.get('enabled', True):
+            self.app.add_middleware(
+                CompressionMiddleware,
+                compressor=self.compressor,
+                offload_threshold=compression_config.get('offload_threshold', 262144)
+            )
+        
+        # 限流中间件 - 按客户端令牌桶限流，事件循环延迟过高时降载
+        # 需在CORS之前添加，使429/503响应同样带有CORS头
+        rate_limit_config = settings.snapshot.section('rate_limit')
+        if rate_limit_enabled(rate_limit_config):
+            self.app.add_middleware(
+                RateLimitMiddleware,
+                limiter=self.rate_limiter,
+                shedder=self.load_shedder,
+                exempt_paths=rate_limit_config.get('exempt_paths', ['/health', '/metrics']),
+                trusted_proxies=self.trusted_proxies
+            )
+        
         # CORS中间件 - 增强配置
         self.app.add_middleware(
             CORSMiddleware,
@@ -143,36 +287,41 @@ class UnifiedBackendService:
             max_age=86400  # 预检请求缓存时间（秒）
         )
         
-        # 请求日志中间件
+        # 请求指标中间件 - 按路由和状态码统计延迟直方图，需位于路由别名中间件之内
+        self.app.add_middleware(MetricsMiddleware, metrics=self.request_metrics)
+        
+        # 路由别名中间件 - 兼容路径改写为规范路径，并去除缓存破坏参数
+        self.app.add_middleware(RouteAliasMiddleware, stats=self.route_stats)
+        
+        # 请求日志中间件 - 每个请求写一条结构化访问日志，按路由采样
         @self.app.middleware("http")
         async def log_requests(request: Request, call_next):
-            start_time = datetime.now()
-            
-            # 记录请求信息
-            client_ip = request.client.host if request.client else "unknown"
-            self.api_logger.info(
-                f"请求开始 | {request.method} {request.url.path} | IP: {client_ip} | "
-                f"User-Agent: {request.headers.get('user-agent', 'unknown')}"
-            )
+            start_time = time.perf_counter()
             
             try:
                 # 处理请求
                 response = await call_next(request)
                 
                 # 计算处理时间
-                process_time = (datetime.now() - start_time).total_seconds()
+                process_time = time.perf_counter() - start_time
                 
-                # 记录响应信息
-                self.api_logger.info(
-                    f"请求完成 | {request.method} {request.url.path} | "
-                    f"状态码: {response.status_code} | 耗时: {process_time:.3f}s"
-                )
+                # 记录访问信息
+                path = request.url.path
+                if self.access_log_sampler.should_log(path, response.status_code, process_time):
+                    self.api_logger.info("access", extra={"access": {
+                        "method": request.method,
+                        "path": path,
+                        "status": response.status_code,
+                        "duration_ms": round(process_time * 1000, 3),
+                        "ip": request.client.host if request.client else "unknown",
+                        "user_agent": request.headers.get('user-agent', 'unknown')
+                    }})
                 
                 return response
                 
             except Exception as e:
                 # 记录异常
-                process_time = (datetime.now() - start_time).total_seconds()
+                process_time = time.perf_counter() - start_time
                 self.logger.error(
                     f"请求异常 | {request.method} {request.url.path} | "
                     f"错误: {str(e)} | 耗时: {process_time:.3f}s"
@@ -184,6 +333,15 @@ class UnifiedBackendService:
         """设置路由"""
         
         # 全局异常处理
+        # 计算执行池已满 - 返回503，提示客户端稍后重试
+        @self.app.exception_handler(ExecutorSaturatedError)
+        async def executor_saturated_handler(request: Request, exc: ExecutorSaturatedError):
+            return JSONResponse(
+                status_code=503,
+                content={"error": "服务繁忙", "detail": str(exc)},
+                headers={"Retry-After": str(exc.retry_after)}
+            )
+        
         @self.app.exception_handler(Exception)
         async def global_exception_handler(request: Request, exc: Exception):
             self.logger.error(f"全局异常处理 | {request.method} {request.url.path} | 错误: {str(exc)}")
@@ -233,6 +391,30 @@ class UnifiedBackendService:
                         "description": "API根路径",
                         "category": "系统"
                     },
+                    {
+                        "method": "GET",
+                        "path": "/api/management/routes",
+                        "description": "获取路由别名表及别名、404探测统计",
+                        "category": "系统"
+                    },
+                    {
+                        "method": "GET",
+                        "path": "/api/day",
+                        "description": "获取指定日期的生物节律、玛雅历法和穿搭建议",
+                        "category": "综合"
+                    },
+                    {
+                        "method": "POST",
+                        "path": "/api/batch",
+                        "description": "批量查询：按路由函数名并发执行多个子查询",
+                        "category": "系统"
+                    },
+                    {
+                        "method": "GET",
+                        "path": "/metrics",
+                        "description": "Prometheus格式的请求延迟和缓存命中率指标",
+                        "category": "系统"
+                    },
                     {
                         "method": "GET",
                         "path": "/biorhythm/history",
@@ -344,21 +526,17 @@ class UnifiedBackendService:
             }
             
         @self.app.get("/api/management/status")
-        async def get_service_status():
+        async def get_service_status(history: int = Query(12, ge=0, le=360, description="返回的历史采样数量")):
             """获取服务状态信息"""
             self.logger.info("获取服务状态信息")
             try:
                 # 获取系统信息
                 import platform
                 import psutil
-                import time
-                
-                # 获取CPU和内存信息
-                cpu_percent = psutil.cpu_percent(interval=1)
-                memory = psutil.virtual_memory()
                 
-                # 获取磁盘信息
-                disk = psutil.disk_usage('/')
+                # 读取后台采样器的最近结果，尚未采样时立即采集一次
+                latest = self.metrics_sampler.latest() or self.metrics_sampler.sample()
+                samples = self.metrics_sampler.history()
                 
                 # 获取启动时间
                 boot_time = psutil.boot_time()
@@ -374,14 +552,26 @@ class UnifiedBackendService:
                         "hostname": platform.node()
                     },
                     "resources": {
-                        "cpu_percent": cpu_percent,
-                        "memory_total": memory.total,
-                        "memory_available": memory.available,
-                        "memory_percent": memory.percent,
-                        "disk_total": disk.total,
-                        "disk_used": disk.used,
-                        "disk_free": disk.free,
-                        "disk_percent": (disk.used / disk.total) * 100
+                        "cpu_percent": latest["cpu_percent"],
+                        "memory_total": latest["memory_total"],
+                        "memory_available": latest["memory_available"],
+                        "memory_percent": latest["memory_percent"],
+                        "disk_total": latest["disk_total"],
+                        "disk_used": latest["disk_used"],
+                        "disk_free": latest["disk_free"],
+                        "disk_percent": latest["disk_percent"],
+                        "event_loop_lag_ms": latest["event_loop_lag_ms"],
+                        "sampled_at": datetime.fromtimestamp(latest["timestamp"]).isoformat()
+                    },
+                    "history": samples[-history:] if history else [],
+                    "sample_interval": self.metrics_sampler.interval,
+                    "offload": self.offload_executor.snapshot(),
+                    "compression": self.compressor.snapshot(),
+                    "config": settings.status(),
+                    "rate_limit": {
+                        **self.rate_limiter.snapshot(),
+                        "shed": self.load_shedder.shed,
+                        "shed_loop_lag": self.load_shedder.max_loop_lag
                     },
                     "uptime": uptime,
                     "services": {
@@ -399,37 +589,63 @@ class UnifiedBackendService:
                     "error": str(e)
                 }
                 
+        @self.app.get("/api/management/routes")
+        async def get_route_stats():
+            """获取路由别名表及别名、404探测统计"""
+            return {
+                "aliases": ROUTE_TABLE,
+                "stats": self.route_stats.snapshot(),
+                "timestamp": datetime.now().isoformat()
+            }
+                
+        @self.app.get("/metrics")
+        async def get_metrics():
+            """以Prometheus文本格式导出请求和缓存指标"""
+            return Response(content=self.request_metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+                
         @self.app.post("/api/management/test")
         async def test_api_endpoint(request: Request):
-            """测试API端点"""
+            """测试API端点，支持通过endpoints参数并发测试多个端点"""
             try:
                 data = await request.json()
+                client = self.get_internal_client()
+                
+                # 批量测试：并发调用，返回每个端点的结果和耗时
+                if isinstance(data.get('endpoints'), list):
+                    if len(data['endpoints']) > MAX_BATCH_SIZE:
+                        return JSONResponse(
+                            status_code=400,
+                            content={"success": False, "error": f"单次最多测试{MAX_BATCH_SIZE}个端点"}
+                        )
+                    # 端点在进程内调用，不经过限流中间件，这里按各端点的消耗统一计费
+                    rejected = self.charge_client(request, calls_cost(data['endpoints'], self.rate_limiter.request_cost))
+                    if rejected is not None:
+                        return rejected
+                    self.logger.info(f"批量测试API端点 | 数量: {len(data['endpoints'])}")
+                    start_time = time.perf_counter()
+                    results = await dispatch_many(client, data['endpoints'])
+                    return {
+                        "success": all(result["success"] for result in results),
+                        "results": results,
+                        "total_duration_ms": round((time.perf_counter() - start_time) * 1000, 3),
+                        "timestamp": datetime.now().isoformat()
+                    }
+                
                 endpoint = data.get('endpoint', '')
                 method = data.get('method', 'GET')
                 params = data.get('params', {})
                 
                 self.logger.info(f"测试API端点 | 方法: {method} | 路径: {endpoint} | 参数: {params}")
                 
-                # 实际调用API端点
-                import httpx
-                
-                # 构造完整的URL
-                base_url = f"http://localhost:{os.getenv('PORT', '5000')}"
-                url = f"{base_url}{endpoint}"
-                
-                # 创建HTTP客户端
-                async with httpx.AsyncClient() as client:
-                    if method == 'GET':
-                        # 处理查询参数
-                        response = await client.get(url, params=params)
-                    elif method == 'POST':
-                        response = await client.post(url, json=params)
-                    else:
-                        return {
-                            "success": False,
-                            "error": f"不支持的HTTP方法: {method}",
-                            "timestamp": datetime.now().isoformat()
-                        }
+                # 在进程内调用API端点，不经过网络
+                try:
+                    response = await dispatch(client, method, endpoint, params)
+                except ValueError as e:
+                    return {
+                        "success": False,
+                        "error": str(e),
+                        "timestamp": datetime.now().isoformat()
+                    }
                 
                 # 返回响应结果
                 return {
@@ -437,11 +653,7 @@ class UnifiedBackendService:
                     "endpoint": endpoint,
                     "method": method,
                     "request_params": params,
-                    "response": {
-                        "status_code": response.status_code,
-                        "headers": dict(response.headers),
-                        "data": response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
-                    },
+                    "response": response,
                     "timestamp": datetime.now().isoformat()
                 }
             except Exception as e:
@@ -452,6 +664,38 @@ class UnifiedBackendService:
                     "timestamp": datetime.now().isoformat()
                 }
                 
+        @self.app.post("/api/batch")
+        async def api_batch(request: Request):
+            """批量查询：按路由函数名并发执行多个子查询，合并为一个响应"""
+            try:
+                data = await request.json()
+            except ValueError:
+                data = None
+            items = data.get('requests') if isinstance(data, dict) else None
+            if not isinstance(items, list) or not items:
+                return JSONResponse(
+                    status_code=400,
+                    content={"success": False, "error": "缺少requests参数"}
+                )
+            if len(items) > MAX_BATCH_SIZE:
+                return JSONResponse(
+                    status_code=400,
+                    content={"success": False, "error": f"单次最多{MAX_BATCH_SIZE}个子查询"}
+                )
+            
+            # 子查询在进程内执行，不经过限流中间件，这里按子查询的消耗统一计费
+            rejected = self.charge_client(request, batch_cost(items, self.batch_routes, self.rate_limiter.request_cost))
+            if rejected is not None:
+                return rejected
+            
+            self.logger.info(f"批量查询 | 子查询数量: {len(items)}")
+            results = await run_batch(self.get_internal_client(), items, self.batch_routes)
+            return {
+                "success": all(200 <= result["status"] < 300 for result in results),
+                "results": results,
+                "timestamp": datetime.now().isoformat()
+            }
+                
         # ==================== API管理认证接口 ====================
         
         @self.app.post("/api/management/login")
@@ -504,8 +748,11 @@ class UnifiedBackendService:
                     import secrets
                     token = secrets.token_hex(16)
                     
-                    # 在实际应用中，应该将token存储在数据库或缓存中
-                    # 这里我们只是演示
+                    # token保存在共享存储中，多个工作进程都能识别
+                    await self.run_blocking(
+                        shared_store.save_token, token, username,
+                        settings.snapshot.section('management').get('token_ttl', 86400)
+                    )
                     self.logger.info(f"API管理登录成功 | 用户名: {username}")
                     return JSONResponse(
                         status_code=200,
@@ -539,8 +786,10 @@ class UnifiedBackendService:
         async def api_management_logout(request: Request):
             """API管理界面登出"""
             try:
-                # 在实际应用中，应该从存储中删除token
-                # 这里我们只是演示
+                # 从共享存储中删除token
+                authorization = request.headers.get('authorization', '')
+                if authorization.lower().startswith('bearer '):
+                    await self.run_blocking(shared_store.revoke_token, authorization[7:].strip())
                 return {
                     "success": True,
                     "message": "登出成功"
@@ -551,6 +800,25 @@ class UnifiedBackendService:
                     "success": False,
                     "error": "登出处理失败"
                 }
+                
+        @self.app.get("/api/management/verify")
+        async def api_management_verify(request: Request):
+            """验证API管理token是否仍然有效"""
+            authorization = request.headers.get('authorization', '')
+            token = authorization[7:].strip() if authorization.lower().startswith('bearer ') else ''
+            username = await self.run_blocking(shared_store.get_token_user, token) if token else None
+            if username is None:
+                return JSONResponse(
+                    status_code=401,
+                    content={
+                        "success": False,
+                        "error": "token无效或已过期"
+                    }
+                )
+            return {
+                "success": True,
+                "username": username
+            }
             
         @self.app.get("/")
         async def root():
@@ -585,14 +853,14 @@ class UnifiedBackendService:
             }
             
         # ==================== API文档接口 ====================
+        # 文档存储读写文件或SQLite，在线程池中执行，不阻塞事件循环
         
         @self.app.get("/api/docs")
         async def get_api_docs():
-            """获取API文档列表"""
+            """获取API文档列表，只返回摘要，完整文档通过/api/docs/{doc_id}获取"""
             self.logger.info("获取API文档列表")
             try:
-                docs = api_docs_service.get_all_docs()
-                return docs
+                return {"docs": await self.run_blocking(api_docs_service.list_summaries)}
             except Exception as e:
                 self.logger.error(f"获取API文档列表失败: {str(e)}")
                 return {"docs": []}
@@ -602,7 +870,7 @@ class UnifiedBackendService:
             """获取特定API文档"""
             self.logger.info(f"获取API文档 | ID: {doc_id}")
             try:
-                doc = api_docs_service.get_doc_by_id(doc_id)
+                doc = await self.run_blocking(api_docs_service.get_doc_by_id, doc_id)
                 if doc:
                     return doc
                 else:
@@ -619,7 +887,7 @@ class UnifiedBackendService:
             self.logger.info("创建新的API文档")
             try:
                 data = await request.json()
-                doc = api_docs_service.create_doc(data)
+                doc = await self.run_blocking(api_docs_service.create_doc, data)
                 return doc
             except Exception as e:
                 self.logger.error(f"创建API文档失败: {str(e)}")
@@ -631,7 +899,7 @@ class UnifiedBackendService:
             self.logger.info(f"更新API文档 | ID: {doc_id}")
             try:
                 data = await request.json()
-                doc = api_docs_service.update_doc(doc_id, data)
+                doc = await self.run_blocking(api_docs_service.update_doc, doc_id, data)
                 if doc:
                     return doc
                 else:
@@ -647,7 +915,7 @@ class UnifiedBackendService:
             """删除API文档"""
             self.logger.info(f"删除API文档 | ID: {doc_id}")
             try:
-                result = api_docs_service.delete_doc(doc_id)
+                result = await self.run_blocking(api_docs_service.delete_doc, doc_id)
                 if result:
                     return {"message": "文档删除成功"}
                 else:
@@ -665,7 +933,7 @@ class UnifiedBackendService:
             """获取生物节律历史查询记录"""
             self.logger.info("获取生物节律历史记录")
             try:
-                history = get_history()
+                history = await self.run_blocking(get_history)
                 self.logger.info(f"返回{len(history)}条历史记录")
                 return {"history": history}
             except Exception as e:
@@ -712,9 +980,16 @@ class UnifiedBackendService:
             self.logger.info(f"计算生物节律范围 | 生日: {birth_date} | 前{days_before}天 | 后{days_after}天")
             try:
                 birth_date = normalize_date_string(birth_date)
-                result = get_biorhythm_range(birth_date, days_before, days_after)
-                self.logger.info(f"生物节律范围计算成功 | 共{len(result.get('biorhythm_list', []))}天数据")
-                return result
+                update_history(birth_date)
+                result = await self.offload_executor.run(
+                    days_before + days_after + 1,
+                    calculate_biorhythm_range, birth_date, days_before, days_after
+                )
+                self.logger.info(f"生物节律范围计算成功 | 共{len(result.get('dates', []))}天数据")
+                # 结果只包含基本类型，直接序列化，跳过jsonable_encoder
+                return FastJSONResponse(result)
+            except ExecutorSaturatedError:
+                raise
             except Exception as e:
                 self.logger.error(f"生物节律范围计算失败: {str(e)}")
                 raise HTTPException(status_code=500, detail=str(e))
@@ -748,15 +1023,22 @@ class UnifiedBackendService:
                 
         @self.app.get("/maya/range")
         async def api_get_maya_range(
+            request: Request,
             days_before: int = Query(3, description="当前日期之前的天数"),
             days_after: int = Query(3, description="当前日期之后的天数")
         ):
             """获取一段时间内的玛雅历法信息"""
             self.logger.info(f"获取玛雅历法范围信息 | 前{days_before}天 | 后{days_after}天")
             try:
-                result = get_maya_info_range(days_before, days_after)
-                self.logger.info(f"玛雅历法范围信息获取成功 | 共{len(result.get('maya_info_list', []))}天数据")
-                return result
+                # 拼接按日期缓存的JSON片段，同一区间的压缩结果缓存复用
+                body, encoding = await self.offload_executor.run(
+                    days_before + days_after + 1, get_maya_info_range_compressed, days_before, days_after,
+                    self.compressor.encoding_for(request.scope), self.compressor
+                )
+                self.logger.info(f"玛雅历法范围信息获取成功 | 共{max(days_before + days_after + 1, 0)}天数据")
+                return RawJSONResponse(body, headers=encoding_headers(encoding))
+            except ExecutorSaturatedError:
+                raise
             except Exception as e:
                 self.logger.error(f"玛雅历法范围信息获取失败: {str(e)}")
                 raise HTTPException(status_code=500, detail=str(e))
@@ -799,7 +1081,7 @@ class UnifiedBackendService:
             """获取玛雅历史记录"""
             self.logger.info("获取玛雅历史记录")
             try:
-                history = get_maya_history()
+                history = await self.run_blocking(get_maya_history)
                 self.logger.info(f"返回{len(history)}条玛雅历史记录")
                 return {
                     "success": True,
@@ -850,19 +1132,61 @@ class UnifiedBackendService:
 
         @self.app.get("/dress/range")
         async def api_get_dress_range(
+            request: Request,
             days_before: int = Query(1, description="当前日期之前的天数"),
             days_after: int = Query(6, description="当前日期之后的天数")
         ):
             """获取一段时间内的穿衣颜色和饮食建议"""
             self.logger.info(f"获取穿搭建议范围 | 前{days_before}天 | 后{days_after}天")
             try:
-                result = get_dress_info_range(days_before, days_after)
-                self.logger.info(f"穿搭建议范围获取成功 | 共{len(result.get('dress_info_list', []))}天数据")
-                return result
+                # 拼接穿搭日历中预先编码的JSON片段，压缩结果随日历缓存，每种编码只压缩一次
+                body, encoding = await self.offload_executor.run(
+                    days_before + days_after + 1, get_dress_info_range_compressed, days_before, days_after,
+                    self.compressor.encoding_for(request.scope), self.compressor
+                )
+                self.logger.info(f"穿搭建议范围获取成功 | 共{max(days_before + days_after + 1, 0)}天数据")
+                return RawJSONResponse(body, headers=encoding_headers(encoding))
+            except ExecutorSaturatedError:
+                raise
             except Exception as e:
                 self.logger.error(f"穿搭建议范围获取失败: {str(e)}")
                 raise HTTPException(status_code=500, detail=str(e))
                 
+        # ==================== 综合接口 ====================
+        
+        @self.app.get("/api/day")
+        async def api_get_day(
+            birth_date: Optional[str] = Query(None, description="出生日期，格式为YYYY-MM-DD，不传时不返回生物节律"),
+            date: Optional[str] = Query(None, description="目标日期，格式为YYYY-MM-DD，默认今天")
+        ):
+            """获取指定日期的生物节律、玛雅历法和穿搭建议"""
+            self.logger.info(f"获取每日综合信息 | 生日: {birth_date} | 日期: {date}")
+            try:
+                # 日期解析、星期等公共计算结果在三个服务之间共享
+                date_context = get_date_context(normalize_date_string(date) if date else None)
+                if birth_date:
+                    birth_date = normalize_date_string(birth_date)
+                    get_date_context(birth_date)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="日期格式无效，请使用YYYY-MM-DD格式")
+            
+            try:
+                # 玛雅历法和穿搭建议只依赖日期，所有用户共享缓存；只有生物节律按生日计算
+                biorhythm = get_date_biorhythm(birth_date, date_context.date_str) if birth_date else None
+                result = {
+                    "date": date_context.date_str,
+                    "weekday": date_context.weekday_name,
+                    "day_of_year": date_context.day_of_year,
+                    "biorhythm": biorhythm,
+                    "maya": get_maya_day_info(date_context.date),
+                    "dress": dress_calendar.get(date_context.date)
+                }
+                self.logger.info("每日综合信息获取成功")
+                return result
+            except Exception as e:
+                self.logger.error(f"每日综合信息获取失败: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+                
         # ==================== 向后兼容的旧版API ====================
         
         @self.app.get("/biorhythm")
@@ -873,14 +1197,107 @@ class UnifiedBackendService:
         ):
             """旧版API路径，重定向到新路径"""
             return await api_get_biorhythm_range(birth_date, days_before, days_after)
+        
+        # 登记已注册的路由，供请求指标在进入路由之前确定路由模板
+        self.request_metrics.set_routes(self.app.routes)
+        
+        # 可批量调用的路由表，按路由函数名索引
+        self.batch_routes = build_batch_routes(self.app.routes)
+            
+    def get_internal_client(self):
+        """获取进程内调用客户端，首次使用时创建"""
+        if self.internal_client is None:
+            self.internal_client = create_internal_client(self.app)
+        return self.internal_client
+        
+    async def run_blocking(self, func, *args):
+        """在默认线程池中执行会阻塞的调用（如SQLite读写），等待写锁时不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+        
+    def charge_client(self, request: Request, cost: float) -> Optional[JSONResponse]:
+        """
+        按消耗为客户端计费，用于进程内执行的子请求
+
+        消耗超过桶容量时按桶容量计，避免请求永远无法通过；超出限额时返回429响应，否则返回None。
+        进程内发起的嵌套调用已由外层请求计费，不再计入共用的进程内客户端
+        """
+        if not rate_limit_enabled(settings.snapshot.section('rate_limit')):
+            return None
+        if is_internal_request(request.scope):
+            return None
+        client_id = client_id_from_scope(request.scope, self.trusted_proxies)
+        allowed, wait = self.rate_limiter.acquire(client_id, min(cost, self.rate_limiter.burst))
+        if allowed:
+            return None
+        retry_after = max(int(wait + 0.999), 1)
+        return JSONResponse(
+            status_code=429,
+            content={"error": "请求过于频繁，请稍后重试", "retry_after": retry_after},
+            headers={"Retry-After": str(retry_after)}
+        )
+        
+    def setup_background_tasks(self):
+        """配置后台任务"""
+        self.background_tasks = []
+        
+        async def refresh_dress_calendar():
+            """构建穿搭预计算日历，并在每天午夜重建"""
+            loop = asyncio.get_running_loop()
+            while True:
+                try:
+                    # 多进程模式下父进程已在fork前构建好日历，工作进程直接共享
+                    if not dress_calendar.is_current():
+                        days = await loop.run_in_executor(None, dress_calendar.rebuild)
+                        self.logger.info(f"穿搭日历已重建 | 共{days}天数据")
+                except Exception as e:
+                    self.logger.error(f"穿搭日历重建失败: {str(e)}")
+                # 多等待一秒，确保醒来时已经跨过午夜
+                await asyncio.sleep(seconds_until_midnight() + 1)
+        
+        @self.app.on_event("startup")
+        async def start_background_tasks():
+            self.background_tasks.append(asyncio.create_task(refresh_dress_calendar()))
+            self.background_tasks.append(asyncio.create_task(self.metrics_sampler.run()))
+            # 配置热加载：检测到配置文件变化时替换配置并清理缓存
+            reload_config = settings.snapshot.section('config_reload')
+            if reload_config.get('enabled', True):
+                settings.check_interval = reload_config.get('interval', 2.0)
+                settings.on_reload(self.on_config_reload)
+                self.background_tasks.append(asyncio.create_task(settings.watch()))
+            self.get_internal_client()
+        
+        @self.app.on_event("shutdown")
+        async def stop_background_tasks():
+            for task in self.background_tasks:
+                task.cancel()
+            self.background_tasks.clear()
+            settings.remove_callback(self.on_config_reload)
+            self.offload_executor.shutdown()
+            client, self.internal_client = self.internal_client, None
+            if client is not None:
+                await client.aclose()
+            # 写完队列中剩余的日志
+            UnifiedBackendService.stop_logging()
             
-    def run(self, host='0.0.0.0', port=5000, debug=False):
+    def run(self, host='0.0.0.0', port=5000, debug=False, workers=1):
         """启动服务"""
-        self.logger.info(f"启动统一后端服务")
+        self.logger.info("启动统一后端服务")
         self.logger.info(f"服务地址: http://{host}:{port}")
         self.logger.info(f"调试模式: {debug}")
+        self.logger.info(f"工作进程数: {workers}")
         self.logger.info("-" * 60)
         
+        if workers > 1:
+            from utils.prefork import supports_prefork
+            if supports_prefork():
+                self.run_workers(host, port, debug, workers)
+                return
+            self.logger.warning("当前平台不支持fork，以单进程模式运行")
+        
+        # uvicorn只在启动服务时需要，延迟导入以缩短导入时间
+        import uvicorn
+        
         try:
             uvicorn.run(
                 self.app,
@@ -892,6 +1309,35 @@ class UnifiedBackendService:
         except Exception as e:
             self.logger.error(f"服务启动失败: {str(e)}")
             raise
+            
+    def run_workers(self, host, port, debug, workers):
+        """
+        多进程模式：父进程预加载配置和预计算数据后fork出工作进程
+        
+        各工作进程通过写时复制共享预计算的穿搭日历，历史记录和token保存在共享存储中
+        """
+        from utils.prefork import serve_prefork
+        
+        # 在fork前构建穿搭日历，工作进程启动时检测到日历已是最新，不再重复计算
+        days = dress_calendar.rebuild()
+        self.logger.info(f"穿搭日历已预加载 | 共{days}天数据")
+        
+        try:
+            serve_prefork(
+                self.app,
+                host=host,
+                port=port,
+                workers=workers,
+                log_level="info" if not debug else "debug",
+                # 日志后台写入线程不能跨fork，工作进程中重新启动日志管道
+                on_worker_start=self.setup_logging
+            )
+        except Exception as e:
+            self.logger.error(f"服务启动失败: {str(e)}")
+            raise
+
+# 进程退出前写完队列中剩余的日志
+atexit.register(UnifiedBackendService.stop_logging)
 
 def create_app():
     """创建FastAPI应用实例"""
@@ -908,6 +1354,7 @@ if __name__ == '__main__':
     parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '5000')), help='服务端口')
     parser.add_argument('--debug', action='store_true', help='启用调试模式')
     parser.add_argument('--auto-port', action='store_true', help='自动查找可用端口')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WORKERS', '1')), help='工作进程数量')
     
     args = parser.parse_args()
     
@@ -935,4 +1382,4 @@ if __name__ == '__main__':
     
     # 创建并启动服务
     service = UnifiedBackendService()
-    service.run(host=host, port=port, debug=debug)
+    service.run(host=host, port=port, debug=debug, workers=max(args.workers, 1))
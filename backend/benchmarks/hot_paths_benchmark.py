@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+计算热点微基准测试
+以固定输入测量各服务核心计算函数的单次耗时，结果保存为JSON；
+指定基线文件时与基线对比，任一热点的耗时超出容差即以非零状态退出
+
+示例:
+    python benchmarks/hot_paths_benchmark.py --save-baseline
+    python benchmarks/hot_paths_benchmark.py --tolerance 0.2
+    python benchmarks/hot_paths_benchmark.py --only maya --output result.json
+
+测量方法与timeit相同：预热后按单轮约target_ms毫秒确定每轮调用次数，重复多轮，
+以最快一轮的单次耗时作为结果（受系统干扰最小），同时记录中位数；超出容差的用例会重新测量，
+排除偶发的系统干扰。只依赖标准库和本项目代码，可离线运行
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+
+# 历史记录写入临时的共享存储，不影响服务的数据文件
+os.environ.setdefault('SHARED_STORE_PATH', os.path.join(tempfile.mkdtemp(prefix='hot_paths_'), 'shared_state.db'))
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.biorhythm_service import calculate_biorhythm, get_biorhythm_range
+from services.maya_service import generate_maya_info, calculate_energy_scores
+from services.dress_service import get_dress_info_for_date
+from services.biorhythm_life_guide_service import life_guide_service
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hot_paths_baseline.json')
+
+# 固定输入
+BIRTH_DATE = "1990-01-01"
+TARGET_DATE = "2024-06-15"
+TARGET_DATETIME = datetime(2024, 6, 15)
+KIN = 183
+
+# 基准用例：名称 -> (说明, 无参调用函数)
+CASES = {
+    "calculate_biorhythm": (
+        "单日生物节律",
+        lambda: calculate_biorhythm(BIRTH_DATE, TARGET_DATE)
+    ),
+    "get_biorhythm_range": (
+        "前后各182天的生物节律区间（含历史记录写入）",
+        lambda: get_biorhythm_range(BIRTH_DATE, 182, 182)
+    ),
+    "generate_maya_info": (
+        "单日玛雅历法信息",
+        lambda: generate_maya_info(TARGET_DATETIME)
+    ),
+    "calculate_energy_scores": (
+        "玛雅能量分数",
+        lambda: calculate_energy_scores(TARGET_DATETIME, KIN)
+    ),
+    "get_dress_info_for_date": (
+        "单日穿衣与饮食建议（不经过预计算日历）",
+        lambda: get_dress_info_for_date(TARGET_DATE)
+    ),
+    "generate_comprehensive_guide": (
+        "综合生物节律生活指南",
+        lambda: life_guide_service.generate_comprehensive_guide(BIRTH_DATE)
+    ),
+}
+
+def calibrate(func, target_seconds: float) -> int:
+    """确定每轮调用次数，使单轮耗时不少于target_seconds"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= target_seconds or number >= 1 << 20:
+            return number
+        number *= 2
+
+def measure(func, warmup: int, repeat: int, target_seconds: float) -> dict:
+    """
+    测量单次调用耗时
+
+    Returns:
+        dict: 每轮调用次数、最快和中位数单次耗时（微秒）
+    """
+    for _ in range(warmup):
+        func()
+    number = calibrate(func, target_seconds)
+
+    timings = []
+    # 测量期间关闭垃圾回收，避免回收停顿落在个别轮次上
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            timings.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return {
+        "number": number,
+        "repeat": repeat,
+        "best_us": round(min(timings) * 1e6, 3),
+        "median_us": round(statistics.median(timings) * 1e6, 3)
+    }
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> dict:
+    """
+    与基线对比最快耗时
+
+    Returns:
+        dict: {用例名: {"baseline_us", "current_us", "ratio", "regressed"}}，基线中没有的用例不参与对比
+    """
+    comparison = {}
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        ratio = current["best_us"] / previous["best_us"] if previous["best_us"] else 1.0
+        comparison[name] = {
+            "baseline_us": previous["best_us"],
+            "current_us": current["best_us"],
+            "ratio": round(ratio, 3),
+            "regressed": ratio > 1 + tolerance
+        }
+    return comparison
+
+def environment() -> dict:
+    """记录运行环境，不同机器的结果不能直接对比"""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='计算热点微基准测试')
+    parser.add_argument('--warmup', type=int, default=20, help='每个用例的预热调用次数 (默认: 20)')
+    parser.add_argument('--repeat', type=int, default=7, help='测量轮数 (默认: 7)')
+    parser.add_argument('--target-ms', type=float, default=50, help='单轮最短耗时，毫秒 (默认: 50)')
+    parser.add_argument('--only', default=None, help='只运行名称包含该字符串的用例')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件路径')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为基线')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='允许的耗时增长比例 (默认: 0.25)')
+    parser.add_argument('--retries', type=int, default=2, help='超出容差时重新测量的次数 (默认: 2)')
+    parser.add_argument('--output', default=None, help='结果输出文件')
+    args = parser.parse_args()
+
+    cases = {name: case for name, case in CASES.items() if not args.only or args.only in name}
+    if not cases:
+        parser.error(f"没有匹配的用例: {args.only}")
+
+    results = {}
+    for name, (description, func) in cases.items():
+        results[name] = {"description": description, **measure(func, args.warmup, args.repeat, args.target_ms / 1000)}
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec='seconds'),
+        "environment": environment(),
+        "tolerance": args.tolerance,
+        "results": results
+    }
+
+    exit_code = 0
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report["comparison"] = compare_with_baseline(results, baseline, args.tolerance)
+        regressed = [name for name, item in report["comparison"].items() if item["regressed"]]
+        for _ in range(args.retries):
+            if not regressed:
+                break
+            # 重新测量超出容差的用例，保留更快的结果
+            for name in regressed:
+                description, func = cases[name]
+                retry = measure(func, args.warmup, args.repeat, args.target_ms / 1000)
+                if retry["best_us"] < results[name]["best_us"]:
+                    results[name] = {"description": description, **retry}
+            report["comparison"] = compare_with_baseline(results, baseline, args.tolerance)
+            regressed = [name for name, item in report["comparison"].items() if item["regressed"]]
+        report["regressed"] = regressed
+        if baseline.get("environment") != report["environment"]:
+            report["warning"] = "基线来自不同的运行环境，对比结果仅供参考"
+        exit_code = 1 if regressed else 0
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    print(output)
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
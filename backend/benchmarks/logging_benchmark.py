@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志管道吞吐基准测试
+对比旧的同步FileHandler管道（每个请求两条文本访问日志）与
+新的队列管道（每个请求一条JSON访问日志，后台线程写入）
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.log_utils import JsonLinesFormatter, exclude_logger, start_queue_logging
+
+# 是否在每条日志后fsync
+FSYNC = False
+
+LOG_FORMAT = '%(asctime)s | %(levelname)-8s | %(name)-15s | %(funcName)-20s:%(lineno)-4d | %(message)s'
+
+def make_logger(name, *handlers):
+    """创建独立的日志记录器"""
+    logger = logging.getLogger(name)
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    for handler in handlers:
+        logger.addHandler(handler)
+    return logger
+
+class SyncedFileHandler(logging.FileHandler):
+    """每条记录后fsync，模拟磁盘繁忙或网络存储时的写入延迟"""
+
+    def emit(self, record):
+        super().emit(record)
+        self.flush()
+        os.fsync(self.stream.fileno())
+
+def file_handler(log_dir, filename, formatter):
+    handler_class = SyncedFileHandler if FSYNC else logging.FileHandler
+    handler = handler_class(os.path.join(log_dir, filename), encoding='utf-8')
+    handler.setFormatter(formatter)
+    return handler
+
+def run_sync(log_dir, requests):
+    """旧管道：请求线程同步写文件"""
+    backend = make_logger('bench.sync.backend', file_handler(log_dir, 'sync_backend.log', logging.Formatter(LOG_FORMAT)))
+    access = make_logger('bench.sync.access', file_handler(log_dir, 'sync_access.log', logging.Formatter('%(asctime)s | %(message)s')))
+    
+    start = time.perf_counter()
+    for i in range(requests):
+        access.info(f"请求开始 | GET /maya/today | IP: 127.0.0.1 | User-Agent: bench")
+        backend.info("获取今日玛雅历法信息")
+        backend.info("今日玛雅历法信息获取成功")
+        access.info(f"请求完成 | GET /maya/today | 状态码: 200 | 耗时: 0.001s")
+    caller = time.perf_counter() - start
+    
+    for handler in backend.handlers + access.handlers:
+        handler.close()
+    return caller, caller
+
+def run_queued(log_dir, requests):
+    """新管道：请求线程只入队，后台线程写文件"""
+    backend_handler = file_handler(log_dir, 'queue_backend.log', logging.Formatter(LOG_FORMAT))
+    backend_handler.addFilter(exclude_logger('bench.queue.access'))
+    access_handler = file_handler(log_dir, 'queue_access.log', JsonLinesFormatter())
+    access_handler.addFilter(logging.Filter('bench.queue.access'))
+    queue_handler, listener = start_queue_logging([backend_handler, access_handler])
+    backend = make_logger('bench.queue.backend', queue_handler)
+    access = make_logger('bench.queue.access', queue_handler)
+    
+    start = time.perf_counter()
+    for i in range(requests):
+        backend.info("获取今日玛雅历法信息")
+        backend.info("今日玛雅历法信息获取成功")
+        access.info("access", extra={"access": {
+            "method": "GET", "path": "/maya/today", "status": 200,
+            "duration_ms": 1.0, "ip": "127.0.0.1", "user_agent": "bench"
+        }})
+    caller = time.perf_counter() - start
+    
+    # 等待后台线程写完全部日志
+    listener.stop()
+    drained = time.perf_counter() - start
+    for handler in (backend_handler, access_handler):
+        handler.close()
+    return caller, drained
+
+def main():
+    parser = argparse.ArgumentParser(description='日志管道吞吐基准测试')
+    parser.add_argument('--requests', type=int, default=50000, help='模拟请求数 (默认: 50000)')
+    parser.add_argument('--fsync', action='store_true', help='每条日志后fsync，模拟慢磁盘')
+    args = parser.parse_args()
+    
+    global FSYNC
+    FSYNC = args.fsync
+    
+    result = {"requests": args.requests, "fsync": args.fsync}
+    with tempfile.TemporaryDirectory() as log_dir:
+        for name, runner in (("sync_file_handler", run_sync), ("queue_listener", run_queued)):
+            caller, drained = runner(log_dir, args.requests)
+            result[name] = {
+                "caller_us_per_request": round(caller / args.requests * 1e6, 2),
+                "caller_requests_per_second": round(args.requests / caller),
+                "end_to_end_requests_per_second": round(args.requests / drained)
+            }
+    
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
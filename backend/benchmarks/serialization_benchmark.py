@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+响应序列化基准测试
+按接口统计不同序列化路径的耗时：
+- stdlib: FastAPI原有路径，jsonable_encoder + 标准库json
+- fast_default: 默认响应类路径，jsonable_encoder + json_utils.dumps
+- fast_direct: 接口直接返回FastJSONResponse，跳过jsonable_encoder
+- fragments: 拼接预先编码的JSON片段（仅区间接口）
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi.encoders import jsonable_encoder
+from services.biorhythm_service import calculate_biorhythm_range
+from services.dress_service import get_dress_info_range, get_dress_info_range_json, get_date_dress_info, dress_calendar
+from services.maya_service import get_maya_info_range, get_maya_info_range_json, get_date_maya_info
+from utils.json_utils import HAS_ORJSON, dumps
+
+def stdlib_render(content):
+    """与starlette JSONResponse.render相同的编码方式"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def measure(func, repeat):
+    """多次执行取最好成绩，返回毫秒"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+def build_cases(days):
+    """构造各接口的响应数据，以及对应的片段拼接函数"""
+    return [
+        ("/dress/date", get_date_dress_info("2024-01-01"), None),
+        ("/maya/date", get_date_maya_info("2024-01-01"), None),
+        (f"/biorhythm/range ({days}天)", calculate_biorhythm_range("1990-01-01", 0, days - 1), None),
+        (f"/dress/range ({days}天)", get_dress_info_range(0, days - 1),
+         lambda: get_dress_info_range_json(0, days - 1)),
+        (f"/maya/range ({days}天)", get_maya_info_range(0, days - 1),
+         lambda: get_maya_info_range_json(0, days - 1)),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description='响应序列化基准测试')
+    parser.add_argument('--days', type=int, default=365, help='区间接口的天数 (默认: 365)')
+    parser.add_argument('--repeat', type=int, default=20, help='每项重复次数 (默认: 20)')
+    args = parser.parse_args()
+
+    # 预计算日历覆盖区间，并预热按日期缓存的片段
+    dress_calendar.rebuild()
+    get_maya_info_range_json(0, args.days - 1)
+
+    result = {"orjson": HAS_ORJSON, "days": args.days, "endpoints": {}}
+    for name, content, fragments in build_cases(args.days):
+        timings = {
+            "bytes": len(dumps(content)),
+            "stdlib_ms": measure(lambda: stdlib_render(jsonable_encoder(content)), args.repeat),
+            "fast_default_ms": measure(lambda: dumps(jsonable_encoder(content)), args.repeat),
+            "fast_direct_ms": measure(lambda: dumps(content), args.repeat),
+        }
+        if fragments is not None:
+            timings["fragments_ms"] = measure(fragments, args.repeat)
+        result["endpoints"][name] = timings
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
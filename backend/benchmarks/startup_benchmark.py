@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动性能基准测试
+在全新的子进程中导入应用并创建FastAPI实例，统计导入耗时和常驻内存(RSS)，
+用于评估容器冷启动时间和每个工作进程的内存占用
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 需要关注是否在启动阶段被加载的重量级模块
+HEAVY_MODULES = ["pandas", "numpy", "psutil", "httpx", "uvicorn"]
+
+# 在子进程中执行的测量代码
+PROBE = r"""
+import json, os, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+
+def rss_kb():
+    # 优先读取/proc，避免为了测量而引入psutil
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "rss_kb": rss_kb(),
+    "loaded_heavy_modules": [m for m in %r if m in sys.modules]
+}))
+""" % (HEAVY_MODULES,)
+
+def run_once():
+    """在全新的解释器中测量一次启动"""
+    output = subprocess.check_output(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR,
+        stderr=subprocess.DEVNULL
+    )
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='启动性能基准测试')
+    parser.add_argument('--runs', type=int, default=5, help='测量次数 (默认: 5)')
+    parser.add_argument('--output', help='结果输出的JSON文件路径')
+    args = parser.parse_args()
+    
+    # 预热一次，确保字节码缓存已经生成
+    run_once()
+    samples = [run_once() for _ in range(args.runs)]
+    
+    result = {
+        "runs": args.runs,
+        "python": sys.version.split()[0],
+        "import_ms": {
+            "median": statistics.median(s["import_ms"] for s in samples),
+            "min": min(s["import_ms"] for s in samples)
+        },
+        "create_app_ms": {
+            "median": statistics.median(s["create_app_ms"] for s in samples),
+            "min": min(s["create_app_ms"] for s in samples)
+        },
+        "rss_mb": {
+            "median": statistics.median(s["rss_kb"] for s in samples) / 1024,
+            "max": max(s["rss_kb"] for s in samples) / 1024
+        },
+        "loaded_heavy_modules": samples[-1]["loaded_heavy_modules"]
+    }
+    
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+if __name__ == '__main__':
+    main()
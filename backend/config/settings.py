@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+应用配置加载模块
+进程内只解析一次app_config.json，以只读视图提供给各服务；
+后台按修改时间检测配置变化，重新加载时整体替换配置及派生数据，并通知依赖方清理缓存
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 默认配置文件路径，可通过APP_CONFIG_PATH环境变量覆盖
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app_config.json')
+
+_EMPTY = MappingProxyType({})
+
+def freeze(value: Any) -> Any:
+    """递归地将字典转为只读映射、列表转为元组"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+class BiorhythmSettings(NamedTuple):
+    """生物节律配置"""
+    cycles: Mapping[str, int]
+    max_history: int
+
+class DressSettings(NamedTuple):
+    """穿搭建议配置"""
+    five_elements: Mapping[str, Mapping[str, Any]]
+    color_systems: Mapping[str, Mapping[str, Any]]
+    daily_food: Mapping[str, Mapping[str, Tuple[str, ...]]]
+    weekday_elements: Tuple[str, ...]
+    star_colors: Tuple[str, ...]
+    weekday_names: Tuple[str, ...]
+    calendar_days_before: int
+    calendar_days_after: int
+
+class ConfigSnapshot:
+    """
+    某一版本的只读配置
+
+    除配置本身外还保存由配置计算出的派生数据，读取方持有同一个快照即可得到一致的配置和派生数据
+    """
+
+    __slots__ = ("data", "mtime_ns", "version", "biorhythm", "dress", "_derived")
+
+    def __init__(self, data: Mapping[str, Any], mtime_ns: int = 0, version: int = 1):
+        self.data = data
+        self.mtime_ns = mtime_ns
+        self.version = version
+        self.biorhythm = BiorhythmSettings(
+            cycles=data['biorhythm']['cycles'],
+            max_history=data['biorhythm']['max_history']
+        )
+        calendar = data.get('dress_calendar', _EMPTY)
+        self.dress = DressSettings(
+            five_elements=data['five_elements'],
+            color_systems=data['color_systems'],
+            daily_food=data['daily_food'],
+            weekday_elements=data['weekday_elements'],
+            star_colors=data['star_colors'],
+            weekday_names=data['weekday_names'],
+            calendar_days_before=calendar.get('days_before', 30),
+            calendar_days_after=calendar.get('days_after', 365)
+        )
+        self._derived: Dict[str, Any] = {}
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """获取顶层配置项"""
+        return self.data.get(name, default)
+
+    def section(self, name: str) -> Mapping[str, Any]:
+        """获取配置段，不存在时返回空映射"""
+        return self.data.get(name, _EMPTY)
+
+    def derived(self, name: str) -> Any:
+        """获取注册的派生数据"""
+        return self._derived[name]
+
+def load_snapshot(path: str, version: int = 1) -> ConfigSnapshot:
+    """
+    读取并解析配置文件
+
+    Raises:
+        OSError: 文件无法读取
+        ValueError: 不是合法的JSON
+        KeyError: 缺少必需的配置段
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return ConfigSnapshot(freeze(data), mtime_ns, version)
+
+class ConfigLoader:
+    """
+    配置加载器
+
+    snapshot属性始终指向最新的完整快照，重新加载时一次赋值替换，读取方不需要加锁。
+    派生数据在替换前基于新配置计算完成；配置文件无效时保留旧配置，不影响正在处理的请求
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._builders: Dict[str, Callable[[ConfigSnapshot], Any]] = {}
+        self._callbacks: List[Callable[[ConfigSnapshot], None]] = []
+        self.reload_count = 0
+        self.failed_reloads = 0
+        self.snapshot = load_snapshot(path)
+
+    def register_derived(self, name: str, builder: Callable[[ConfigSnapshot], Any]) -> Any:
+        """
+        注册派生数据，立即基于当前配置计算一次
+
+        Returns:
+            当前配置对应的派生数据
+        """
+        with self._lock:
+            self._builders[name] = builder
+            value = self.snapshot._derived[name] = builder(self.snapshot)
+        return value
+
+    def on_reload(self, callback: Callable[[ConfigSnapshot], None]) -> Callable[[ConfigSnapshot], None]:
+        """注册配置替换后的回调，用于清理依赖旧配置的缓存；可作为装饰器使用"""
+        self._callbacks.append(callback)
+        return callback
+
+    def remove_callback(self, callback: Callable[[ConfigSnapshot], None]):
+        """移除配置替换回调，未注册时忽略"""
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def check(self) -> bool:
+        """配置文件的修改时间变化时重新加载"""
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime_ns == self.snapshot.mtime_ns:
+            return False
+        return self.reload()
+
+    def reload(self) -> bool:
+        """
+        重新加载配置
+
+        Returns:
+            bool: 是否替换了配置
+        """
+        with self._lock:
+            current = self.snapshot
+            try:
+                snapshot = load_snapshot(self.path, current.version + 1)
+                for name, builder in self._builders.items():
+                    snapshot._derived[name] = builder(snapshot)
+            except Exception as e:
+                self.failed_reloads += 1
+                logger.error(f"配置重新加载失败，继续使用版本{current.version}: {str(e)}")
+                return False
+            self.snapshot = snapshot
+            self.reload_count += 1
+
+        logger.info(f"配置已重新加载 | 版本: {snapshot.version}")
+        for callback in self._callbacks:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error(f"配置重新加载回调执行失败: {str(e)}")
+        return True
+
+    async def watch(self):
+        """后台任务：定期检测配置文件变化，在线程池中重新加载，避免阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await loop.run_in_executor(None, self.check)
+            except Exception as e:
+                logger.error(f"配置检测失败: {str(e)}")
+
+    def status(self) -> Dict[str, Any]:
+        """导出配置版本信息"""
+        return {
+            "path": self.path,
+            "version": self.snapshot.version,
+            "modified_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.snapshot.mtime_ns / 1e9)),
+            "reload_count": self.reload_count,
+            "failed_reloads": self.failed_reloads
+        }
+
+# 创建全局配置实例
+settings = ConfigLoader(os.environ.get('APP_CONFIG_PATH', DEFAULT_CONFIG_PATH))
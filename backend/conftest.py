@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试公共夹具
+各测试模块共用的服务实例和测试客户端
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from fastapi.testclient import TestClient
+from app import UnifiedBackendService
+from utils.shared_store import shared_store
+
+@pytest.fixture(autouse=True)
+def isolated_shared_store(tmp_path, monkeypatch):
+    """
+    每个测试使用临时目录中的共享存储，不写入backend/data，测试之间不共享历史和token
+
+    同时设置SHARED_STORE_PATH，测试启动的子进程也使用同一个临时数据库
+    """
+    shared_store.wait_pending(5)
+    path = str(tmp_path / "shared_state.db")
+    monkeypatch.setenv("SHARED_STORE_PATH", path)
+    monkeypatch.setattr(shared_store, "path", path)
+    # 丢弃各线程已打开的连接，之后按新路径重新连接并建表
+    monkeypatch.setattr(shared_store, "_local", threading.local())
+    monkeypatch.setattr(shared_store, "_schema_ready", False)
+    monkeypatch.setattr(shared_store, "_last_write", None)
+    yield shared_store
+    # 后台写入落到本测试的数据库后再恢复
+    shared_store.wait_pending(5)
+
+@pytest.fixture
+def service():
+    """每个测试使用独立的服务实例"""
+    return UnifiedBackendService()
+
+@pytest.fixture
+def client(service):
+    """服务实例的测试客户端，进入时执行启动事件，退出时执行关闭事件"""
+    with TestClient(service.app) as client:
+        yield client
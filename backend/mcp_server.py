@@ -6,18 +6,11 @@ from typing import Dict, Any, List, Optional
 
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 
-from services.biorhythm_service import (
-    get_history, get_today_biorhythm, get_date_biorhythm, get_biorhythm_range
-)
-from services.dress_service import (
-    get_today_dress_info, get_date_dress_info, get_dress_info_range
-)
-from services.biorhythm_life_guide_service import (
-    get_biorhythm_life_guide, get_today_biorhythm_guide
-)
-from utils.date_utils import normalize_date_string
+from services.mcp_tools import Tool, ToolArgumentError, InvalidRequestError, parse_request, tool_registry
+from utils.batch_dispatch import MAX_BATCH_SIZE
+from utils.json_utils import dumps_str
 
 # 配置日志
 logging.basicConfig(
@@ -30,6 +23,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger("mcp_server")
 
+# 每个连接同时处理的请求数上限，达到上限后暂停读取该连接的新消息
+MAX_IN_FLIGHT = int(os.environ.get("MCP_MAX_IN_FLIGHT", 8))
+
 # 创建FastAPI应用
 app = FastAPI(title="生物节律MCP服务器", description="提供生物节律数据的MCP服务器")
 
@@ -43,12 +39,6 @@ app.add_middleware(
 )
 
 # MCP协议相关模型
-class MCPRequest(BaseModel):
-    jsonrpc: str = "2.0"
-    id: str
-    method: str
-    params: Dict[str, Any] = {}
-
 class MCPResponse(BaseModel):
     jsonrpc: str = "2.0"
     id: str
@@ -60,22 +50,6 @@ class MCPError(BaseModel):
     message: str
     data: Optional[Any] = None
 
-class ToolSchema(BaseModel):
-    type: str = "object"
-    properties: Dict[str, Any]
-    required: List[str] = []
-
-class Tool(BaseModel):
-    name: str
-    description: str
-    # 修改字段名，使用alias保持与MCP协议的兼容性
-    tool_schema: ToolSchema = Field(..., alias='schema')
-    
-    model_config = {
-        "populate_by_name": True,  # Pydantic V2 兼容配置
-        "validate_by_name": True   # 替代 allow_population_by_field_name
-    }
-
 class ServerInfo(BaseModel):
     name: str = "生物节律MCP服务器"
     version: str = "1.0.0"
@@ -84,112 +58,10 @@ class ServerInfo(BaseModel):
     tools: List[Tool] = []
     resources: List[Dict[str, Any]] = []
 
-# 定义工具模式
-biorhythm_today_schema = ToolSchema(
-    properties={
-        "birth_date": {"type": "string", "description": "出生日期，格式为YYYY-MM-DD"}
-    },
-    required=["birth_date"]
-)
-
-biorhythm_date_schema = ToolSchema(
-    properties={
-        "birth_date": {"type": "string", "description": "出生日期，格式为YYYY-MM-DD"},
-        "date": {"type": "string", "description": "目标日期，格式为YYYY-MM-DD"}
-    },
-    required=["birth_date", "date"]
-)
-
-biorhythm_range_schema = ToolSchema(
-    properties={
-        "birth_date": {"type": "string", "description": "出生日期，格式为YYYY-MM-DD"},
-        "days_before": {"type": "integer", "description": "当前日期之前的天数", "default": 10},
-        "days_after": {"type": "integer", "description": "当前日期之后的天数", "default": 20}
-    },
-    required=["birth_date"]
-)
-
-dress_date_schema = ToolSchema(
-    properties={
-        "date": {"type": "string", "description": "目标日期，格式为YYYY-MM-DD"}
-    },
-    required=["date"]
-)
-
-dress_range_schema = ToolSchema(
-    properties={
-        "days_before": {"type": "integer", "description": "当前日期之前的天数", "default": 1},
-        "days_after": {"type": "integer", "description": "当前日期之后的天数", "default": 6}
-    }
-)
-
-# 新的综合生活指南工具模式
-biorhythm_life_guide_schema = ToolSchema(
-    properties={
-        "birth_date": {"type": "string", "description": "出生日期，格式为YYYY-MM-DD"},
-        "location": {"type": "string", "description": "地理位置（可选）", "default": ""}
-    },
-    required=["birth_date"]
-)
-
-biorhythm_today_guide_schema = ToolSchema(
-    properties={
-        "birth_date": {"type": "string", "description": "出生日期，格式为YYYY-MM-DD"}
-    },
-    required=["birth_date"]
-)
-
-# 定义工具列表
-tools = [
-    Tool(
-        name="get_biorhythm_today",
-        description="获取今天的生物节律",
-        schema=biorhythm_today_schema
-    ),
-    Tool(
-        name="get_biorhythm_date",
-        description="获取指定日期的生物节律",
-        schema=biorhythm_date_schema
-    ),
-    Tool(
-        name="get_biorhythm_range",
-        description="获取一段时间内的生物节律",
-        schema=biorhythm_range_schema
-    ),
-    Tool(
-        name="get_dress_today",
-        description="获取今日穿衣颜色和饮食建议",
-        schema=ToolSchema(properties={})
-    ),
-    Tool(
-        name="get_dress_date",
-        description="获取指定日期的穿衣颜色和饮食建议",
-        schema=dress_date_schema
-    ),
-    Tool(
-        name="get_dress_range",
-        description="获取一段时间内的穿衣颜色和饮食建议",
-        schema=dress_range_schema
-    ),
-    Tool(
-        name="get_history",
-        description="获取历史查询的出生日期",
-        schema=ToolSchema(properties={})
-    ),
-    Tool(
-        name="get_biorhythm_life_guide",
-        description="获取综合生物节律生活指南（包含生物节律、穿衣建议、饮食建议等）",
-        schema=biorhythm_life_guide_schema
-    ),
-    Tool(
-        name="get_today_biorhythm_guide",
-        description="获取今日生物节律生活指南",
-        schema=biorhythm_today_guide_schema
-    )
-]
-
 # 创建服务器信息
-server_info = ServerInfo(tools=tools)
+server_info = ServerInfo(tools=tool_registry.tools)
+# server.info的响应内容不变，只序列化一次
+server_info_result = server_info.dict(by_alias=True)  # 使用别名
 
 # 连接管理
 class ConnectionManager:
@@ -208,104 +80,130 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 # 工具处理函数
+def call_tool(method: str, params: Dict[str, Any]) -> Any:
+    """同步执行工具调用，按名称在工具注册表中查找处理函数"""
+    return tool_registry.call(method, params)
+
 async def handle_tool_call(method: str, params: Dict[str, Any]) -> Any:
+    """在线程池中执行工具调用，耗时的工具不阻塞事件循环和同一连接上的其他请求"""
     try:
-        if method == "get_biorhythm_today":
-            birth_date = normalize_date_string(params["birth_date"])
-            return get_today_biorhythm(birth_date)
-        
-        elif method == "get_biorhythm_date":
-            birth_date = normalize_date_string(params["birth_date"])
-            date = normalize_date_string(params["date"])
-            return get_date_biorhythm(birth_date, date)
-        
-        elif method == "get_biorhythm_range":
-            birth_date = normalize_date_string(params["birth_date"])
-            days_before = params.get("days_before", 10)
-            days_after = params.get("days_after", 20)
-            return get_biorhythm_range(birth_date, days_before, days_after)
-        
-        elif method == "get_dress_today":
-            return get_today_dress_info()
-        
-        elif method == "get_dress_date":
-            date = normalize_date_string(params["date"])
-            return get_date_dress_info(date)
-        
-        elif method == "get_dress_range":
-            days_before = params.get("days_before", 1)
-            days_after = params.get("days_after", 6)
-            return get_dress_info_range(days_before, days_after)
-        
-        elif method == "get_history":
-            return {"history": get_history()}
-        
-        elif method == "get_biorhythm_life_guide":
-            birth_date = normalize_date_string(params["birth_date"])
-            location = params.get("location", "")
-            return get_biorhythm_life_guide(birth_date, location)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, call_tool, method, params)
+    except Exception as e:
+        logger.error(f"处理工具调用时出错: {str(e)}", exc_info=True)
+        raise e
+
+def error_response(request_id: str, code: int, message: str) -> Dict[str, Any]:
+    """构造错误响应"""
+    error = MCPError(code=code, message=message)
+    return MCPResponse(id=request_id, error=error.dict()).dict()
+
+async def handle_request(request_data: Any, slots: Optional[asyncio.Semaphore] = None) -> Dict[str, Any]:
+    """处理一个JSON-RPC请求，返回响应对象；指定slots时工具调用需先取得一个执行名额"""
+    try:
+        request_id, method, params = parse_request(request_data)
         
-        elif method == "get_today_biorhythm_guide":
-            birth_date = normalize_date_string(params["birth_date"])
-            return get_today_biorhythm_guide(birth_date)
+        # 处理请求
+        if method == "server.info":
+            # 返回服务器信息
+            response = MCPResponse(
+                id=request_id,
+                result=server_info_result
+            )
+        else:
+            # 处理工具调用
+            if slots is None:
+                result = await handle_tool_call(method, params)
+            else:
+                async with slots:
+                    result = await handle_tool_call(method, params)
+            response = MCPResponse(
+                id=request_id,
+                result=result
+            )
+        return response.dict(by_alias=True)  # 使用别名
         
+    except Exception as e:
+        # 处理错误
+        if isinstance(e, ToolArgumentError):
+            # 参数不符合工具Schema时使用JSON-RPC的Invalid params错误码
+            code = -32602
+        elif isinstance(e, InvalidRequestError):
+            code = -32600
         else:
-            raise ValueError(f"未知的方法: {method}")
+            code = 500
+        logger.error(f"处理请求时出错: {str(e)}", exc_info=True)
+        request_id = request_data.get("id") if isinstance(request_data, dict) else None
+        # 与成功响应一样将id转为字符串
+        return error_response("unknown" if request_id is None else str(request_id), code, str(e))
+
+async def process_message(data: str, slots: Optional[asyncio.Semaphore] = None) -> str:
+    """
+    处理一条消息，返回响应文本
+
+    消息为请求数组时按JSON-RPC批量请求处理：数组中的请求并发执行，响应按请求顺序组成一个数组返回；
+    slots限制同时执行的工具调用数，批量请求中的每个调用各占一个名额
+    """
+    try:
+        # 解析请求
+        request_data = json.loads(data)
+    except ValueError as e:
+        logger.error(f"解析消息失败: {str(e)}")
+        return dumps_str(error_response("unknown", -32700, f"Parse error: {str(e)}"))
     
-    except Exception as e:
-        logger.error(f"处理工具调用时出错: {str(e)}", exc_info=True)
-        raise e
+    if isinstance(request_data, list):
+        if not 0 < len(request_data) <= MAX_BATCH_SIZE:
+            return dumps_str(error_response("unknown", -32600, f"批量请求应包含1到{MAX_BATCH_SIZE}个请求"))
+        responses = await asyncio.gather(*(handle_request(item, slots) for item in request_data))
+        return dumps_str(list(responses))
+    return dumps_str(await handle_request(request_data, slots))
 
 # WebSocket端点
 @app.websocket("/mcp")
 async def websocket_endpoint(websocket: WebSocket):
+    """
+    每条消息作为独立任务处理，响应按完成顺序发送，客户端按id匹配请求和响应；
+    单个连接同时执行的工具调用不超过MAX_IN_FLIGHT（批量请求中的每个调用各占一个名额），
+    尚未处理完的消息同样不超过MAX_IN_FLIGHT，达到上限时暂停接收
+    """
     await manager.connect(websocket)
+    in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+    pending = asyncio.Semaphore(MAX_IN_FLIGHT)
+    # 同一时间只允许一个任务写入socket
+    send_lock = asyncio.Semaphore(1)
+    tasks = set()
+    
+    async def process(data: str):
+        try:
+            response_text = await process_message(data, in_flight)
+            async with send_lock:
+                await websocket.send_text(response_text)
+        except Exception as e:
+            # 连接已关闭等发送失败的情况
+            logger.warning(f"发送响应失败: {str(e)}")
+        finally:
+            pending.release()
+    
     try:
         while True:
             # 接收消息
             data = await websocket.receive_text()
             logger.info(f"收到消息: {data}")
             
-            try:
-                # 解析请求
-                request_data = json.loads(data)
-                request = MCPRequest(**request_data)
-                
-                # 处理请求
-                if request.method == "server.info":
-                    # 返回服务器信息
-                    response = MCPResponse(
-                        id=request.id,
-                        result=server_info.dict(by_alias=True)  # 使用别名
-                    )
-                else:
-                    # 处理工具调用
-                    result = await handle_tool_call(request.method, request.params)
-                    response = MCPResponse(
-                        id=request.id,
-                        result=result
-                    )
-                
-                # 发送响应
-                await websocket.send_text(json.dumps(response.dict(by_alias=True)))  # 使用别名
-                logger.info(f"发送响应: {response}")
-                
-            except Exception as e:
-                # 处理错误
-                error = MCPError(
-                    code=500,
-                    message=str(e)
-                )
-                response = MCPResponse(
-                    id=request_data.get("id", "unknown"),
-                    error=error.dict()
-                )
-                await websocket.send_text(json.dumps(response.dict()))
-                logger.error(f"处理请求时出错: {str(e)}", exc_info=True)
+            await pending.acquire()
+            task = asyncio.create_task(process(data))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
     
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
         logger.info("WebSocket连接已关闭")
+    finally:
+        # 连接断开后不再需要未完成请求的结果
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        manager.disconnect(websocket)
 
 # HTTP端点，用于健康检查
 @app.get("/health")
@@ -2,6 +2,9 @@
 """
 MCP服务器 - stdio模式版本
 专门用于通过stdio方式运行的MCP服务器
+
+请求按行从stdin异步读取，每个请求作为独立任务处理，工具调用在线程池中并发执行；
+响应按完成顺序交给唯一的写入任务，由客户端按id匹配
 """
 
 import asyncio
@@ -9,20 +12,14 @@ import json
 import logging
 import os
 import sys
+import threading
 from typing import Dict, Any, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 
-from services.biorhythm_service import (
-    get_history, get_today_biorhythm, get_date_biorhythm, get_biorhythm_range
-)
-from services.dress_service import (
-    get_today_dress_info, get_date_dress_info, get_dress_info_range
-)
-from services.biorhythm_life_guide_service import (
-    get_biorhythm_life_guide, get_today_biorhythm_guide
-)
-from utils.date_utils import normalize_date_string
+from services.mcp_tools import Tool, ToolArgumentError, InvalidRequestError, parse_request, tool_registry
+from utils.batch_dispatch import MAX_BATCH_SIZE
+from utils.json_utils import dumps_str
 
 # 配置日志
 logging.basicConfig(
@@ -32,13 +29,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger("mcp_stdio_server")
 
-# MCP协议相关模型
-class MCPRequest(BaseModel):
-    jsonrpc: str = "2.0"
-    id: str
-    method: str
-    params: Dict[str, Any] = {}
+# 同时处理的请求数上限，达到上限后暂停读取新请求
+MAX_CONCURRENT_CALLS = int(os.environ.get("MCP_MAX_CONCURRENT", 8))
+# 单行请求的最大长度
+STDIN_LINE_LIMIT = 16 * 1024 * 1024
 
+# MCP协议相关模型
 class MCPResponse(BaseModel):
     jsonrpc: str = "2.0"
     id: str
@@ -50,21 +46,6 @@ class MCPError(BaseModel):
     message: str
     data: Optional[Any] = None
 
-class ToolSchema(BaseModel):
-    type: str = "object"
-    properties: Dict[str, Any]
-    required: List[str] = []
-
-class Tool(BaseModel):
-    name: str
-    description: str
-    tool_schema: ToolSchema = Field(..., alias='schema')
-    
-    model_config = {
-        "populate_by_name": True,  # Pydantic V2 兼容配置
-        "validate_by_name": True   # 替代 allow_population_by_field_name
-    }
-
 class ServerInfo(BaseModel):
     name: str = "生物节律MCP服务器"
     version: str = "1.0.0"
@@ -72,257 +53,272 @@ class ServerInfo(BaseModel):
     vendor: str = "Nice Day"
     tools: List[Tool] = []
 
-# 定义工具模式
-biorhythm_today_schema = ToolSchema(
-    properties={
-        "birth_date": {"type": "string", "description": "出生日期，格式为YYYY-MM-DD"}
-    },
-    required=["birth_date"]
-)
-
-biorhythm_date_schema = ToolSchema(
-    properties={
-        "birth_date": {"type": "string", "description": "出生日期，格式为YYYY-MM-DD"},
-        "date": {"type": "string", "description": "目标日期，格式为YYYY-MM-DD"}
-    },
-    required=["birth_date", "date"]
-)
+# 创建服务器信息
+server_info = ServerInfo(tools=tool_registry.tools)
+# initialize的响应内容不变，只序列化一次
+server_info_result = server_info.dict(by_alias=True)
 
-biorhythm_range_schema = ToolSchema(
-    properties={
-        "birth_date": {"type": "string", "description": "出生日期，格式为YYYY-MM-DD"},
-        "days_before": {"type": "integer", "description": "当前日期之前的天数", "default": 10},
-        "days_after": {"type": "integer", "description": "当前日期之后的天数", "default": 20}
-    },
-    required=["birth_date"]
-)
+# 工具处理函数
+def call_tool(method: str, params: Dict[str, Any]) -> Any:
+    """同步执行工具调用，按名称在工具注册表中查找处理函数"""
+    return tool_registry.call(method, params)
 
-dress_date_schema = ToolSchema(
-    properties={
-        "date": {"type": "string", "description": "目标日期，格式为YYYY-MM-DD"}
-    },
-    required=["date"]
-)
+async def handle_tool_call(method: str, params: Dict[str, Any]) -> Any:
+    """在线程池中执行工具调用，多个调用可以同时进行"""
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, call_tool, method, params)
+    except Exception as e:
+        logger.error(f"处理工具调用时出错: {str(e)}", exc_info=True)
+        raise e
 
-dress_range_schema = ToolSchema(
-    properties={
-        "days_before": {"type": "integer", "description": "当前日期之前的天数", "default": 1},
-        "days_after": {"type": "integer", "description": "当前日期之后的天数", "default": 6}
+def error_response(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    """构造错误响应"""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {
+            "code": code,
+            "message": message
+        }
     }
-)
 
-biorhythm_life_guide_schema = ToolSchema(
-    properties={
-        "birth_date": {"type": "string", "description": "出生日期，格式为YYYY-MM-DD"},
-        "location": {"type": "string", "description": "地理位置（可选）", "default": ""}
-    },
-    required=["birth_date"]
-)
-
-biorhythm_today_guide_schema = ToolSchema(
-    properties={
-        "birth_date": {"type": "string", "description": "出生日期，格式为YYYY-MM-DD"}
-    },
-    required=["birth_date"]
-)
-
-# 定义工具列表
-tools = [
-    Tool(
-        name="get_biorhythm_today",
-        description="获取今天的生物节律",
-        schema=biorhythm_today_schema
-    ),
-    Tool(
-        name="get_biorhythm_date",
-        description="获取指定日期的生物节律",
-        schema=biorhythm_date_schema
-    ),
-    Tool(
-        name="get_biorhythm_range",
-        description="获取一段时间内的生物节律",
-        schema=biorhythm_range_schema
-    ),
-    Tool(
-        name="get_dress_today",
-        description="获取今日穿衣颜色和饮食建议",
-        schema=ToolSchema(properties={})
-    ),
-    Tool(
-        name="get_dress_date",
-        description="获取指定日期的穿衣颜色和饮食建议",
-        schema=dress_date_schema
-    ),
-    Tool(
-        name="get_dress_range",
-        description="获取一段时间内的穿衣颜色和饮食建议",
-        schema=dress_range_schema
-    ),
-    Tool(
-        name="get_history",
-        description="获取历史查询的出生日期",
-        schema=ToolSchema(properties={})
-    ),
-    Tool(
-        name="get_biorhythm_life_guide",
-        description="获取综合生物节律生活指南（包含生物节律、穿衣建议、饮食建议等）",
-        schema=biorhythm_life_guide_schema
-    ),
-    Tool(
-        name="get_today_biorhythm_guide",
-        description="获取今日生物节律生活指南",
-        schema=biorhythm_today_guide_schema
-    )
-]
-
-# 创建服务器信息
-server_info = ServerInfo(tools=tools)
-
-# 工具处理函数
-async def handle_tool_call(method: str, params: Dict[str, Any]) -> Any:
+async def handle_request(request_data: Any, slots: Optional[asyncio.Semaphore] = None) -> Dict[str, Any]:
+    """处理一个JSON-RPC请求，返回响应对象；指定slots时工具调用需先取得一个执行名额"""
     try:
-        if method == "get_biorhythm_today":
-            birth_date = normalize_date_string(params["birth_date"])
-            return get_today_biorhythm(birth_date)
-        
-        elif method == "get_biorhythm_date":
-            birth_date = normalize_date_string(params["birth_date"])
-            date = normalize_date_string(params["date"])
-            return get_date_biorhythm(birth_date, date)
-        
-        elif method == "get_biorhythm_range":
-            birth_date = normalize_date_string(params["birth_date"])
-            days_before = params.get("days_before", 10)
-            days_after = params.get("days_after", 20)
-            return get_biorhythm_range(birth_date, days_before, days_after)
-        
-        elif method == "get_dress_today":
-            return get_today_dress_info()
-        
-        elif method == "get_dress_date":
-            date = normalize_date_string(params["date"])
-            return get_date_dress_info(date)
-        
-        elif method == "get_dress_range":
-            days_before = params.get("days_before", 1)
-            days_after = params.get("days_after", 6)
-            return get_dress_info_range(days_before, days_after)
-        
-        elif method == "get_history":
-            return {"history": get_history()}
-        
-        elif method == "get_biorhythm_life_guide":
-            birth_date = normalize_date_string(params["birth_date"])
-            location = params.get("location", "")
-            return get_biorhythm_life_guide(birth_date, location)
-        
-        elif method == "get_today_biorhythm_guide":
-            birth_date = normalize_date_string(params["birth_date"])
-            return get_today_biorhythm_guide(birth_date)
+        request_id, method, params = parse_request(request_data)
         
+        # 处理请求
+        if method == "initialize":
+            # 初始化响应
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": {
+                    "protocolVersion": "2025-06-18",
+                    "capabilities": {},
+                    "serverInfo": server_info_result
+                }
+            }
+        elif method == "tools/list":
+            # 工具列表响应
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": {
+                    "tools": tool_registry.definitions()
+                }
+            }
+        elif method == "tools/call":
+            # 工具调用
+            tool_name = params.get("name")
+            arguments = params.get("arguments", {})
+            
+            if slots is None:
+                result = await handle_tool_call(tool_name, arguments)
+            else:
+                async with slots:
+                    result = await handle_tool_call(tool_name, arguments)
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": {
+                    "content": [{
+                        "type": "text",
+                        # 紧凑编码，避免缩进带来的额外体积和编码开销
+                        "text": dumps_str(result)
+                    }]
+                }
+            }
         else:
-            raise ValueError(f"未知的方法: {method}")
+            # 未知方法
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {
+                    "code": -32601,
+                    "message": f"Method not found: {method}"
+                }
+            }
     
     except Exception as e:
-        logger.error(f"处理工具调用时出错: {str(e)}", exc_info=True)
-        raise e
+        # 错误处理
+        if isinstance(e, ToolArgumentError):
+            # 参数不符合工具Schema时使用JSON-RPC的Invalid params错误码
+            code = -32602
+        elif isinstance(e, InvalidRequestError):
+            code = -32600
+        else:
+            code = -32000
+        logger.error(f"处理请求时出错: {str(e)}", exc_info=True)
+        request_id = request_data.get("id") if isinstance(request_data, dict) else None
+        # 与成功响应一样将id转为字符串
+        return error_response("unknown" if request_id is None else str(request_id), code, str(e))
+
+async def process_line(line: str, slots: Optional[asyncio.Semaphore] = None) -> str:
+    """
+    处理一行请求，返回响应行
+
+    请求为数组时按JSON-RPC批量请求处理：数组中的请求并发执行，响应按请求顺序组成一个数组写在同一行；
+    slots限制同时执行的工具调用数，批量请求中的每个调用各占一个名额
+    """
+    logger.info(f"收到请求: {line}")
+    try:
+        request_data = json.loads(line)
+    except ValueError as e:
+        response = error_response("unknown", -32700, f"Parse error: {str(e)}")
+    else:
+        if isinstance(request_data, list):
+            if 0 < len(request_data) <= MAX_BATCH_SIZE:
+                response = list(await asyncio.gather(*(handle_request(item, slots) for item in request_data)))
+            else:
+                response = error_response("unknown", -32600, f"批量请求应包含1到{MAX_BATCH_SIZE}个请求")
+        else:
+            response = await handle_request(request_data, slots)
+    response_line = dumps_str(response) + "\n"
+    logger.info(f"发送响应: {response_line.strip()}")
+    return response_line
+
+class StdoutWriter:
+    """
+    stdout的唯一写入方
+
+    响应行按放入的顺序写出；写入时队列中已积累的多行合并为一次写入和一次flush
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.flush_count = 0
+        self._queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """启动写入任务"""
+        self._task = asyncio.create_task(self._run())
+
+    def write(self, line: str):
+        """放入一行响应"""
+        self._queue.put_nowait(line)
+
+    async def _run(self):
+        closing = False
+        while not closing:
+            line = await self._queue.get()
+            if line is None:
+                return
+            lines = [line]
+            while not self._queue.empty():
+                line = self._queue.get_nowait()
+                if line is None:
+                    closing = True
+                    break
+                lines.append(line)
+            self.stream.write("".join(lines))
+            self.stream.flush()
+            self.flush_count += 1
+
+    async def close(self):
+        """写出已放入的所有响应后结束写入任务"""
+        self._queue.put_nowait(None)
+        if self._task is not None:
+            await self._task
+
+async def open_stdin_reader() -> asyncio.StreamReader:
+    """
+    将stdin连接到StreamReader
+
+    stdin不是管道（例如Windows或重定向自普通文件）时无法直接连接，改由后台线程逐行读取后写入
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STDIN_LINE_LIMIT)
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except (NotImplementedError, ValueError, OSError):
+        def feed():
+            for line in sys.stdin.buffer:
+                loop.call_soon_threadsafe(reader.feed_data, line)
+            loop.call_soon_threadsafe(reader.feed_eof)
+        threading.Thread(target=feed, name="stdin-reader", daemon=True).start()
+    return reader
+
+async def read_line(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """
+    读取一行请求，输入结束时返回空bytes
+
+    单行超过reader的长度上限时丢弃该行剩余内容直到换行符，返回None
+    """
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        # 最后一行没有换行符
+        return e.partial
+    except asyncio.LimitOverrunError as e:
+        # readline在未找到换行符时只清空缓冲区，行的剩余部分会被当作下一行读到，因此逐段丢弃到行尾
+        await reader.readexactly(e.consumed)
+        while True:
+            try:
+                await reader.readuntil(b"\n")
+                return None
+            except asyncio.IncompleteReadError:
+                return None
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+
+async def serve(reader: asyncio.StreamReader, writer: StdoutWriter, max_concurrent: int = MAX_CONCURRENT_CALLS):
+    """
+    读取请求直到输入结束，等待进行中的请求完成后返回
+
+    同时执行的工具调用不超过max_concurrent（批量请求中的每个调用各占一个名额），
+    尚未处理完的请求行同样不超过max_concurrent，达到上限时暂停读取
+    """
+    slots = asyncio.Semaphore(max_concurrent)
+    pending = asyncio.Semaphore(max_concurrent)
+    tasks = set()
+
+    async def process(line: str):
+        try:
+            writer.write(await process_line(line, slots))
+        finally:
+            pending.release()
+
+    while True:
+        raw = await read_line(reader)
+        if raw is None:
+            # 单行超过STDIN_LINE_LIMIT，该行已丢弃，回复无效请求后继续读取后续请求
+            logger.error("请求超过长度上限，已丢弃")
+            writer.write(dumps_str(error_response("unknown", -32600, "Invalid Request: 请求超过长度上限")) + "\n")
+            continue
+        if not raw:
+            break
+        try:
+            line = raw.decode("utf-8").strip()
+        except UnicodeDecodeError as e:
+            # 无法解码的行按解析错误回复，继续读取后续请求
+            logger.error(f"请求不是有效的UTF-8: {str(e)}")
+            writer.write(dumps_str(error_response("unknown", -32700, f"Parse error: {str(e)}")) + "\n")
+            continue
+        if not line:
+            continue
+        await pending.acquire()
+        task = asyncio.create_task(process(line))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 # stdio模式的主循环
 async def main():
     """stdio模式的主循环"""
     logger.info("🚀 MCP服务器启动 (stdio模式)")
     
-    while True:
-        try:
-            # 从stdin读取请求
-            line = await asyncio.get_event_loop().run_in_executor(None, sys.stdin.readline)
-            if not line:
-                break
-                
-            line = line.strip()
-            if not line:
-                continue
-            
-            logger.info(f"收到请求: {line}")
-            
-            try:
-                # 解析请求
-                request_data = json.loads(line)
-                request = MCPRequest(**request_data)
-                
-                # 处理请求
-                if request.method == "initialize":
-                    # 初始化响应
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request.id,
-                        "result": {
-                            "protocolVersion": "2025-06-18",
-                            "capabilities": {},
-                            "serverInfo": server_info.model_dump(by_alias=True)
-                        }
-                    }
-                elif request.method == "tools/list":
-                    # 工具列表响应
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request.id,
-                        "result": {
-                            "tools": [tool.model_dump(by_alias=True) for tool in tools]
-                        }
-                    }
-                elif request.method == "tools/call":
-                    # 工具调用
-                    params = request.params
-                    tool_name = params.get("name")
-                    arguments = params.get("arguments", {})
-                    
-                    result = await handle_tool_call(tool_name, arguments)
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request.id,
-                        "result": {
-                            "content": [{
-                                "type": "text",
-                                "text": json.dumps(result, ensure_ascii=False, indent=2)
-                            }]
-                        }
-                    }
-                else:
-                    # 未知方法
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request.id,
-                        "error": {
-                            "code": -32601,
-                            "message": f"Method not found: {request.method}"
-                        }
-                    }
-                
-                # 发送响应
-                response_line = json.dumps(response, ensure_ascii=False) + "\n"
-                sys.stdout.write(response_line)
-                sys.stdout.flush()
-                logger.info(f"发送响应: {response_line.strip()}")
-                
-            except Exception as e:
-                # 错误处理
-                error_response = {
-                    "jsonrpc": "2.0",
-                    "id": request_data.get("id", "unknown"),
-                    "error": {
-                        "code": -32000,
-                        "message": str(e)
-                    }
-                }
-                error_line = json.dumps(error_response, ensure_ascii=False) + "\n"
-                sys.stdout.write(error_line)
-                sys.stdout.flush()
-                logger.error(f"处理请求时出错: {str(e)}", exc_info=True)
-        
-        except Exception as e:
-            logger.error(f"处理消息时出错: {str(e)}", exc_info=True)
-            break
+    reader = await open_stdin_reader()
+    writer = StdoutWriter()
+    writer.start()
+    try:
+        await serve(reader, writer)
+    finally:
+        await writer.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -3,48 +3,74 @@
 """
 API文档服务
 提供API文档的生成、管理和访问功能
+
+支持两种存储引擎，由app_config.json的api_docs.storage选择:
+- json（默认）: 文档以ID为键缓存在内存中，读取时按文件修改时间刷新；写入在锁内修改内存索引，
+  短时间内的多次写入合并为一次落盘。落盘时在文件锁内把本进程的修改合并到文件的最新内容上，
+  先写临时文件再原子替换，多个工作进程的写入不会互相覆盖
+- sqlite: 每个文档一行，openApiSpec压缩后单独存放，列表只读取摘要列；
+  首次启动时自动导入api_docs.json中的已有文档
 """
 
 import os
+import sys
 import json
+import zlib
+import atexit
+import sqlite3
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Mapping
+
+try:
+    import fcntl
+except ImportError:
+    # Windows没有fcntl，也不支持多进程模式，只需进程内的锁
+    fcntl = None
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+from utils.json_utils import dumps
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DOCS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'docs')
+DEFAULT_SQLITE_PATH = os.path.join(BACKEND_DIR, 'data', 'api_docs.db')
+
+# 文档列表只返回的摘要字段，不包含体积较大的openApiSpec
+SUMMARY_FIELDS = ("id", "title", "version", "description", "createdAt", "updatedAt")
+
+def summarize_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """提取文档摘要"""
+    return {field: doc[field] for field in SUMMARY_FIELDS if field in doc}
 
-class ApiDocsService:
-    """API文档服务类"""
+class BaseApiDocsService:
+    """API文档服务的公共部分，各存储引擎实现文档的增删改查"""
     
-    def __init__(self):
-        self.docs_dir = os.path.join(os.path.dirname(__file__), 'docs')
-        self.docs_file = os.path.join(self.docs_dir, 'api_docs.json')
-        self.ensure_docs_dir()
-        
-    def ensure_docs_dir(self):
-        """确保文档目录存在"""
-        if not os.path.exists(self.docs_dir):
-            os.makedirs(self.docs_dir)
-            
-        # 如果文档文件不存在，创建默认文档
-        if not os.path.exists(self.docs_file):
-            self.create_default_docs()
+    def list_summaries(self) -> List[Dict[str, Any]]:
+        """获取所有文档的摘要"""
+        return [summarize_doc(doc) for doc in self.get_all_docs()['docs']]
     
-    def create_default_docs(self):
-        """创建默认API文档"""
-        default_docs = {
-            "docs": [
-                {
-                    "id": "main-api",
-                    "title": "统一后端API服务",
-                    "version": "1.0.0",
-                    "description": "整合生物节律、玛雅历法和穿搭建议的统一API服务",
-                    "openApiSpec": self.generate_openapi_spec(),
-                    "createdAt": datetime.now().isoformat(),
-                    "updatedAt": datetime.now().isoformat()
-                }
-            ]
+    def flush(self):
+        """写入尚未落盘的修改，默认无需操作"""
+    
+    def default_doc(self) -> Dict[str, Any]:
+        """默认的主API文档"""
+        return {
+            "id": "main-api",
+            "title": "统一后端API服务",
+            "version": "1.0.0",
+            "description": "整合生物节律、玛雅历法和穿搭建议的统一API服务",
+            "openApiSpec": self.generate_openapi_spec(),
+            "createdAt": datetime.now().isoformat(),
+            "updatedAt": datetime.now().isoformat()
         }
-        
-        with open(self.docs_file, 'w', encoding='utf-8') as f:
-            json.dump(default_docs, f, ensure_ascii=False, indent=2)
     
     def generate_openapi_spec(self):
         """生成OpenAPI规范"""
@@ -118,74 +144,470 @@ class ApiDocsService:
                 }
             }
         }
+
+class ApiDocsService(BaseApiDocsService):
+    """API文档服务类，以JSON文件保存全部文档"""
     
-    def get_all_docs(self):
-        """获取所有API文档"""
+    def __init__(self, docs_dir: Optional[str] = None, flush_delay: float = 0.5):
+        self.docs_dir = docs_dir or DEFAULT_DOCS_DIR
+        self.docs_file = os.path.join(self.docs_dir, 'api_docs.json')
+        # 合并写入的等待时间（秒），0表示每次写入立即落盘
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._docs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loaded_mtime_ns = None
+        # 未落盘的修改：{文档ID: 新文档，None表示删除}
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}
+        # 正在落盘的修改，写入完成前读取时仍需应用
+        self._flushing: Dict[str, Optional[Dict[str, Any]]] = {}
+        # 串行执行落盘；落盘的文件读写不持有self._lock，不阻塞读取
+        self._flush_lock = threading.Lock()
+        self._flush_timer = None
+        self._owner_pid = os.getpid()
+        self.flush_count = 0
+        self.ensure_docs_dir()
+        self._load()
+        
+    def ensure_docs_dir(self):
+        """确保文档目录存在"""
+        if not os.path.exists(self.docs_dir):
+            os.makedirs(self.docs_dir)
+            
+        # 如果文档文件不存在，创建默认文档
+        if not os.path.exists(self.docs_file):
+            self.create_default_docs()
+    
+    def create_default_docs(self):
+        """创建默认API文档"""
+        self._write_file({"docs": [self.default_doc()]})
+    
+    def _read_file(self):
+        """
+        读取文件中的全部文档
+        
+        Returns:
+            tuple: (以ID为键的文档索引, 文件修改时间（纳秒）)
+        """
+        mtime_ns = os.stat(self.docs_file).st_mtime_ns
+        with open(self.docs_file, 'r', encoding='utf-8') as f:
+            docs = json.load(f).get('docs', [])
+        return OrderedDict((doc.get('id'), doc) for doc in docs), mtime_ns
+    
+    def _apply_pending(self, docs: "OrderedDict[str, Dict[str, Any]]"):
+        """将未落盘的修改应用到docs上"""
+        for doc_id, doc in (*self._flushing.items(), *self._pending.items()):
+            if doc is None:
+                docs.pop(doc_id, None)
+            else:
+                docs[doc_id] = doc
+    
+    def _load(self):
+        """从文件重新加载内存索引并保留未落盘的修改，文件无法读取时使用默认文档"""
+        with self._lock:
+            try:
+                docs, mtime_ns = self._read_file()
+            except Exception as e:
+                logger.error(f"读取API文档失败，使用默认文档: {str(e)}")
+                mtime_ns = None
+                default_doc = self.default_doc()
+                docs = OrderedDict([(default_doc['id'], default_doc)])
+            self._apply_pending(docs)
+            self._docs = docs
+            self._loaded_mtime_ns = mtime_ns
+    
+    def _refresh(self):
+        """文件被其他进程修改时重新加载"""
         try:
-            with open(self.docs_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            mtime_ns = os.stat(self.docs_file).st_mtime_ns
+        except OSError:
+            return
+        if mtime_ns != self._loaded_mtime_ns:
+            self._load()
+    
+    @contextmanager
+    def _file_lock(self):
+        """跨进程的文件锁，保证读取、合并和替换文件之间没有其他进程写入"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.docs_file + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    
+    def _write_file(self, content: Dict[str, Any]) -> int:
+        """
+        先写同目录下的临时文件再原子替换，写入中途失败不会留下不完整的文件
+        
+        Returns:
+            int: 写入后文件的修改时间（纳秒）
+        """
+        fd, temp_path = tempfile.mkstemp(prefix='.api_docs.', suffix='.tmp', dir=self.docs_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(content, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.docs_file)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return os.stat(self.docs_file).st_mtime_ns
+    
+    def flush(self):
+        """
+        立即将未落盘的修改合并到文件的最新内容上写入，其他进程已写入的文档不会被覆盖
+        
+        只在取出和提交修改时持有self._lock，等待文件锁和读写文件期间读取和新的修改不受影响
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._pending:
+                    return
+                self._flushing, self._pending = self._pending, {}
+                fallback = OrderedDict(self._docs)
+            
+            try:
+                with self._file_lock():
+                    try:
+                        docs, _ = self._read_file()
+                    except Exception as e:
+                        logger.error(f"读取API文档失败，以内存中的文档为准: {str(e)}")
+                        docs = fallback
+                    for doc_id, doc in self._flushing.items():
+                        if doc is None:
+                            docs.pop(doc_id, None)
+                        else:
+                            docs[doc_id] = doc
+                    mtime_ns = self._write_file({"docs": list(docs.values())})
+            except BaseException:
+                with self._lock:
+                    # 写入失败时放回未落盘的修改，落盘期间的新修改优先
+                    self._flushing.update(self._pending)
+                    self._pending, self._flushing = self._flushing, {}
+                raise
+            
+            with self._lock:
+                self._flushing = {}
+                # 应用落盘期间产生的新修改
+                self._apply_pending(docs)
+                self._docs = docs
+                self._loaded_mtime_ns = mtime_ns
+                self.flush_count += 1
+    
+    def _flush_if_immediate(self):
+        """flush_delay为0时立即落盘，需在释放self._lock之后调用"""
+        if self.flush_delay <= 0:
+            self.flush()
+    
+    def _mark_dirty(self, doc_id: str, doc: Optional[Dict[str, Any]]):
+        """记录一个未落盘的修改，flush_delay秒内的后续修改合并到同一次写入"""
+        self._pending[doc_id] = doc
+        if self.flush_delay > 0 and self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_delay, self._flush_in_background)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def _flush_in_background(self):
+        """定时器线程中执行的落盘"""
+        try:
+            self.flush()
         except Exception as e:
-            # 如果读取失败，返回默认文档
-            return {
-                "docs": [
-                    {
-                        "id": "main-api",
-                        "title": "统一后端API服务",
-                        "version": "1.0.0",
-                        "description": "整合生物节律、玛雅历法和穿搭建议的统一API服务",
-                        "openApiSpec": self.generate_openapi_spec(),
-                        "createdAt": datetime.now().isoformat(),
-                        "updatedAt": datetime.now().isoformat()
-                    }
-                ]
-            }
+            logger.error(f"API文档写入失败: {str(e)}")
+    
+    def _new_doc_id(self) -> str:
+        """生成文档ID，同一秒内创建多个文档时追加序号；fork出的工作进程追加进程号，避免彼此重复"""
+        doc_id = base_id = f"doc-{int(datetime.now().timestamp())}"
+        if os.getpid() != self._owner_pid:
+            doc_id = base_id = f"{base_id}-p{os.getpid()}"
+        suffix = 1
+        while doc_id in self._docs:
+            suffix += 1
+            doc_id = f"{base_id}-{suffix}"
+        return doc_id
+    
+    def get_all_docs(self):
+        """获取所有API文档"""
+        with self._lock:
+            self._refresh()
+            return {"docs": list(self._docs.values())}
     
     def get_doc_by_id(self, doc_id: str):
         """根据ID获取特定API文档"""
-        docs = self.get_all_docs()
-        for doc in docs.get('docs', []):
-            if doc.get('id') == doc_id:
-                return doc
-        return None
+        with self._lock:
+            self._refresh()
+            return self._docs.get(doc_id)
     
     def create_doc(self, doc_data: Dict[str, Any]):
         """创建新的API文档"""
-        docs = self.get_all_docs()
-        doc_data['id'] = f"doc-{int(datetime.now().timestamp())}"
-        doc_data['createdAt'] = datetime.now().isoformat()
-        doc_data['updatedAt'] = datetime.now().isoformat()
-        docs['docs'].append(doc_data)
-        
-        with open(self.docs_file, 'w', encoding='utf-8') as f:
-            json.dump(docs, f, ensure_ascii=False, indent=2)
-            
+        with self._lock:
+            self._refresh()
+            doc_data['id'] = self._new_doc_id()
+            doc_data['createdAt'] = datetime.now().isoformat()
+            doc_data['updatedAt'] = datetime.now().isoformat()
+            self._docs[doc_data['id']] = doc_data
+            self._mark_dirty(doc_data['id'], doc_data)
+        self._flush_if_immediate()
         return doc_data
     
     def update_doc(self, doc_id: str, doc_data: Dict[str, Any]):
         """更新API文档"""
-        docs = self.get_all_docs()
-        for i, doc in enumerate(docs.get('docs', [])):
-            if doc.get('id') == doc_id:
-                doc_data['id'] = doc_id
-                doc_data['createdAt'] = doc.get('createdAt', datetime.now().isoformat())
-                doc_data['updatedAt'] = datetime.now().isoformat()
-                docs['docs'][i] = doc_data
-                
-                with open(self.docs_file, 'w', encoding='utf-8') as f:
-                    json.dump(docs, f, ensure_ascii=False, indent=2)
-                    
-                return doc_data
-        return None
+        with self._lock:
+            self._refresh()
+            doc = self._docs.get(doc_id)
+            if doc is None:
+                return None
+            doc_data['id'] = doc_id
+            doc_data['createdAt'] = doc.get('createdAt', datetime.now().isoformat())
+            doc_data['updatedAt'] = datetime.now().isoformat()
+            # 整体替换而不是原地修改，已返回给调用方的旧文档不受影响
+            self._docs[doc_id] = doc_data
+            self._mark_dirty(doc_id, doc_data)
+        self._flush_if_immediate()
+        return doc_data
     
     def delete_doc(self, doc_id: str):
-        """删除API文档"""
-        docs = self.get_all_docs()
-        docs['docs'] = [doc for doc in docs.get('docs', []) if doc.get('id') != doc_id]
-        
-        with open(self.docs_file, 'w', encoding='utf-8') as f:
-            json.dump(docs, f, ensure_ascii=False, indent=2)
-            
+        """删除API文档，文档不存在时返回False"""
+        with self._lock:
+            self._refresh()
+            if self._docs.pop(doc_id, None) is None:
+                return False
+            self._mark_dirty(doc_id, None)
+        self._flush_if_immediate()
         return True
 
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS api_docs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    version TEXT,
+    description TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    extra TEXT NOT NULL DEFAULT '{}',
+    spec BLOB
+);
+CREATE TABLE IF NOT EXISTS api_docs_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# 摘要字段与表列的对应关系
+SUMMARY_COLUMNS = {
+    "id": "id",
+    "title": "title",
+    "version": "version",
+    "description": "description",
+    "createdAt": "created_at",
+    "updatedAt": "updated_at"
+}
+
+# 记录已导入JSON文档的元数据键，导入只执行一次，之后删除全部文档也不会重新导入
+MIGRATED_KEY = "migrated_from_json"
+
+class SqliteApiDocsService(BaseApiDocsService):
+    """
+    以SQLite保存API文档
+
+    每个文档一行，id列带唯一索引；openApiSpec以zlib压缩的JSON存放在spec列，
+    摘要列表不读取该列。与共享存储相同，每个进程、每个线程使用各自的连接
+    """
+    
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, legacy_file: Optional[str] = None,
+                 compress_level: int = 6):
+        self.path = path
+        self.compress_level = compress_level
+        self._local = threading.local()
+        self.migrated_count = self.migrate_from_json(legacy_file or os.path.join(DEFAULT_DOCS_DIR, 'api_docs.json'))
+    
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前进程、当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # isolation_level=None：由各方法显式控制事务
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SQLITE_SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+    
+    def _to_row(self, doc: Dict[str, Any]) -> tuple:
+        """将文档拆分为表列，摘要和openApiSpec以外的字段保存在extra列"""
+        extra = {key: value for key, value in doc.items() if key not in SUMMARY_COLUMNS and key != 'openApiSpec'}
+        spec = None
+        if 'openApiSpec' in doc:
+            spec = zlib.compress(dumps(doc['openApiSpec']), self.compress_level)
+        return (
+            doc.get('id'), doc.get('title'), doc.get('version'), doc.get('description'),
+            doc.get('createdAt'), doc.get('updatedAt'), json.dumps(extra, ensure_ascii=False), spec
+        )
+    
+    @staticmethod
+    def _summary_from_row(row: tuple) -> Dict[str, Any]:
+        """由摘要列还原摘要，空列不输出"""
+        return {field: value for field, value in zip(SUMMARY_COLUMNS, row) if value is not None}
+    
+    def _doc_from_row(self, row: tuple) -> Dict[str, Any]:
+        """由完整的一行还原文档"""
+        doc = self._summary_from_row(row[:6])
+        doc.update(json.loads(row[6]))
+        if row[7] is not None:
+            doc['openApiSpec'] = json.loads(zlib.decompress(row[7]))
+        return doc
+    
+    def _insert(self, conn: sqlite3.Connection, doc: Dict[str, Any]):
+        conn.execute(
+            "INSERT INTO api_docs (id, title, version, description, created_at, updated_at, extra, spec) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            self._to_row(doc)
+        )
+    
+    def migrate_from_json(self, legacy_file: str) -> int:
+        """
+        导入JSON文件中的文档，已存在的ID跳过；JSON文件不存在时写入默认文档
+        
+        Returns:
+            int: 本次导入的文档数，已导入过时为0
+        """
+        conn = self._connect()
+        # BEGIN IMMEDIATE：多个工作进程同时启动时只有一个执行导入
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM api_docs_meta WHERE key = ?", (MIGRATED_KEY,)).fetchone():
+                conn.execute("ROLLBACK")
+                return 0
+            if os.path.exists(legacy_file):
+                with open(legacy_file, 'r', encoding='utf-8') as f:
+                    docs = json.load(f).get('docs', [])
+            else:
+                docs = [self.default_doc()]
+            count = 0
+            for doc in docs:
+                exists = conn.execute("SELECT 1 FROM api_docs WHERE id = ?", (doc.get('id'),)).fetchone()
+                if doc.get('id') and not exists:
+                    self._insert(conn, doc)
+                    count += 1
+            conn.execute(
+                "INSERT INTO api_docs_meta (key, value) VALUES (?, ?)",
+                (MIGRATED_KEY, json.dumps({"file": legacy_file, "count": count, "at": datetime.now().isoformat()}))
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if count:
+            logger.info(f"已从{legacy_file}导入{count}个API文档")
+        return count
+    
+    def list_summaries(self) -> List[Dict[str, Any]]:
+        """获取所有文档的摘要，不读取openApiSpec"""
+        rows = self._connect().execute(
+            "SELECT id, title, version, description, created_at, updated_at FROM api_docs ORDER BY seq"
+        ).fetchall()
+        return [self._summary_from_row(row) for row in rows]
+    
+    def get_all_docs(self):
+        """获取所有API文档"""
+        rows = self._connect().execute(
+            "SELECT id, title, version, description, created_at, updated_at, extra, spec FROM api_docs ORDER BY seq"
+        ).fetchall()
+        return {"docs": [self._doc_from_row(row) for row in rows]}
+    
+    def get_doc_by_id(self, doc_id: str):
+        """根据ID获取特定API文档"""
+        row = self._connect().execute(
+            "SELECT id, title, version, description, created_at, updated_at, extra, spec FROM api_docs WHERE id = ?",
+            (doc_id,)
+        ).fetchone()
+        return self._doc_from_row(row) if row else None
+    
+    def create_doc(self, doc_data: Dict[str, Any]):
+        """创建新的API文档"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            doc_id = base_id = f"doc-{int(datetime.now().timestamp())}"
+            suffix = 1
+            while conn.execute("SELECT 1 FROM api_docs WHERE id = ?", (doc_id,)).fetchone():
+                suffix += 1
+                doc_id = f"{base_id}-{suffix}"
+            doc_data['id'] = doc_id
+            doc_data['createdAt'] = datetime.now().isoformat()
+            doc_data['updatedAt'] = datetime.now().isoformat()
+            self._insert(conn, doc_data)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return doc_data
+    
+    def update_doc(self, doc_id: str, doc_data: Dict[str, Any]):
+        """更新API文档"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT created_at FROM api_docs WHERE id = ?", (doc_id,)).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            doc_data['id'] = doc_id
+            doc_data['createdAt'] = row[0] or datetime.now().isoformat()
+            doc_data['updatedAt'] = datetime.now().isoformat()
+            values = self._to_row(doc_data)
+            conn.execute(
+                "UPDATE api_docs SET title = ?, version = ?, description = ?, created_at = ?, updated_at = ?, "
+                "extra = ?, spec = ? WHERE id = ?",
+                values[1:] + (doc_id,)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return doc_data
+    
+    def delete_doc(self, doc_id: str):
+        """删除API文档，文档不存在时返回False"""
+        cursor = self._connect().execute("DELETE FROM api_docs WHERE id = ?", (doc_id,))
+        return cursor.rowcount > 0
+    
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+def create_api_docs_service(config: Mapping[str, Any]) -> BaseApiDocsService:
+    """
+    按配置创建API文档服务
+    
+    Args:
+        config: api_docs配置段，storage为json或sqlite，sqlite_path为相对backend目录的数据库路径
+    """
+    storage = config.get('storage', 'json')
+    if storage == 'sqlite':
+        path = config.get('sqlite_path') or DEFAULT_SQLITE_PATH
+        return SqliteApiDocsService(os.path.join(BACKEND_DIR, path))
+    if storage != 'json':
+        logger.warning(f"未知的API文档存储引擎: {storage}，使用json")
+    return ApiDocsService()
+
 # 创建全局实例
-api_docs_service = ApiDocsService()
\ No newline at end of file
+api_docs_service = create_api_docs_service(settings.snapshot.section('api_docs'))
+
+# 进程退出前写入尚未落盘的修改
+atexit.register(api_docs_service.flush)
@@ -5,24 +5,16 @@
 遵循生物节律报告生成器的封装格式
 """
 
-import json
+import math
 import os
 import sys
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
-import numpy as np
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.date_utils import parse_date, get_date_range
-
-# 加载配置
-config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'app_config.json')
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = json.load(f)
-
-# 获取生物节律周期配置
-CYCLES = config['biorhythm']['cycles']
+from config.settings import settings
 
 class BiorhythmLifeGuideService:
     """综合生物节律生活指南服务"""
@@ -58,7 +50,7 @@ class BiorhythmLifeGuideService:
     
     def calculate_rhythm_value(self, cycle: int, days_since_birth: int) -> int:
         """计算特定周期的节律值"""
-        return int(100 * np.sin(2 * np.pi * days_since_birth / cycle))
+        return int(100 * math.sin(2 * math.pi * days_since_birth / cycle))
     
     def calculate_biorhythm(self, birth_date: str, target_date: str) -> Dict[str, int]:
         """计算特定日期的生物节律值"""
@@ -68,9 +60,11 @@ class BiorhythmLifeGuideService:
         # 计算天数差
         days_since_birth = (target_date_obj - birth_date_obj).days
 
-        physical_value = self.calculate_rhythm_value(CYCLES['physical'], days_since_birth)
-        emotional_value = self.calculate_rhythm_value(CYCLES['emotional'], days_since_birth)
-        intellectual_value = self.calculate_rhythm_value(CYCLES['intellectual'], days_since_birth)
+        # 生物节律周期配置，随配置重新加载更新
+        cycles = settings.snapshot.biorhythm.cycles
+        physical_value = self.calculate_rhythm_value(cycles['physical'], days_since_birth)
+        emotional_value = self.calculate_rhythm_value(cycles['emotional'], days_since_birth)
+        intellectual_value = self.calculate_rhythm_value(cycles['intellectual'], days_since_birth)
 
         return {
             "physical": physical_value,
@@ -1,36 +1,96 @@
 import datetime
-import json
 import os
-import pandas as pd
 import random
 import sys
-from typing import Dict, Any, List
+import threading
+import zlib
+from typing import Dict, Any, List, Mapping, Optional, Tuple
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.date_utils import parse_date, get_date_range
-
-# 加载配置
-config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'app_config.json')
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = json.load(f)
-
-# 获取配置
-FIVE_ELEMENTS = config['five_elements']
-COLOR_SYSTEMS = config['color_systems']
-DAILY_FOOD = config['daily_food']
-WEEKDAY_ELEMENTS = config['weekday_elements']
-STAR_COLORS = config['star_colors']
-WEEKDAY_NAMES = config['weekday_names']
-
-def get_daily_five_element(date=None):
+from utils.date_utils import parse_date, get_date_range, iter_dates, get_date_context
+from utils.json_utils import dumps, join_array
+from utils.compression import Compressor, VariantCache
+from config.settings import settings, ConfigSnapshot
+
+# 派生索引在配置快照中的名称
+DRESS_INDEXES = "dress_indexes"
+
+def _color_relation(five_elements, daily_element, element):
+    """计算颜色五行与当日五行的关系"""
+    if element == daily_element:
+        return "相同"
+    if five_elements[daily_element]["生"] == element or five_elements[element]["生"] == daily_element:
+        return "相生"
+    return "相克" if five_elements[daily_element]["克"] == element else "被克"
+
+def build_dress_indexes(config: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    根据配置预先构建穿搭计算所需的索引结构
+    
+    五行关系、推荐颜色和食物候选池只依赖静态配置，在加载配置时构建一次，
+    请求路径上只做查表。
+    """
+    five_elements = config['five_elements']
+    color_systems = config['color_systems']
+    daily_food = config['daily_food']
+    elements = tuple(five_elements.keys())
+    
+    # 每种基础五行对应的可替换五行
+    alternative_elements = {
+        base: tuple(e for e in elements if e != base)
+        for base in elements
+    }
+    
+    # 每种当日五行下，各颜色系统的关系、基础吉凶和随机种子偏移
+    color_relations = {}
+    recommended_colors = {}
+    for daily_element in elements:
+        relations = []
+        for color_system, info in color_systems.items():
+            relation = _color_relation(five_elements, daily_element, info["五行"])
+            base_luck = "吉" if relation in ("相同", "相生") else ("不吉" if relation == "被克" else "中性")
+            # 使用稳定的校验和代替hash()，保证不同进程间结果一致
+            seed_offset = zlib.crc32(color_system.encode('utf-8'))
+            relations.append((color_system, info["颜色"], relation, base_luck, seed_offset))
+        color_relations[daily_element] = tuple(relations)
+        recommended_colors[daily_element] = tuple(
+            item[0] for item in relations if item[2] in ("相同", "相生")
+        )
+    
+    # 所有可能的宜食食物和忌食食物（去重并保持配置顺序）
+    all_good_foods = tuple(dict.fromkeys(f for day_foods in daily_food.values() for f in day_foods["宜"]))
+    all_bad_foods = tuple(dict.fromkeys(f for day_foods in daily_food.values() for f in day_foods["忌"]))
+    
+    # 每个星期几保留的基础食物，以及可供随机补充的剩余食物
+    food_pools = {}
+    for weekday, day_foods in daily_food.items():
+        base_good = tuple(day_foods["宜"][:2])
+        base_bad = tuple(day_foods["忌"][:2])
+        food_pools[int(weekday)] = {
+            "宜": (base_good, tuple(f for f in all_good_foods if f not in base_good)),
+            "忌": (base_bad, tuple(f for f in all_bad_foods if f not in base_bad))
+        }
+    
+    return {
+        "alternative_elements": alternative_elements,
+        "color_relations": color_relations,
+        "recommended_colors": recommended_colors,
+        "food_pools": food_pools
+    }
+
+# 索引随配置快照一起构建，配置重新加载时与新配置一同替换
+settings.register_derived(DRESS_INDEXES, lambda snapshot: build_dress_indexes(snapshot.data))
+
+def get_daily_five_element(date=None, snapshot: Optional[ConfigSnapshot] = None):
     """根据日期计算当日五行属性"""
     date = parse_date(date)
+    snapshot = snapshot or settings.snapshot
     
     # 使用日期的多个因素来确定五行属性，使每天都有所不同
     # 1. 使用星期几作为基础
     weekday = date.weekday()
-    base_element = WEEKDAY_ELEMENTS[weekday]
+    base_element = snapshot.dress.weekday_elements[weekday]
     
     # 2. 使用日期的日、月、年的组合来调整
     day = date.day
@@ -40,49 +100,42 @@ def get_daily_five_element(date=None):
     # 使用日期的各个部分计算一个哈希值，用于确定五行
     date_hash = (day * 100 + month * 10 + year % 10) % 5
     
-    # 五行列表
-    elements = list(FIVE_ELEMENTS.keys())  # ['金', '木', '水', '火', '土']
-    
     # 根据日期哈希值调整基础五行
     # 如果哈希值为0，保持原有五行
     # 否则，根据哈希值选择不同的五行
     if date_hash != 0:
         # 确保选择的五行与基础五行不同
-        available_elements = [e for e in elements if e != base_element]
+        available_elements = snapshot.derived(DRESS_INDEXES)["alternative_elements"][base_element]
         # 使用哈希值选择一个五行
         selected_index = (date_hash - 1) % len(available_elements)
         return available_elements[selected_index]
     
     return base_element
 
-def get_daily_star_influence(date=None):
+def get_daily_star_influence(date=None, snapshot: Optional[ConfigSnapshot] = None):
     """计算当日星宿运行对穿衣颜色的影响"""
     date = parse_date(date)
+    star_colors = (snapshot or settings.snapshot).dress.star_colors
     
     # 使用日期的多个因素来确定星宿影响
-    day_of_year = date.timetuple().tm_yday  # 一年中的第几天
+    day_of_year = get_date_context(date).day_of_year  # 一年中的第几天
     day = date.day
     month = date.month
     
     # 使用日期的不同组合来计算星宿索引
     # 这样可以确保不同日期有不同的星宿影响
-    star_index = (day_of_year + day * month) % len(STAR_COLORS)
+    star_index = (day_of_year + day * month) % len(star_colors)
     
-    return STAR_COLORS[star_index]
+    return star_colors[star_index]
 
 def get_recommended_colors(date=None):
     """获取当日推荐穿衣颜色"""
-    daily_element = get_daily_five_element(date)
-    star_color = get_daily_star_influence(date)
+    snapshot = settings.snapshot
+    daily_element = get_daily_five_element(date, snapshot)
+    star_color = get_daily_star_influence(date, snapshot)
     
     # 获取与当日五行相生或相同的颜色系统
-    recommended_colors = []
-    for color_system, info in COLOR_SYSTEMS.items():
-        element = info["五行"]
-        if (element == daily_element or 
-            FIVE_ELEMENTS[daily_element]["生"] == element or 
-            FIVE_ELEMENTS[element]["生"] == daily_element):
-            recommended_colors.append(color_system)
+    recommended_colors = list(snapshot.derived(DRESS_INDEXES)["recommended_colors"][daily_element])
     
     # 如果星宿颜色不在推荐列表中，也添加进去
     if star_color not in recommended_colors:
@@ -90,46 +143,31 @@ def get_recommended_colors(date=None):
     
     return recommended_colors
 
-def get_daily_food_suggestions(date=None):
+def get_daily_food_suggestions(date=None, snapshot: Optional[ConfigSnapshot] = None):
     """获取当日饮食建议"""
     date = parse_date(date)
+    snapshot = snapshot or settings.snapshot
     
-    # 基础食物建议基于星期几
-    weekday = date.weekday()
-    base_suggestions = DAILY_FOOD[str(weekday)]
-    
-    # 使用日期的日、月来调整食物建议，使每天都有所不同
-    day = date.day
-    month = date.month
-    
-    # 所有可能的宜食食物和忌食食物
-    all_good_foods = []
-    all_bad_foods = []
-    
-    for day_foods in DAILY_FOOD.values():
-        all_good_foods.extend(day_foods["宜"])
-        all_bad_foods.extend(day_foods["忌"])
-    
-    # 去重
-    all_good_foods = list(set(all_good_foods))
-    all_bad_foods = list(set(all_bad_foods))
+    # 基础食物建议和候选池基于星期几
+    pools = snapshot.derived(DRESS_INDEXES)["food_pools"][date.weekday()]
+    base_good, remaining_good = pools["宜"]
+    base_bad, remaining_bad = pools["忌"]
     
     # 使用日期生成随机种子，确保同一天生成的结果一致
-    random.seed(day + month * 100 + date.year * 10000)
+    # 使用独立的随机数生成器，避免后台预计算与请求线程互相干扰
+    rng = random.Random(date.day + date.month * 100 + date.year * 10000)
     
-    # 从基础建议中保留一部分，并添加一些随机选择的食物
-    good_foods = base_suggestions["宜"][:2]  # 保留前两个
-    bad_foods = base_suggestions["忌"][:2]   # 保留前两个
+    # 从基础建议中保留前两个，并添加一些随机选择的食物
+    good_foods = list(base_good)
+    bad_foods = list(base_bad)
     
     # 添加一个随机选择的宜食食物
-    remaining_good = [f for f in all_good_foods if f not in good_foods]
     if remaining_good:
-        good_foods.append(random.choice(remaining_good))
+        good_foods.append(rng.choice(remaining_good))
     
     # 添加一个随机选择的忌食食物
-    remaining_bad = [f for f in all_bad_foods if f not in bad_foods]
     if remaining_bad:
-        bad_foods.append(random.choice(remaining_bad))
+        bad_foods.append(rng.choice(remaining_bad))
     
     return {
         "宜": good_foods,
@@ -139,53 +177,44 @@ def get_daily_food_suggestions(date=None):
 def get_dress_info_for_date(date=None):
     """获取指定日期的穿衣与饮食建议"""
     date = parse_date(date)
-    daily_element = get_daily_five_element(date)
+    # 整个计算过程使用同一个配置快照，配置中途替换也不会混用新旧数据
+    snapshot = settings.snapshot
+    daily_element = get_daily_five_element(date, snapshot)
+    
+    # 根据日期调整吉凶判断，使每天的建议更加多样化
+    date_seed = date.day + date.month * 100 + date.year * 10000
     
     # 获取颜色建议
     color_suggestions = []
-    for color_system, info in COLOR_SYSTEMS.items():
-        element = info["五行"]
-        relation = "相同" if element == daily_element else (
-            "相生" if FIVE_ELEMENTS[daily_element]["生"] == element or FIVE_ELEMENTS[element]["生"] == daily_element else (
-            "相克" if FIVE_ELEMENTS[daily_element]["克"] == element else "被克"
-            )
-        )
-        
-        # 根据日期调整吉凶判断，使每天的建议更加多样化
-        day = date.day
-        month = date.month
-        
+    for color_system, colors, relation, base_luck, seed_offset in snapshot.derived(DRESS_INDEXES)["color_relations"][daily_element]:
         # 使用日期生成随机种子，确保同一天生成的结果一致
-        random.seed(day + month * 100 + date.year * 10000 + hash(color_system))
-        
-        # 基于五行关系的基础吉凶判断
-        base_luck = "吉" if relation in ["相同", "相生"] else ("不吉" if relation == "被克" else "中性")
+        rng = random.Random(date_seed + seed_offset)
         
         # 有10%的概率反转吉凶判断，增加变化性
         luck = base_luck
-        if random.random() < 0.1:
+        if rng.random() < 0.1:
             if base_luck == "吉":
                 luck = "中性"
             elif base_luck == "不吉":
                 luck = "中性"
             elif base_luck == "中性":
-                luck = "吉" if random.random() < 0.5 else "不吉"
+                luck = "吉" if rng.random() < 0.5 else "不吉"
         
         # 根据日期调整描述，使每天的建议更加多样化
         descriptions = [
             f"于当日五行{relation}，{luck}相宜。今日若身着此类衣物配饰，有助于提升个人气场。",
             f"今日五行{relation}，整体环境{luck}。此颜色系能够帮助你更好地适应今天的能量场。",
             f"当日五行与此颜色{relation}，{luck}。穿着此类颜色有助于调和今日的能量。",
-            f"此颜色与今日五行{relation}，{luck}。适合需要{random.choice(['专注', '放松', '社交', '思考'])}的场合。",
-            f"今日此颜色{luck}，与当日五行{relation}。可以{random.choice(['提升运势', '增强气场', '改善心情', '促进交流'])}。"
+            f"此颜色与今日五行{relation}，{luck}。适合需要{rng.choice(['专注', '放松', '社交', '思考'])}的场合。",
+            f"今日此颜色{luck}，与当日五行{relation}。可以{rng.choice(['提升运势', '增强气场', '改善心情', '促进交流'])}。"
         ]
         
         # 随机选择一个描述
-        selected_description = random.choice(descriptions)
+        selected_description = rng.choice(descriptions)
         
         suggestion = {
             "颜色系统": color_system,
-            "具体颜色": info["颜色"],
+            "具体颜色": list(colors),
             "五行关系": f"与当日五行{relation}",
             "吉凶": luck,
             "描述": selected_description
@@ -193,23 +222,116 @@ def get_dress_info_for_date(date=None):
         color_suggestions.append(suggestion)
     
     # 获取饮食建议
-    food_suggestions = get_daily_food_suggestions(date)
+    food_suggestions = get_daily_food_suggestions(date, snapshot)
     
     return {
         "date": date.strftime("%Y-%m-%d"),
-        "weekday": WEEKDAY_NAMES[date.weekday()],
+        "weekday": snapshot.dress.weekday_names[get_date_context(date).weekday],
         "daily_element": daily_element,
         "color_suggestions": color_suggestions,
         "food_suggestions": food_suggestions
     }
 
+class DressCalendar:
+    """穿搭建议预计算日历
+
+    穿搭建议只依赖日期和静态配置，因此预先计算今天前后一段窗口内的结果，
+    请求时直接查表；窗口外的日期回退为实时计算。
+    """
+    
+    def __init__(self, days_before: Optional[int] = None, days_after: Optional[int] = None):
+        # 未指定窗口时使用配置，配置重新加载后随之更新
+        self._configured = days_before is None and days_after is None
+        self.days_before = settings.snapshot.dress.calendar_days_before if days_before is None else days_before
+        self.days_after = settings.snapshot.dress.calendar_days_after if days_after is None else days_after
+        # (开始日期, 结束日期, {日期: 穿搭信息}, {日期: 编码好的JSON})，整体替换以保证读取时的一致性
+        self._window = (None, None, {}, {})
+        self._rebuild_lock = threading.Lock()
+        # 区间查询的响应体及其压缩版本，按(开始日期, 结束日期)缓存，日历重建时清空
+        self.range_variants = VariantCache()
+        # 查表命中与回退实时计算的次数，用于/metrics统计命中率
+        self.hits = 0
+        self.misses = 0
+    
+    def rebuild(self, today=None):
+        """重新计算以today为中心的日历窗口"""
+        today = parse_date(today)
+        start_date, end_date = get_date_range(today, self.days_before, self.days_after)
+        
+        with self._rebuild_lock:
+            entries = {date: get_dress_info_for_date(date) for date in iter_dates(start_date, end_date)}
+            # 预先编码每天的JSON片段，区间查询时直接拼接，不再逐项序列化
+            encoded = {date: dumps(info) for date, info in entries.items()}
+            self._window = (start_date, end_date, entries, encoded)
+            self.range_variants.clear()
+        
+        return len(entries)
+    
+    def is_current(self, today=None) -> bool:
+        """日历窗口是否已按today构建"""
+        today = parse_date(today)
+        start_date, _ = get_date_range(today, self.days_before, self.days_after)
+        return self._window[0] == start_date
+    
+    def get(self, date=None) -> Dict[str, Any]:
+        """获取指定日期的穿搭信息，窗口外实时计算"""
+        date = parse_date(date)
+        info = self._window[2].get(date)
+        if info is None:
+            self.misses += 1
+            info = get_dress_info_for_date(date)
+        else:
+            self.hits += 1
+        return info
+    
+    def get_range(self, start_date, end_date) -> List[Dict[str, Any]]:
+        """获取日期区间内每一天的穿搭信息"""
+        entries = self._window[2]
+        result = []
+        misses = 0
+        for date in iter_dates(start_date, end_date):
+            info = entries.get(date)
+            if info is None:
+                misses += 1
+                info = get_dress_info_for_date(date)
+            result.append(info)
+        self.hits += len(result) - misses
+        self.misses += misses
+        return result
+    
+    def get_range_encoded(self, start_date, end_date) -> bytes:
+        """获取日期区间内每一天的穿搭信息，返回编码好的JSON数组"""
+        encoded = self._window[3]
+        fragments = []
+        misses = 0
+        for date in iter_dates(start_date, end_date):
+            fragment = encoded.get(date)
+            if fragment is None:
+                misses += 1
+                fragment = dumps(get_dress_info_for_date(date))
+            fragments.append(fragment)
+        self.hits += len(fragments) - misses
+        self.misses += misses
+        return join_array(fragments)
+
+    def reload(self, snapshot: ConfigSnapshot):
+        """配置替换后按新配置重建日历窗口，重建期间继续使用旧窗口"""
+        if self._configured:
+            self.days_before = snapshot.dress.calendar_days_before
+            self.days_after = snapshot.dress.calendar_days_after
+        self.rebuild()
+
+# 创建全局日历实例，由后台任务负责构建和每日刷新，配置重新加载时重建
+dress_calendar = DressCalendar()
+settings.on_reload(dress_calendar.reload)
+
 def get_today_dress_info():
     """获取今日穿衣颜色和饮食建议"""
-    return get_dress_info_for_date()
+    return dress_calendar.get()
 
 def get_date_dress_info(date: str):
     """获取指定日期的穿衣颜色和饮食建议"""
-    return get_dress_info_for_date(date)
+    return dress_calendar.get(date)
 
 def get_dress_info_range(days_before: int, days_after: int):
     """获取一段时间内的穿衣颜色和饮食建议"""
@@ -218,17 +340,8 @@ def get_dress_info_range(days_before: int, days_after: int):
     # 计算日期范围
     start_date, end_date = get_date_range(current_date, days_before, days_after)
     
-    # 创建日期范围
-    date_range = pd.date_range(start=start_date, end=end_date)
-    
-    # 初始化结果数组
-    dress_info_list = []
-    
-    # 计算每一天的穿衣信息
-    for date in date_range:
-        date_obj = date.date()  # 转换为date对象，避免时区问题
-        dress_info = get_dress_info_for_date(date_obj)
-        dress_info_list.append(dress_info)
+    # 从预计算日历中按区间取出每一天的穿衣信息
+    dress_info_list = dress_calendar.get_range(start_date, end_date)
     
     return {
         "date_range": {
@@ -236,4 +349,37 @@ def get_dress_info_range(days_before: int, days_after: int):
             "end": end_date.strftime("%Y-%m-%d")
         },
         "dress_info_list": dress_info_list
-    }
\ No newline at end of file
+    }
+
+def _encode_dress_range(start_date, end_date) -> bytes:
+    """编码日期区间的穿衣信息"""
+    date_range = dumps({
+        "start": start_date.strftime("%Y-%m-%d"),
+        "end": end_date.strftime("%Y-%m-%d")
+    })
+    # 直接拼接日历中预先编码好的片段
+    dress_info_list = dress_calendar.get_range_encoded(start_date, end_date)
+    return b'{"date_range":' + date_range + b',"dress_info_list":' + dress_info_list + b'}'
+
+def get_dress_info_range_json(days_before: int, days_after: int) -> bytes:
+    """获取一段时间内的穿衣颜色和饮食建议，返回编码好的JSON，结构与get_dress_info_range相同"""
+    current_date = datetime.datetime.now().date()
+    start_date, end_date = get_date_range(current_date, days_before, days_after)
+    return _encode_dress_range(start_date, end_date)
+
+def get_dress_info_range_compressed(days_before: int, days_after: int, encoding: Optional[str],
+                                    compressor: Compressor) -> Tuple[bytes, Optional[str]]:
+    """
+    获取一段时间内的穿衣颜色和饮食建议，按encoding返回压缩后的JSON
+
+    响应体和压缩结果缓存在穿搭日历中，同一区间每种编码只压缩一次
+
+    Returns:
+        tuple: (响应体, 实际使用的编码)，不压缩时编码为None
+    """
+    current_date = datetime.datetime.now().date()
+    start_date, end_date = get_date_range(current_date, days_before, days_after)
+    variants = dress_calendar.range_variants.get_or_build(
+        (start_date, end_date), lambda: _encode_dress_range(start_date, end_date)
+    )
+    return variants.get(encoding, compressor)
@@ -1,16 +1,21 @@
-from datetime import datetime, timedelta, date
+from datetime import datetime, date
 import random
 import math
+import zlib
+from functools import lru_cache
 from typing import List, Dict, Any, Tuple, Optional
-from utils.date_utils import normalize_date_string, parse_date, get_date_str, get_weekday
+from utils.date_utils import parse_date, get_date_str, get_date_context, get_date_range, iter_dates
+from utils.json_utils import dumps, join_array
+from utils.compression import Compressor, VariantCache
+from utils.shared_store import shared_store
 from config.maya_config import (
     MAYA_SEAL_LIST, MAYA_SEALS, MAYA_TONE_LIST, MAYA_TONES, 
     MAYA_MONTHS, SUGGESTIONS, LUCKY_ITEMS, DAILY_QUOTES, 
     DAILY_MESSAGES, MAYA_KEY_DATES, ENERGY_FIELDS
 )
 
-# 存储用户历史查询的出生日期
-maya_history_dates = []
+# 用户历史查询的出生日期保存在共享存储中的列表名
+MAYA_HISTORY_KEY = "maya_history"
 # 最大历史记录数量
 MAX_MAYA_HISTORY = 6
 
@@ -225,7 +230,7 @@ def calculate_energy_scores(date_obj: datetime, kin: int) -> Dict[str, Dict[str,
     使用更精确的算法，基于日期、KIN码、月相等因素
     """
     # 使用日期和KIN码作为基础
-    day_of_year = date_obj.timetuple().tm_yday
+    day_of_year = get_date_context(date_obj).day_of_year
     month = date_obj.month
     day = date_obj.day
     
@@ -259,8 +264,8 @@ def calculate_energy_scores(date_obj: datetime, kin: int) -> Dict[str, Dict[str,
         score = base_energy + adjustment
         
         # 添加确定性变化（保持一致性）
-        # 使用确定性算法替代随机变化
-        variation_seed = date_obj.year * 10000 + date_obj.month * 100 + date_obj.day + hash(key) % 1000 + kin
+        # 使用确定性算法替代随机变化（使用稳定的校验和代替hash()，保证不同进程间结果一致）
+        variation_seed = date_obj.year * 10000 + date_obj.month * 100 + date_obj.day + zlib.crc32(key.encode('utf-8')) % 1000 + kin
         # 使用简单的线性同余生成器生成确定性变化
         variation = ((variation_seed * 1664525 + 1013904223) % (2**32)) / (2**32) * 16 - 8
         score += variation
@@ -378,9 +383,10 @@ def generate_maya_info(date_obj: datetime) -> Dict[str, Any]:
     生成指定日期的玛雅日历信息
     使用与前端一致的计算方法
     """
-    # 基础日期信息
-    date_str = get_date_str(date_obj)
-    weekday = get_weekday(date_obj)
+    # 基础日期信息，与其他服务共享同一日期的计算结果
+    date_context = get_date_context(date_obj)
+    date_str = date_context.date_str
+    weekday = date_context.weekday_name
     
     # 使用新的算法计算玛雅历法信息
     maya_date_info = calculate_maya_date_info(date_obj)
@@ -438,66 +444,90 @@ def generate_maya_info(date_obj: datetime) -> Dict[str, Any]:
     
     return maya_info
 
+@lru_cache(maxsize=1024)
+def get_maya_day_info(day: date) -> Dict[str, Any]:
+    """
+    获取指定日期的玛雅日历信息，按日期缓存
+
+    结果只依赖日期，所有用户共享；返回的字典为共享对象，调用方不应修改
+    """
+    return generate_maya_info(get_date_context(day).datetime)
+
+@lru_cache(maxsize=1024)
+def get_maya_day_json(day: date) -> bytes:
+    """获取指定日期编码好的玛雅日历信息JSON，按日期缓存"""
+    return dumps(get_maya_day_info(day))
+
 def get_today_maya_info() -> Dict[str, Any]:
     """获取今日玛雅日历信息"""
-    today = datetime.now()
-    return generate_maya_info(today)
+    return get_maya_day_info(datetime.now().date())
 
 def get_date_maya_info(date_str: str) -> Dict[str, Any]:
     """获取指定日期的玛雅日历信息"""
     try:
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        return generate_maya_info(date_obj)
+        return get_maya_day_info(parse_date(date_str))
     except ValueError:
         # 处理日期格式错误
         return {"error": "日期格式无效，请使用YYYY-MM-DD格式"}
 
 def get_maya_info_range(days_before: int = 3, days_after: int = 3) -> Dict[str, Any]:
-    """获取一段时间内的玛雅日历信息"""
-    today = datetime.now()
-    start_date = today - timedelta(days=days_before)
-    end_date = today + timedelta(days=days_after)
-    
-    # 生成日期范围内的每一天
-    current_date = start_date
-    maya_info_list = []
-    
-    while current_date <= end_date:
-        maya_info = generate_maya_info(current_date)
-        maya_info_list.append(maya_info)
-        current_date += timedelta(days=1)
-    
+    """获取一段时间内的玛雅日历信息，每天的结果取自按日期缓存的get_maya_day_info"""
+    start_date, end_date = get_date_range(datetime.now().date(), days_before, days_after)
     return {
-        "maya_info_list": maya_info_list,
+        "maya_info_list": [get_maya_day_info(day) for day in iter_dates(start_date, end_date)],
         "date_range": {
             "start": get_date_str(start_date),
             "end": get_date_str(end_date)
         }
     }
 
+def _encode_maya_range(start_date: date, end_date: date) -> bytes:
+    """编码日期区间的玛雅日历信息"""
+    # 直接拼接按日期缓存的JSON片段
+    maya_info_list = join_array(get_maya_day_json(day) for day in iter_dates(start_date, end_date))
+    date_range = dumps({
+        "start": get_date_str(start_date),
+        "end": get_date_str(end_date)
+    })
+    return b'{"maya_info_list":' + maya_info_list + b',"date_range":' + date_range + b'}'
+
+def get_maya_info_range_json(days_before: int = 3, days_after: int = 3) -> bytes:
+    """获取一段时间内的玛雅日历信息，返回编码好的JSON，结构与get_maya_info_range相同"""
+    start_date, end_date = get_date_range(datetime.now().date(), days_before, days_after)
+    return _encode_maya_range(start_date, end_date)
+
+# 区间查询的响应体及其压缩版本，按(开始日期, 结束日期)缓存；日期变化后旧区间自然被淘汰
+maya_range_variants = VariantCache()
+
+def get_maya_info_range_compressed(days_before: int, days_after: int, encoding: Optional[str],
+                                   compressor: Compressor) -> Tuple[bytes, Optional[str]]:
+    """
+    获取一段时间内的玛雅日历信息，按encoding返回压缩后的JSON
+
+    Returns:
+        tuple: (响应体, 实际使用的编码)，不压缩时编码为None
+    """
+    start_date, end_date = get_date_range(datetime.now().date(), days_before, days_after)
+    variants = maya_range_variants.get_or_build(
+        (start_date, end_date), lambda: _encode_maya_range(start_date, end_date)
+    )
+    return variants.get(encoding, compressor)
+
 def update_maya_history(birth_date_str: str):
     """更新玛雅历史记录"""
-    global maya_history_dates
-    
     try:
         # 验证日期格式
         datetime.strptime(birth_date_str, "%Y-%m-%d")
         
-        # 如果日期已经在历史记录中，先移除它
-        if birth_date_str in maya_history_dates:
-            maya_history_dates.remove(birth_date_str)
-        # 将新日期添加到列表开头
-        maya_history_dates.insert(0, birth_date_str)
-        # 保持列表长度不超过MAX_MAYA_HISTORY
-        if len(maya_history_dates) > MAX_MAYA_HISTORY:
-            maya_history_dates = maya_history_dates[:MAX_MAYA_HISTORY]
+        # 将日期移到列表开头，列表长度不超过MAX_MAYA_HISTORY；后台写入，不阻塞请求
+        shared_store.push_recent_later(MAYA_HISTORY_KEY, birth_date_str, MAX_MAYA_HISTORY)
     except ValueError:
         # 如果日期格式无效，不更新历史记录
         print(f"无效的日期格式: {birth_date_str}")
 
 def get_maya_history():
     """获取玛雅历史记录"""
-    return maya_history_dates
+    return shared_store.get_recent(MAYA_HISTORY_KEY)
 
 def get_maya_birth_info(birth_date_str: str) -> Dict[str, Any]:
     """
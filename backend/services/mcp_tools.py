@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCP工具注册表
+WebSocket和stdio两种MCP服务器共用的工具定义、调用入口和JSON-RPC请求解析；
+参数校验函数在注册时由工具的JSON Schema生成，调用时按名称查表后直接执行
+"""
+
+import os
+import sys
+import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.biorhythm_service import (
+    get_history, get_today_biorhythm, get_date_biorhythm, get_biorhythm_range
+)
+from services.dress_service import (
+    get_today_dress_info, get_date_dress_info, get_dress_info_range
+)
+from services.biorhythm_life_guide_service import (
+    get_biorhythm_life_guide, get_today_biorhythm_guide
+)
+from services.maya_service import (
+    get_maya_info_range, get_date_maya_info, get_today_maya_info, get_maya_birth_info, get_maya_history
+)
+from utils.batch_dispatch import MAX_BATCH_SIZE
+
+class ToolSchema(BaseModel):
+    type: str = "object"
+    properties: Dict[str, Any]
+    required: List[str] = []
+
+class Tool(BaseModel):
+    name: str
+    description: str
+    # 修改字段名，使用alias保持与MCP协议的兼容性；工具统一通过别名schema创建
+    tool_schema: ToolSchema = Field(..., alias='schema')
+
+class ToolArgumentError(ValueError):
+    """工具参数不符合Schema"""
+
+class InvalidRequestError(ValueError):
+    """JSON-RPC请求格式无效"""
+
+def parse_request(request_data: Any) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    解析单个JSON-RPC请求
+
+    批量请求中的每一项都要解析，因此直接检查字段而不构造pydantic模型：
+    id必填并转为字符串，method必须是字符串，params缺省时为空对象
+
+    Returns:
+        tuple: (id, method, params)
+
+    Raises:
+        InvalidRequestError: 请求格式无效
+    """
+    if not isinstance(request_data, dict):
+        raise InvalidRequestError("请求必须是JSON对象")
+    request_id = request_data.get("id")
+    if request_id is None or isinstance(request_id, (bool, dict, list)):
+        raise InvalidRequestError("请求缺少有效的id")
+    method = request_data.get("method")
+    if not isinstance(method, str):
+        raise InvalidRequestError("请求缺少method")
+    params = request_data.get("params", {})
+    if not isinstance(params, dict):
+        raise InvalidRequestError("params必须是对象")
+    return str(request_id), method, params
+
+class RegisteredTool(NamedTuple):
+    """注册的工具：定义、参数校验函数和处理函数"""
+    tool: Tool
+    validate: Callable[[Any], Dict[str, Any]]
+    handler: Callable[..., Any]
+
+_TYPE_CHECKS = {
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "array": lambda value: isinstance(value, list),
+    "object": lambda value: isinstance(value, dict)
+}
+
+@lru_cache(maxsize=4096)
+def normalize_date_argument(value: str) -> str:
+    """将日期参数标准化为YYYY-MM-DD，无法解析时抛出ToolArgumentError"""
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise ToolArgumentError(f"日期格式无效: {value}，请使用YYYY-MM-DD格式") from None
+
+def compile_validator(schema: ToolSchema) -> Callable[[Any], Dict[str, Any]]:
+    """
+    由工具的JSON Schema生成参数校验函数
+
+    支持type、required、default、minimum、maximum、maxItems、items.type以及format为date的字符串。
+    校验函数返回只包含Schema中声明的参数的新字典，缺省的参数填入默认值，日期参数已标准化
+
+    Raises:
+        ToolArgumentError: 调用校验函数时参数不符合Schema
+    """
+    required = tuple(schema.required)
+    fields = []
+    for name, prop in schema.properties.items():
+        item_type = prop.get("items", {}).get("type")
+        fields.append((
+            name,
+            prop.get("type"),
+            _TYPE_CHECKS.get(prop.get("type")),
+            "default" in prop,
+            prop.get("default"),
+            prop.get("format") == "date",
+            prop.get("minimum"),
+            prop.get("maximum"),
+            prop.get("maxItems"),
+            item_type,
+            _TYPE_CHECKS.get(item_type)
+        ))
+
+    def validate(arguments: Any) -> Dict[str, Any]:
+        if not isinstance(arguments, dict):
+            raise ToolArgumentError("参数必须是对象")
+        for name in required:
+            if name not in arguments:
+                raise ToolArgumentError(f"缺少参数: {name}")
+        values = {}
+        for (name, type_name, check, has_default, default, is_date,
+             minimum, maximum, max_items, item_type, item_check) in fields:
+            if name not in arguments:
+                if has_default:
+                    values[name] = default
+                continue
+            value = arguments[name]
+            if check is not None and not check(value):
+                raise ToolArgumentError(f"参数{name}应为{type_name}类型")
+            if is_date:
+                value = normalize_date_argument(value)
+            if minimum is not None and value < minimum:
+                raise ToolArgumentError(f"参数{name}不能小于{minimum}")
+            if maximum is not None and value > maximum:
+                raise ToolArgumentError(f"参数{name}不能大于{maximum}")
+            if max_items is not None and len(value) > max_items:
+                raise ToolArgumentError(f"参数{name}最多包含{max_items}项")
+            if item_check is not None and not all(item_check(item) for item in value):
+                raise ToolArgumentError(f"参数{name}的元素应为{item_type}类型")
+            values[name] = value
+        return values
+
+    return validate
+
+class ToolRegistry:
+    """
+    工具注册表
+
+    按名称保存工具定义、参数校验函数和处理函数；处理函数以校验后的参数作为关键字参数调用
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, RegisteredTool] = {}
+        self._definitions: Optional[List[Dict[str, Any]]] = None
+
+    def register(self, name: str, description: str, schema: ToolSchema, handler: Callable[..., Any]):
+        """注册工具，同名工具会被替换"""
+        tool = Tool(name=name, description=description, schema=schema)
+        self._tools[name] = RegisteredTool(tool, compile_validator(schema), handler)
+        self._definitions = None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    @property
+    def tools(self) -> List[Tool]:
+        """所有工具的定义"""
+        return [registered.tool for registered in self._tools.values()]
+
+    def definitions(self) -> List[Dict[str, Any]]:
+        """所有工具定义的字典形式，用于tools/list等响应；结果在注册变化前复用，调用方不应修改"""
+        if self._definitions is None:
+            self._definitions = [tool.dict(by_alias=True) for tool in self.tools]
+        return self._definitions
+
+    def call(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        校验参数并调用工具
+
+        Raises:
+            ValueError: 工具不存在
+            ToolArgumentError: 参数不符合Schema
+        """
+        registered = self._tools.get(name)
+        if registered is None:
+            raise ValueError(f"未知的方法: {name}")
+        return registered.handler(**registered.validate(arguments if arguments is not None else {}))
+
+# 创建全局工具注册表
+tool_registry = ToolRegistry()
+
+# 定义工具模式
+birth_date_property = {"type": "string", "format": "date", "description": "出生日期，格式为YYYY-MM-DD"}
+date_property = {"type": "string", "format": "date", "description": "目标日期，格式为YYYY-MM-DD"}
+
+def days_property(description: str, default: int) -> Dict[str, Any]:
+    """区间天数参数，单次最多一年"""
+    return {"type": "integer", "description": description, "default": default, "minimum": 0, "maximum": 366}
+
+biorhythm_today_schema = ToolSchema(
+    properties={"birth_date": birth_date_property},
+    required=["birth_date"]
+)
+
+biorhythm_date_schema = ToolSchema(
+    properties={"birth_date": birth_date_property, "date": date_property},
+    required=["birth_date", "date"]
+)
+
+biorhythm_range_schema = ToolSchema(
+    properties={
+        "birth_date": birth_date_property,
+        "days_before": days_property("当前日期之前的天数", 10),
+        "days_after": days_property("当前日期之后的天数", 20)
+    },
+    required=["birth_date"]
+)
+
+dress_date_schema = ToolSchema(
+    properties={"date": date_property},
+    required=["date"]
+)
+
+dress_range_schema = ToolSchema(
+    properties={
+        "days_before": days_property("当前日期之前的天数", 1),
+        "days_after": days_property("当前日期之后的天数", 6)
+    }
+)
+
+biorhythm_life_guide_schema = ToolSchema(
+    properties={
+        "birth_date": birth_date_property,
+        "location": {"type": "string", "description": "地理位置（可选）", "default": ""}
+    },
+    required=["birth_date"]
+)
+
+maya_range_schema = ToolSchema(
+    properties={
+        "days_before": days_property("当前日期之前的天数", 3),
+        "days_after": days_property("当前日期之后的天数", 3)
+    }
+)
+
+batch_schema = ToolSchema(
+    properties={
+        "calls": {
+            "type": "array",
+            "description": "要执行的工具调用列表，每项为{\"name\": 工具名, \"arguments\": 参数}",
+            "maxItems": MAX_BATCH_SIZE,
+            "items": {"type": "object"}
+        }
+    },
+    required=["calls"]
+)
+
+def run_batch_calls(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """依次执行多个工具调用，单个调用失败不影响其他调用"""
+    results = []
+    for call in calls:
+        name = call.get("name")
+        try:
+            if name == "batch":
+                raise ValueError("批量调用不能嵌套")
+            results.append({"name": name, "result": tool_registry.call(name, call.get("arguments"))})
+        except Exception as e:
+            results.append({"name": name, "error": str(e)})
+    return {"results": results}
+
+# 注册工具
+tool_registry.register("get_biorhythm_today", "获取今天的生物节律", biorhythm_today_schema, get_today_biorhythm)
+tool_registry.register("get_biorhythm_date", "获取指定日期的生物节律", biorhythm_date_schema, get_date_biorhythm)
+tool_registry.register("get_biorhythm_range", "获取一段时间内的生物节律", biorhythm_range_schema, get_biorhythm_range)
+tool_registry.register("get_dress_today", "获取今日穿衣颜色和饮食建议", ToolSchema(properties={}), get_today_dress_info)
+tool_registry.register("get_dress_date", "获取指定日期的穿衣颜色和饮食建议", dress_date_schema, get_date_dress_info)
+tool_registry.register("get_dress_range", "获取一段时间内的穿衣颜色和饮食建议", dress_range_schema, get_dress_info_range)
+tool_registry.register("get_history", "获取历史查询的出生日期", ToolSchema(properties={}),
+                       lambda: {"history": get_history()})
+tool_registry.register("get_biorhythm_life_guide", "获取综合生物节律生活指南（包含生物节律、穿衣建议、饮食建议等）",
+                       biorhythm_life_guide_schema, get_biorhythm_life_guide)
+tool_registry.register("get_today_biorhythm_guide", "获取今日生物节律生活指南", biorhythm_today_schema,
+                       get_today_biorhythm_guide)
+tool_registry.register("get_maya_today", "获取今日玛雅历法信息", ToolSchema(properties={}), get_today_maya_info)
+tool_registry.register("get_maya_date", "获取指定日期的玛雅历法信息", dress_date_schema,
+                       lambda date: get_date_maya_info(date))
+tool_registry.register("get_maya_range", "获取一段时间内的玛雅历法信息", maya_range_schema, get_maya_info_range)
+tool_registry.register("get_maya_birth_info", "获取出生日期的玛雅历法信息及个人解读", biorhythm_today_schema,
+                       lambda birth_date: get_maya_birth_info(birth_date))
+tool_registry.register("get_maya_history", "获取玛雅历法历史查询的出生日期", ToolSchema(properties={}),
+                       lambda: {"history": get_maya_history()})
+tool_registry.register("batch", f"在一次请求中执行多个工具调用（最多{MAX_BATCH_SIZE}个），返回每个调用的结果或错误",
+                       batch_schema, run_batch_calls)
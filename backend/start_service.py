@@ -17,6 +17,7 @@ def main():
     parser.add_argument('--port', type=int, default=5000, help='服务端口 (默认: 5000)')
     parser.add_argument('--debug', action='store_true', help='启用调试模式')
     parser.add_argument('--env', choices=['dev', 'prod'], default='dev', help='运行环境 (默认: dev)')
+    parser.add_argument('--workers', type=int, default=1, help='工作进程数量 (默认: 1)')
     
     args = parser.parse_args()
     
@@ -26,6 +27,7 @@ def main():
     print(f"服务地址: http://{args.host}:{args.port}")
     print(f"运行环境: {args.env}")
     print(f"调试模式: {'开启' if args.debug else '关闭'}")
+    print(f"工作进程: {args.workers}")
     print("=" * 60)
     
     # 设置环境变量
@@ -37,7 +39,7 @@ def main():
     try:
         # 创建并启动服务
         service = UnifiedBackendService()
-        service.run(host=args.host, port=args.port, debug=args.debug)
+        service.run(host=args.host, port=args.port, debug=args.debug, workers=max(args.workers, 1))
     except KeyboardInterrupt:
         print("\n服务已停止")
     except Exception as e:
@@ -8,12 +8,21 @@ import unittest
 import os
 import sys
 import json
+import shutil
+import tempfile
+import time
+import threading
 from datetime import datetime
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from services.api_docs_service import ApiDocsService
+from services.api_docs_service import ApiDocsService, SqliteApiDocsService, create_api_docs_service
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 class TestApiDocsService(unittest.TestCase):
     """API文档服务测试类"""
@@ -107,5 +116,170 @@ class TestApiDocsService(unittest.TestCase):
         # 清理测试数据
         self.service.delete_doc(doc_id)
 
+class TestApiDocsIndex(unittest.TestCase):
+    """内存索引与合并写入测试"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix='api_docs_')
+        self.service = ApiDocsService(docs_dir=self.temp_dir, flush_delay=60)
+        
+    def tearDown(self):
+        self.service.flush()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        
+    def read_file(self):
+        with open(self.service.docs_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+        
+    def test_writes_are_coalesced(self):
+        """多次写入合并为一次落盘"""
+        ids = [self.service.create_doc({"title": f"文档{i}"})['id'] for i in range(5)]
+        self.assertEqual(len(set(ids)), 5)
+        self.assertEqual(len(self.read_file()['docs']), 1)
+        
+        self.service.flush()
+        self.assertEqual(self.service.flush_count, 1)
+        self.assertEqual(len(self.read_file()['docs']), 6)
+        self.assertEqual([name for name in os.listdir(self.temp_dir) if name.endswith('.tmp')], [])
+        
+    def test_concurrent_creates(self):
+        """并发创建不丢失文档"""
+        def create(n):
+            for i in range(20):
+                self.service.create_doc({"title": f"线程{n}-{i}"})
+        threads = [threading.Thread(target=create, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.service.flush()
+        
+        self.assertEqual(len(self.service.get_all_docs()['docs']), 81)
+        self.assertEqual(len(self.read_file()['docs']), 81)
+        
+    def test_reload_on_external_change(self):
+        """文件被外部修改后重新加载"""
+        content = self.read_file()
+        content['docs'].append({"id": "external", "title": "外部文档"})
+        with open(self.service.docs_file, 'w', encoding='utf-8') as f:
+            json.dump(content, f, ensure_ascii=False)
+        os.utime(self.service.docs_file, ns=(0, 1))
+        
+        self.assertIsNotNone(self.service.get_doc_by_id("external"))
+        
+    def test_workers_do_not_overwrite_each_other(self):
+        """多个进程各自落盘时合并文件中的最新内容，不覆盖其他进程的修改"""
+        first = self.service.create_doc({"title": "文档1"})['id']
+        self.service.flush()
+        second = self.service.create_doc({"title": "文档2"})['id']
+        self.service.flush()
+        other = ApiDocsService(docs_dir=self.temp_dir, flush_delay=60)
+        
+        self.service.update_doc(first, {"title": "文档1-修改"})
+        other.delete_doc(second)
+        self.service.flush()
+        other.flush()
+        
+        docs = {doc['id']: doc for doc in self.read_file()['docs']}
+        self.assertEqual(docs[first]['title'], "文档1-修改")
+        self.assertNotIn(second, docs)
+        self.assertEqual(self.service.get_doc_by_id(first)['title'], "文档1-修改")
+        self.assertIsNone(self.service.get_doc_by_id(second))
+        
+    @unittest.skipUnless(fcntl is not None, "需要fcntl支持")
+    def test_reads_do_not_wait_for_flush(self):
+        """落盘等待文件锁期间，读取和新的修改不被阻塞"""
+        first = self.service.create_doc({"title": "文档1"})['id']
+        with open(self.service.docs_file + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            flusher = threading.Thread(target=self.service.flush)
+            flusher.start()
+            time.sleep(0.1)
+            start = time.perf_counter()
+            self.assertEqual(self.service.get_doc_by_id(first)['title'], "文档1")
+            second = self.service.create_doc({"title": "文档2"})['id']
+            self.assertLess(time.perf_counter() - start, 0.5)
+            self.assertTrue(flusher.is_alive())
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        flusher.join(5)
+        self.assertIn(first, [doc['id'] for doc in self.read_file()['docs']])
+        self.assertIsNotNone(self.service.get_doc_by_id(second))
+        self.service.flush()
+        self.assertIn(second, [doc['id'] for doc in self.read_file()['docs']])
+        
+    def test_worker_doc_ids_include_pid(self):
+        """fork出的工作进程生成的文档ID带进程号"""
+        self.service._owner_pid = -1
+        self.assertTrue(self.service.create_doc({"title": "文档"})['id'].endswith(f"-p{os.getpid()}"))
+        
+    def test_delete_missing_doc(self):
+        """删除不存在的文档返回False"""
+        self.assertFalse(self.service.delete_doc("missing"))
+        self.assertEqual(self.service.flush_count, 0)
+
+class TestSqliteApiDocsService(unittest.TestCase):
+    """SQLite存储引擎测试"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix='api_docs_sqlite_')
+        self.legacy_file = os.path.join(self.temp_dir, 'api_docs.json')
+        self.db_path = os.path.join(self.temp_dir, 'api_docs.db')
+        with open(self.legacy_file, 'w', encoding='utf-8') as f:
+            json.dump({"docs": [
+                {"id": "main-api", "title": "主文档", "version": "1.0.0", "openApiSpec": {"openapi": "3.0.0", "paths": {"/a": {}}}},
+                {"id": "doc-1", "title": "附加文档", "tags": ["内部"]}
+            ]}, f, ensure_ascii=False)
+        self.service = SqliteApiDocsService(self.db_path, legacy_file=self.legacy_file)
+        
+    def tearDown(self):
+        self.service.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        
+    def test_migrates_json_once(self):
+        """首次启动导入JSON文档，之后不再重复导入"""
+        self.assertEqual(self.service.migrated_count, 2)
+        self.assertEqual([doc['id'] for doc in self.service.get_all_docs()['docs']], ["main-api", "doc-1"])
+        self.assertTrue(self.service.delete_doc("doc-1"))
+        
+        reopened = SqliteApiDocsService(self.db_path, legacy_file=self.legacy_file)
+        self.assertEqual(reopened.migrated_count, 0)
+        self.assertIsNone(reopened.get_doc_by_id("doc-1"))
+        reopened.close()
+        
+    def test_round_trip(self):
+        """文档字段、扩展字段和openApiSpec完整保存"""
+        doc = self.service.get_doc_by_id("main-api")
+        self.assertEqual(doc['openApiSpec'], {"openapi": "3.0.0", "paths": {"/a": {}}})
+        self.assertEqual(self.service.get_doc_by_id("doc-1")['tags'], ["内部"])
+        self.assertNotIn('openApiSpec', self.service.get_doc_by_id("doc-1"))
+        
+    def test_summaries_exclude_spec(self):
+        """列表只返回摘要"""
+        summaries = self.service.list_summaries()
+        self.assertEqual(summaries[0], {"id": "main-api", "title": "主文档", "version": "1.0.0"})
+        self.assertTrue(all('openApiSpec' not in item for item in summaries))
+        
+    def test_crud(self):
+        """创建、更新和删除"""
+        first = self.service.create_doc({"title": "新文档", "openApiSpec": {"x": 1}})
+        second = self.service.create_doc({"title": "新文档2"})
+        self.assertNotEqual(first['id'], second['id'])
+        
+        updated = self.service.update_doc(first['id'], {"title": "已更新", "openApiSpec": {"x": 2}})
+        self.assertEqual(updated['createdAt'], first['createdAt'])
+        self.assertEqual(self.service.get_doc_by_id(first['id'])['openApiSpec'], {"x": 2})
+        self.assertIsNone(self.service.update_doc("missing", {"title": "无"}))
+        
+        self.assertTrue(self.service.delete_doc(first['id']))
+        self.assertFalse(self.service.delete_doc(first['id']))
+        self.assertEqual(len(self.service.list_summaries()), 3)
+        
+    def test_create_by_config(self):
+        """按配置选择存储引擎"""
+        service = create_api_docs_service({"storage": "sqlite", "sqlite_path": os.path.join(self.temp_dir, 'other.db')})
+        self.assertIsInstance(service, SqliteApiDocsService)
+        service.close()
+        self.assertIsInstance(create_api_docs_service({}), ApiDocsService)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,9 +1,12 @@
 import pytest
 import os
 import sys
+import time
+import threading
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from fastapi.testclient import TestClient
 from app import UnifiedBackendService
+from utils.shared_store import SharedStore, shared_store
 
 # 创建测试客户端
 @pytest.fixture
@@ -44,6 +47,40 @@ def test_api_test_endpoint(client):
     assert response.status_code == 200
     data = response.json()
     assert "success" in data
+    # 在进程内调用，不依赖服务监听的端口
+    assert data["success"] == True
+    assert data["response"]["status_code"] == 200
+    assert data["response"]["data"]["status"] == "healthy"
+    assert "duration_ms" in data["response"]
+
+def test_api_test_endpoint_batch(client):
+    """测试API测试接口并发测试多个端点"""
+    test_data = {
+        "endpoints": [
+            {"endpoint": "/maya/today", "method": "GET"},
+            {"endpoint": "/dress/date", "method": "GET", "params": {"date": "2024-01-01"}},
+            {"endpoint": "/not-exist", "method": "GET"},
+            {"endpoint": "/health", "method": "PATCH"}
+        ]
+    }
+    response = client.post("/api/management/test", json=test_data)
+    assert response.status_code == 200
+    data = response.json()
+    results = data["results"]
+    assert [r["endpoint"] for r in results] == ["/maya/today", "/dress/date", "/not-exist", "/health"]
+    assert results[0]["response"]["status_code"] == 200
+    assert results[1]["response"]["status_code"] == 200
+    assert results[2]["response"]["status_code"] == 404
+    assert results[3]["success"] == False
+    assert data["success"] == False
+    assert "total_duration_ms" in data
+
+def test_api_test_endpoint_batch_limit(client):
+    """测试批量测试的端点数量超过上限时拒绝"""
+    test_data = {"endpoints": [{"endpoint": "/health", "method": "GET"}] * 21}
+    response = client.post("/api/management/test", json=test_data)
+    assert response.status_code == 400
+    assert response.json()["success"] == False
 
 def test_api_login_endpoint(client):
     """测试API管理登录接口"""
@@ -78,4 +115,119 @@ def test_api_logout_endpoint(client):
     response = client.post("/api/management/logout")
     assert response.status_code == 200
     data = response.json()
-    assert "success" in data
\ No newline at end of file
+    assert "success" in data
+def test_batch_endpoint(client):
+    """测试批量查询接口按路由函数名并发执行子查询"""
+    batch_data = {
+        "requests": [
+            {"id": "bio", "route": "api_get_biorhythm_range", "params": {"birth_date": "1990-01-01", "days_before": 3, "days_after": 3}},
+            {"id": "maya", "route": "api_get_today_maya"},
+            {"id": "dress", "route": "api_get_today_dress"},
+            {"id": "history", "route": "api_get_biorhythm_history"},
+            {"id": "bad", "route": "no_such_route"}
+        ]
+    }
+    response = client.post("/api/batch", json=batch_data)
+    assert response.status_code == 200
+    data = response.json()
+    results = {result["id"]: result for result in data["results"]}
+    assert [result["id"] for result in data["results"]] == ["bio", "maya", "dress", "history", "bad"]
+    assert results["bio"]["status"] == 200
+    assert len(results["bio"]["data"]["dates"]) == 7
+    assert results["maya"]["status"] == 200
+    assert results["dress"]["status"] == 200
+    assert results["history"]["status"] == 200
+    assert results["bad"]["status"] == 400
+    assert data["success"] == False
+
+def test_batch_endpoint_rejects_invalid_body(client):
+    """测试批量查询接口的参数校验"""
+    assert client.post("/api/batch", json={}).status_code == 400
+    assert client.post("/api/batch", json={"requests": [{"route": "health_check"}] * 21}).status_code == 400
+
+def test_batch_endpoint_rejects_invalid_routes(client):
+    """测试非字符串的route和不在允许列表中的接口按子查询返回400"""
+    batch_data = {
+        "requests": [
+            {"id": "list", "route": ["api_get_today_dress"]},
+            {"id": "dict", "route": {"name": "api_get_today_dress"}},
+            {"id": "management", "route": "get_service_status"},
+            {"id": "dress", "route": "api_get_today_dress"}
+        ]
+    }
+    response = client.post("/api/batch", json=batch_data)
+    assert response.status_code == 200
+    statuses = {result["id"]: result["status"] for result in response.json()["results"]}
+    assert statuses == {"list": 400, "dict": 400, "management": 400, "dress": 200}
+
+def test_day_endpoint(client):
+    """测试每日综合接口"""
+    response = client.get("/api/day", params={"birth_date": "1990-01-01", "date": "2024-01-01"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["date"] == "2024-01-01"
+    assert data["weekday"] == "星期一"
+    assert data["day_of_year"] == 1
+    # 与各服务单独接口的结果一致
+    assert data["biorhythm"] == client.get("/biorhythm/date", params={"birth_date": "1990-01-01", "date": "2024-01-01"}).json()
+    assert data["maya"] == client.get("/maya/date", params={"date": "2024-01-01"}).json()
+    assert data["dress"] == client.get("/dress/date", params={"date": "2024-01-01"}).json()
+    
+    # 不传生日时只返回与日期相关的部分
+    response = client.get("/api/day", params={"date": "2024-01-01"})
+    assert response.json()["biorhythm"] is None
+    
+    assert client.get("/api/day", params={"date": "2024-13-01"}).status_code == 400
+
+def test_api_verify_endpoint(client):
+    """测试token验证接口"""
+    token = "verify-test-token"
+    shared_store.save_token(token, "admin", 60)
+    response = client.get("/api/management/verify", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["username"] == "admin"
+
+    client.post("/api/management/logout", headers={"Authorization": f"Bearer {token}"})
+    response = client.get("/api/management/verify", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+    assert client.get("/api/management/verify").status_code == 401
+
+def test_api_docs_list_endpoint(client):
+    """测试文档列表接口返回JSON摘要，Swagger UI在/api/swagger"""
+    response = client.get("/api/docs")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+    docs = response.json()["docs"]
+    assert len(docs) > 0
+    assert all("id" in doc and "openApiSpec" not in doc for doc in docs)
+    
+    response = client.get("/api/swagger")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+
+def test_shared_store_writes_do_not_block_loop(client):
+    """测试等待共享存储写锁的请求不阻塞其他请求"""
+    other = SharedStore(shared_store.path)
+    conn = other._connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        logout = threading.Thread(target=client.post, args=("/api/management/logout",),
+                                  kwargs={"headers": {"Authorization": "Bearer blocked-token"}})
+        logout.start()
+        time.sleep(0.2)
+        start = time.perf_counter()
+        assert client.get("/health").status_code == 200
+        assert time.perf_counter() - start < 1.0
+        assert logout.is_alive()
+    finally:
+        conn.execute("COMMIT")
+        other.close()
+    logout.join(10)
+
+def test_api_docs_crud_endpoints(client):
+    """测试文档的创建、读取、更新和删除接口"""
+    doc = client.post("/api/docs", json={"title": "测试文档"}).json()
+    assert client.get(f"/api/docs/{doc['id']}").json()["title"] == "测试文档"
+    assert client.put(f"/api/docs/{doc['id']}", json={"title": "修改后"}).json()["title"] == "修改后"
+    assert client.delete(f"/api/docs/{doc['id']}").status_code == 200
+    assert client.get(f"/api/docs/{doc['id']}").status_code == 404
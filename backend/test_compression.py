@@ -0,0 +1,69 @@
+import os
+import sys
+import gzip
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils.compression import Compressor, CompressedVariants, VariantCache, parse_accept_encoding
+
+def test_negotiate_encoding():
+    """测试按权重和服务端偏好协商编码"""
+    compressor = Compressor(encodings=("gzip",))
+    assert parse_accept_encoding("gzip;q=0.5, br") == {"gzip": 0.5, "br": 1.0}
+    assert compressor.negotiate("gzip, deflate") == "gzip"
+    assert compressor.negotiate("*") == "gzip"
+    assert compressor.negotiate("gzip;q=0") is None
+    assert compressor.negotiate("identity") is None
+    assert compressor.negotiate("") is None
+
+def test_compressed_variants_compress_once():
+    """测试同一内容每种编码只压缩一次，小于阈值时不压缩"""
+    compressor = Compressor(minimum_size=100, encodings=("gzip",))
+    variants = CompressedVariants(b"x" * 1000)
+    data, encoding = variants.get("gzip", compressor)
+    assert encoding == "gzip"
+    assert gzip.decompress(data) == b"x" * 1000
+    assert variants.get("gzip", compressor)[0] is data
+    assert compressor.compressed == 1
+    assert CompressedVariants(b"x" * 10).get("gzip", compressor) == (b"x" * 10, None)
+
+def test_variant_cache_skips_large_bodies():
+    """测试超过上限的响应体不进入缓存"""
+    cache = VariantCache(max_entries=2, max_body_size=100)
+    cache.get_or_build("a", lambda: b"a" * 10)
+    assert cache.get_or_build("a", lambda: b"b").body == b"a" * 10
+    cache.get_or_build("big", lambda: b"b" * 1000)
+    assert len(cache) == 1
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_range_response_is_compressed(client):
+    """测试区间接口按Accept-Encoding返回压缩内容，重复请求复用缓存的压缩结果"""
+    response = client.get("/maya/range", params={"days_before": 30, "days_after": 30},
+                          headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert len(response.json()["maya_info_list"]) == 61
+
+    plain = client.get("/maya/range", params={"days_before": 30, "days_after": 30},
+                       headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == response.json()
+
+def test_small_response_is_not_compressed(client):
+    """测试小于阈值的响应不压缩"""
+    response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+def test_cached_response_uses_precompressed_variant(client, service):
+    """测试条件请求缓存按编码发送预先压缩的内容，ETag区分编码"""
+    params = {"date": "2024-01-01"}
+    plain = client.get("/maya/date", params=params, headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/maya/date", params=params, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json() == plain.json()
+    assert compressed.headers["etag"] != plain.headers["etag"]
+
+    response = client.get("/maya/date", params=params,
+                          headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]})
+    assert response.status_code == 304
+    assert service.compressor.compressed == 1
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+穿搭建议服务测试
+"""
+
+import unittest
+import os
+import sys
+import json
+import datetime
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.dress_service import (
+    DressCalendar, DRESS_INDEXES, build_dress_indexes, get_dress_info_for_date
+)
+from config.settings import settings
+
+class TestDressCalendar(unittest.TestCase):
+    """穿搭预计算日历测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.today = datetime.date(2025, 9, 23)
+        self.calendar = DressCalendar(days_before=3, days_after=10)
+        
+    def test_rebuild_window(self):
+        """测试重建后的窗口大小"""
+        self.assertEqual(self.calendar.rebuild(self.today), 14)
+        
+    def test_lookup_matches_computation(self):
+        """测试查表结果与实时计算一致"""
+        self.calendar.rebuild(self.today)
+        for offset in (-3, 0, 10):
+            date = self.today + datetime.timedelta(days=offset)
+            self.assertEqual(self.calendar.get(date), get_dress_info_for_date(date))
+            
+    def test_fallback_outside_window(self):
+        """测试窗口外日期回退为实时计算"""
+        self.calendar.rebuild(self.today)
+        date = self.today + datetime.timedelta(days=100)
+        self.assertEqual(self.calendar.get(date.strftime("%Y-%m-%d")), get_dress_info_for_date(date))
+        
+    def test_get_range(self):
+        """测试跨越窗口边界的区间查询"""
+        self.calendar.rebuild(self.today)
+        start_date = self.today - datetime.timedelta(days=5)
+        end_date = self.today + datetime.timedelta(days=12)
+        result = self.calendar.get_range(start_date, end_date)
+        self.assertEqual(len(result), 18)
+        self.assertEqual(result[0]["date"], "2025-09-18")
+        self.assertEqual(result[-1]["date"], "2025-10-05")
+        
+    def test_get_range_encoded(self):
+        """测试拼接预编码片段得到的JSON与逐项序列化的结果一致"""
+        self.calendar.rebuild(self.today)
+        start_date = self.today - datetime.timedelta(days=5)
+        end_date = self.today + datetime.timedelta(days=12)
+        encoded = self.calendar.get_range_encoded(start_date, end_date)
+        self.assertEqual(json.loads(encoded), self.calendar.get_range(start_date, end_date))
+
+class TestDressIndexes(unittest.TestCase):
+    """穿搭索引结构测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.indexes = settings.snapshot.derived(DRESS_INDEXES)
+        
+    def test_food_pools_exclude_base_foods(self):
+        """测试候选池不包含保留的基础食物"""
+        for pools in self.indexes["food_pools"].values():
+            for base_foods, remaining in pools.values():
+                self.assertEqual(len(base_foods), 2)
+                self.assertFalse(set(base_foods) & set(remaining))
+                self.assertEqual(len(remaining), len(set(remaining)))
+                
+    def test_recommended_colors_follow_relations(self):
+        """测试推荐颜色只包含相同或相生的颜色系统"""
+        for daily_element, relations in self.indexes["color_relations"].items():
+            expected = tuple(item[0] for item in relations if item[2] in ("相同", "相生"))
+            self.assertEqual(self.indexes["recommended_colors"][daily_element], expected)
+            
+    def test_indexes_are_stable(self):
+        """测试重复构建索引得到相同结果"""
+        self.assertEqual(build_dress_indexes(settings.snapshot.data), self.indexes)
+
+if __name__ == '__main__':
+    unittest.main()
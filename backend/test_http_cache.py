@@ -0,0 +1,80 @@
+import os
+import sys
+from datetime import date, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils.shared_store import shared_store
+from utils.http_cache import (
+    build_cache_key, cache_control_for, etag_matches, CachedResponse, ResponseCache, PAST_DATE_CACHE_CONTROL
+)
+
+def test_build_cache_key_normalizes_query():
+    """测试缓存键只保留参与计算的参数"""
+    key, target_date = build_cache_key("/maya/date", "date=2024-1-5&birth_date=1990-01-01&_=123")
+    assert key == "/maya/date?date=2024-01-05"
+    assert target_date == date(2024, 1, 5)
+    assert build_cache_key("/biorhythm/date", "birth_date=1990-01-01&date=2024-01-05") is None
+    assert build_cache_key("/maya/date", "") is None
+    assert build_cache_key("/maya/date", "date=bad") is None
+    assert build_cache_key("/maya/today", "") is None
+
+def test_cache_control_for_dates():
+    """测试过去日期缓存一天，今天缓存到午夜"""
+    today = date.today()
+    assert cache_control_for(today - timedelta(days=1)) == PAST_DATE_CACHE_CONTROL
+    assert cache_control_for(today).startswith("public, max-age=")
+
+def test_etag_matches():
+    """测试If-None-Match匹配"""
+    assert etag_matches('"abc"', b'"abc"')
+    assert etag_matches('"x", W/"abc"', b'"abc"')
+    assert etag_matches('*', b'"abc"')
+    assert not etag_matches('"abcd"', b'"abc"')
+
+def test_stale_generation_is_not_cached():
+    """测试处理期间缓存被清空时，基于旧配置的结果不写入缓存"""
+    cache = ResponseCache()
+    generation = cache.generation
+    cache.clear()
+    cache.put("key", CachedResponse(b'"etag"', b"{}", b"application/json"), generation)
+    assert len(cache) == 0
+    cache.put("key", CachedResponse(b'"etag"', b"{}", b"application/json"), cache.generation)
+    assert len(cache) == 1
+
+def test_if_none_match_returns_304(client, service):
+    """测试命中ETag时返回304且不再调用服务"""
+    response = client.get("/maya/date", params={"date": "2024-01-01"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == PAST_DATE_CACHE_CONTROL
+    etag = response.headers["etag"]
+    
+    response = client.get("/maya/date", params={"date": "2024-01-01"}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    assert service.response_cache.hits == 1
+
+def test_error_responses_are_not_cached(client, service):
+    """测试错误响应不会被缓存"""
+    response = client.get("/biorhythm/date", params={"birth_date": "bad", "date": "2024-01-01"})
+    assert response.status_code == 500
+    assert "etag" not in response.headers
+    assert len(service.response_cache) == 0
+
+def test_if_modified_since_requires_cached_entry(client, service):
+    """测试未缓存的键不因If-Modified-Since直接返回304"""
+    headers = {"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}
+    response = client.get("/maya/date", params={"date": "2024-01-01"}, headers=headers)
+    assert response.status_code == 200
+    response = client.get("/maya/date", params={"date": "2024-01-01"}, headers=headers)
+    assert response.status_code == 304
+    assert service.response_cache.hits == 1
+
+def test_biorhythm_queries_still_record_history(client):
+    """测试重复查询生物节律时每次都记录历史"""
+    params = {"date": "2024-01-01"}
+    client.get("/biorhythm/date", params={"birth_date": "1990-01-01", **params})
+    client.get("/biorhythm/date", params={"birth_date": "1991-01-01", **params})
+    response = client.get("/biorhythm/date", params={"birth_date": "1990-01-01", **params})
+    assert "cache-control" not in response.headers
+    shared_store.wait_pending(5)
+    assert client.get("/biorhythm/history").json()["history"][0] == "1990-01-01"
@@ -0,0 +1,100 @@
+import pytest
+import os
+import sys
+import json
+import time
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from fastapi.testclient import TestClient
+import mcp_server
+
+@pytest.fixture
+def client():
+    with TestClient(mcp_server.app) as client:
+        yield client
+
+def send(websocket, request_id, method, params=None):
+    websocket.send_text(json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}}))
+
+def test_tool_call(client):
+    """测试工具调用返回结果"""
+    with client.websocket_connect("/mcp") as websocket:
+        send(websocket, "1", "get_biorhythm_date", {"birth_date": "1990-01-01", "date": "2024-06-15"})
+        response = json.loads(websocket.receive_text())
+    assert response["id"] == "1"
+    assert response["error"] is None
+    assert response["result"]["date"] == "2024-06-15"
+
+def test_slow_call_does_not_block_connection(client, monkeypatch):
+    """测试耗时的调用不阻塞同一连接上后续请求的响应"""
+    call_tool = mcp_server.call_tool
+
+    def slow_call_tool(method, params):
+        if method == "get_biorhythm_life_guide":
+            time.sleep(0.5)
+        return call_tool(method, params)
+
+    monkeypatch.setattr(mcp_server, "call_tool", slow_call_tool)
+    with client.websocket_connect("/mcp") as websocket:
+        send(websocket, "slow", "get_biorhythm_life_guide", {"birth_date": "1990-01-01"})
+        send(websocket, "fast", "get_dress_today")
+        first = json.loads(websocket.receive_text())
+        second = json.loads(websocket.receive_text())
+    assert first["id"] == "fast"
+    assert second["id"] == "slow"
+    assert second["error"] is None
+
+def test_invalid_message_returns_error(client):
+    """测试无法解析的消息返回错误且连接可继续使用"""
+    with client.websocket_connect("/mcp") as websocket:
+        websocket.send_text("not json")
+        error = json.loads(websocket.receive_text())
+        send(websocket, "2", "get_history")
+        response = json.loads(websocket.receive_text())
+    assert error["id"] == "unknown"
+    assert error["error"]["code"] == -32700
+    assert response["id"] == "2"
+
+def test_batch_request(client):
+    """测试批量请求返回按请求顺序排列的响应数组"""
+    batch = [
+        {"jsonrpc": "2.0", "id": "a", "method": "get_dress_date", "params": {"date": "2024-06-15"}},
+        {"jsonrpc": "2.0", "id": "b", "method": "get_dress_date", "params": {}},
+        {"jsonrpc": "2.0", "id": "c", "method": "server.info"}
+    ]
+    with client.websocket_connect("/mcp") as websocket:
+        websocket.send_text(json.dumps(batch))
+        responses = json.loads(websocket.receive_text())
+        websocket.send_text("[]")
+        empty = json.loads(websocket.receive_text())
+    assert [response["id"] for response in responses] == ["a", "b", "c"]
+    assert responses[0]["result"]["date"] == "2024-06-15"
+    assert responses[1]["error"]["code"] == -32602
+    assert responses[2]["error"] is None
+    assert empty["error"]["code"] == -32600
+
+def test_batch_calls_share_in_flight_limit(client, monkeypatch):
+    """测试批量请求中的每个调用各占一个执行名额"""
+    call_tool = mcp_server.call_tool
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def slow_call_tool(method, params):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.1)
+        with lock:
+            running[0] -= 1
+        return call_tool(method, params)
+
+    monkeypatch.setattr(mcp_server, "call_tool", slow_call_tool)
+    monkeypatch.setattr(mcp_server, "MAX_IN_FLIGHT", 2)
+    batch = [{"jsonrpc": "2.0", "id": str(i), "method": "get_dress_date", "params": {"date": "2024-06-15"}}
+             for i in range(6)]
+    with client.websocket_connect("/mcp") as websocket:
+        websocket.send_text(json.dumps(batch))
+        responses = json.loads(websocket.receive_text())
+    assert [response["id"] for response in responses] == [str(i) for i in range(6)]
+    assert peak[0] == 2
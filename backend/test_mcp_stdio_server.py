@@ -0,0 +1,140 @@
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import threading
+import subprocess
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import mcp_stdio_server
+from mcp_stdio_server import StdoutWriter, serve
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def tool_call(request_id, name, arguments=None):
+    return json.dumps({"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+                       "params": {"name": name, "arguments": arguments or {}}})
+
+def run_serve(lines, max_concurrent=8):
+    """将请求行送入serve，返回写出的响应和写入器；bytes类型的行原样送入"""
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"".join((line if isinstance(line, bytes) else line.encode("utf-8")) + b"\n" for line in lines))
+        reader.feed_eof()
+        stream = io.StringIO()
+        writer = StdoutWriter(stream)
+        writer.start()
+        await serve(reader, writer, max_concurrent)
+        await writer.close()
+        return [json.loads(line) for line in stream.getvalue().splitlines()], writer
+    return asyncio.run(run())
+
+def test_concurrent_tool_calls(monkeypatch):
+    """测试耗时的工具调用不阻塞后续请求"""
+    call_tool = mcp_stdio_server.call_tool
+
+    def slow_call_tool(method, params):
+        if method == "get_biorhythm_life_guide":
+            time.sleep(0.5)
+        return call_tool(method, params)
+
+    monkeypatch.setattr(mcp_stdio_server, "call_tool", slow_call_tool)
+    responses, _ = run_serve([
+        tool_call("slow", "get_biorhythm_life_guide", {"birth_date": "1990-01-01"}),
+        tool_call("fast", "get_dress_today")
+    ])
+    assert [response["id"] for response in responses] == ["fast", "slow"]
+    assert all("result" in response for response in responses)
+
+def test_invalid_lines_do_not_stop_server():
+    """测试无法解析的请求返回错误，之后的请求照常处理"""
+    responses, _ = run_serve([
+        "not json",
+        tool_call("1", "get_biorhythm_date", {"birth_date": "1990-01-01", "date": "2024-06-15"})
+    ], max_concurrent=1)
+    assert responses[0]["error"]["code"] == -32700
+    assert json.loads(responses[1]["result"]["content"][0]["text"])["date"] == "2024-06-15"
+
+def test_invalid_utf8_does_not_stop_server():
+    """测试无法解码的请求行返回解析错误，之后的请求照常处理"""
+    responses, _ = run_serve([b"\xff\xfe", tool_call("1", "get_dress_today")], max_concurrent=1)
+    assert responses[0]["error"]["code"] == -32700
+    assert responses[1]["id"] == "1"
+    assert "result" in responses[1]
+
+def test_oversized_line_does_not_stop_server():
+    """测试超过长度上限的请求行整行丢弃并返回错误，之后的请求照常处理"""
+    # StreamReader默认上限64KiB，超长行分多段丢弃
+    oversized = tool_call("big", "get_dress_date", {"date": "2024-06-15", "padding": "x" * 200000})
+    responses, _ = run_serve([oversized, tool_call("1", "get_dress_today")], max_concurrent=1)
+    assert len(responses) == 2
+    assert responses[0]["error"]["code"] == -32600
+    assert responses[1]["id"] == "1"
+    assert "result" in responses[1]
+
+def test_writer_batches_flushes():
+    """测试写入器合并已积累的响应行"""
+    async def run():
+        stream = io.StringIO()
+        writer = StdoutWriter(stream)
+        writer.start()
+        for i in range(5):
+            writer.write(f"{i}\n")
+        await writer.close()
+        return stream.getvalue(), writer.flush_count
+    output, flush_count = asyncio.run(run())
+    assert output == "0\n1\n2\n3\n4\n"
+    assert flush_count == 1
+
+def test_stdio_process():
+    """测试通过管道运行stdio服务器"""
+    request = tool_call("1", "get_dress_today") + "\n"
+    result = subprocess.run(
+        [sys.executable, "mcp_stdio_server.py"], input=request, capture_output=True,
+        text=True, cwd=BACKEND_DIR, timeout=60
+    )
+    response = json.loads(result.stdout)
+    assert response["id"] == "1"
+    assert "result" in response
+
+def test_batch_request(monkeypatch):
+    """测试批量请求中的调用并发执行，响应按请求顺序写在同一行"""
+    call_tool = mcp_stdio_server.call_tool
+
+    def slow_call_tool(method, params):
+        time.sleep(0.3)
+        return call_tool(method, params)
+
+    monkeypatch.setattr(mcp_stdio_server, "call_tool", slow_call_tool)
+    batch = [json.loads(tool_call(str(i), "get_dress_date", {"date": f"2024-06-1{i}"})) for i in range(4)]
+    batch.append({"jsonrpc": "2.0", "id": 9})
+    start = time.perf_counter()
+    responses, _ = run_serve([json.dumps(batch)])
+    elapsed = time.perf_counter() - start
+    assert len(responses) == 1
+    assert [response["id"] for response in responses[0]] == ["0", "1", "2", "3", "9"]
+    assert responses[0][4]["error"]["code"] == -32600
+    assert elapsed < 1.0
+
+def test_batch_calls_share_concurrency_limit(monkeypatch):
+    """测试批量请求中的每个调用各占一个执行名额"""
+    call_tool = mcp_stdio_server.call_tool
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def slow_call_tool(method, params):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.1)
+        with lock:
+            running[0] -= 1
+        return call_tool(method, params)
+
+    monkeypatch.setattr(mcp_stdio_server, "call_tool", slow_call_tool)
+    batch = [json.loads(tool_call(str(i), "get_dress_date", {"date": "2024-06-15"})) for i in range(6)]
+    responses, _ = run_serve([json.dumps(batch)], max_concurrent=2)
+    assert [response["id"] for response in responses[0]] == [str(i) for i in range(6)]
+    assert peak[0] == 2
@@ -0,0 +1,74 @@
+import pytest
+import os
+import sys
+import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from services.maya_service import get_maya_day_info
+from services.mcp_tools import ToolSchema, ToolArgumentError, compile_validator, tool_registry
+from utils.batch_dispatch import MAX_BATCH_SIZE
+
+def test_validator_applies_defaults_and_normalizes_dates():
+    """测试校验函数填入默认值、标准化日期并丢弃未声明的参数"""
+    validate = compile_validator(ToolSchema(
+        properties={
+            "birth_date": {"type": "string", "format": "date"},
+            "days": {"type": "integer", "default": 3, "minimum": 0}
+        },
+        required=["birth_date"]
+    ))
+    assert validate({"birth_date": "1990-1-2", "extra": 1}) == {"birth_date": "1990-01-02", "days": 3}
+
+@pytest.mark.parametrize("arguments", [
+    {},
+    {"birth_date": 19900101},
+    {"birth_date": "1990-13-01"},
+    {"birth_date": "1990-01-01", "days": -1},
+    {"birth_date": "1990-01-01", "days": True},
+    ["1990-01-01"]
+])
+def test_validator_rejects_invalid_arguments(arguments):
+    """测试不符合Schema的参数被拒绝"""
+    validate = compile_validator(ToolSchema(
+        properties={
+            "birth_date": {"type": "string", "format": "date"},
+            "days": {"type": "integer", "default": 3, "minimum": 0}
+        },
+        required=["birth_date"]
+    ))
+    with pytest.raises(ToolArgumentError):
+        validate(arguments)
+
+def test_registry_dispatch():
+    """测试按名称调用注册的工具"""
+    result = tool_registry.call("get_biorhythm_date", {"birth_date": "1990-01-01", "date": "2024-6-15"})
+    assert result["date"] == "2024-06-15"
+    with pytest.raises(ValueError):
+        tool_registry.call("unknown_tool", {})
+
+def test_maya_tools_registered():
+    """测试玛雅历法工具"""
+    assert tool_registry.call("get_maya_date", {"date": "2024-06-15"})["date"] == "2024-06-15"
+    maya_range = tool_registry.call("get_maya_range", {"days_before": 1, "days_after": 1})
+    assert len(maya_range["maya_info_list"]) == 3
+    # 工具与HTTP接口共用服务函数，每天的结果取自按日期缓存的对象
+    today = datetime.date.today()
+    assert maya_range["maya_info_list"][1] is get_maya_day_info(today)
+
+def test_batch_tool():
+    """测试批量工具返回每个调用的结果或错误"""
+    result = tool_registry.call("batch", {"calls": [
+        {"name": "get_dress_date", "arguments": {"date": "2024-06-15"}},
+        {"name": "get_dress_date", "arguments": {}},
+        {"name": "batch", "arguments": {"calls": []}}
+    ]})
+    results = result["results"]
+    assert results[0]["result"]["date"] == "2024-06-15"
+    assert "error" in results[1]
+    assert "error" in results[2]
+    with pytest.raises(ToolArgumentError):
+        tool_registry.call("batch", {"calls": [{"name": "get_dress_today"}] * (MAX_BATCH_SIZE + 1)})
+
+def test_definitions_use_protocol_field_names():
+    """测试工具定义使用MCP协议的字段名"""
+    definition = tool_registry.definitions()[0]
+    assert set(definition) == {"name", "description", "schema"}
@@ -0,0 +1,51 @@
+import pytest
+import os
+import sys
+import time
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils.offload import OffloadExecutor, ExecutorSaturatedError
+
+def test_small_tasks_run_inline():
+    """测试小规模任务直接执行，不进入执行池"""
+    executor = OffloadExecutor(inline_threshold=10)
+    assert asyncio.run(executor.run(5, sum, [1, 2, 3])) == 6
+    assert executor.inline_calls == 1
+    assert executor.offloaded_calls == 0
+
+def test_saturated_executor_rejects_tasks():
+    """测试执行池已满时拒绝新任务"""
+    executor = OffloadExecutor(max_workers=1, max_queue=0, inline_threshold=0, retry_after=3)
+    
+    async def scenario():
+        blocking = asyncio.ensure_future(executor.run(1, time.sleep, 0.2))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ExecutorSaturatedError) as exc_info:
+            await executor.run(1, time.sleep, 0)
+        await blocking
+        return exc_info.value
+    
+    error = asyncio.run(scenario())
+    executor.shutdown()
+    assert error.retry_after == 3
+    assert executor.rejected_calls == 1
+    assert executor.pending == 0
+
+def test_range_endpoint_returns_503_when_saturated(client, service):
+    """测试执行池已满时大区间请求返回503和Retry-After"""
+    service.offload_executor.pending = service.offload_executor.capacity
+    response = client.get("/dress/range", params={"days_before": 0, "days_after": 200})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(service.offload_executor.retry_after)
+    
+    # 小区间请求不受影响
+    response = client.get("/dress/range", params={"days_before": 1, "days_after": 6})
+    assert response.status_code == 200
+    service.offload_executor.pending = 0
+
+def test_large_range_is_offloaded(client, service):
+    """测试大区间请求在执行池中计算，结果与直接计算一致"""
+    response = client.get("/biorhythm/range", params={"birth_date": "1990-01-01", "days_before": 100, "days_after": 100})
+    assert response.status_code == 200
+    assert len(response.json()["dates"]) == 201
+    assert service.offload_executor.offloaded_calls == 1
@@ -0,0 +1,98 @@
+import pytest
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from starlette.requests import Request
+from utils.internal_client import INTERNAL_CLIENT
+from utils.rate_limit import RateLimiter, client_id_from_scope, parse_trusted_proxies, rate_limit_enabled
+
+def test_token_bucket_refills():
+    """测试令牌桶扣除和按时间补充"""
+    limiter = RateLimiter(rate=1.0, burst=2.0)
+    assert limiter.acquire("a", 1, now=0.0) == (True, 0.0)
+    assert limiter.acquire("a", 1, now=0.0) == (True, 0.0)
+    allowed, wait = limiter.acquire("a", 1, now=0.5)
+    assert not allowed
+    assert wait == pytest.approx(0.5)
+    assert limiter.acquire("a", 1, now=1.0)[0]
+
+def test_range_cost_grows_with_range_size():
+    """测试区间接口的消耗随区间大小增加，且不超过桶容量"""
+    limiter = RateLimiter(burst=40.0, range_days_per_token=30.0)
+    assert limiter.request_cost("/maya/range", "days_before=3&days_after=3") == pytest.approx(1.2)
+    assert limiter.request_cost("/maya/range", "days_before=10000") == 40.0
+    assert limiter.request_cost("/maya/today", "") == 1.0
+
+def test_idle_buckets_are_evicted():
+    """测试桶数量有上限，淘汰最久未访问的客户端"""
+    limiter = RateLimiter(max_clients=2)
+    limiter.acquire("a", 1, now=0.0)
+    limiter.acquire("b", 1, now=0.0)
+    limiter.acquire("a", 1, now=0.0)
+    limiter.acquire("c", 1, now=0.0)
+    assert len(limiter) == 2
+    assert "b" not in limiter._buckets
+    assert limiter.evicted == 1
+
+def test_client_id_from_trusted_proxy():
+    """测试只信任可信代理转发的头，X-Forwarded-For取最右侧的不可信地址"""
+    trusted = parse_trusted_proxies(["172.16.0.0/12"])
+
+    def scope(peer, *headers):
+        return {"client": (peer, 1234), "headers": [(name, value) for name, value in headers]}
+
+    forged = (b"x-forwarded-for", b"1.1.1.1, 203.0.113.7")
+    assert client_id_from_scope(scope("203.0.113.9", forged), trusted) == "203.0.113.9"
+    assert client_id_from_scope(scope("172.18.0.5", forged), ()) == "172.18.0.5"
+    assert client_id_from_scope(scope("172.18.0.5", forged), trusted) == "203.0.113.7"
+    assert client_id_from_scope(scope("172.18.0.5", (b"x-forwarded-for", b"203.0.113.7, 172.18.0.2")), trusted) == "203.0.113.7"
+    assert client_id_from_scope(scope("172.18.0.5", forged, (b"x-real-ip", b"203.0.113.8")), trusted) == "203.0.113.8"
+    assert client_id_from_scope(scope("172.18.0.5"), trusted) == "172.18.0.5"
+
+def test_rate_limit_env_override(monkeypatch):
+    """测试环境变量RATE_LIMIT_ENABLED优先于配置"""
+    assert rate_limit_enabled({"enabled": True})
+    monkeypatch.setenv("RATE_LIMIT_ENABLED", "false")
+    assert not rate_limit_enabled({"enabled": True})
+    monkeypatch.setenv("RATE_LIMIT_ENABLED", "true")
+    assert rate_limit_enabled({"enabled": False})
+
+def test_huge_range_requests_are_limited(client):
+    """测试超大区间请求很快被限流，返回429和Retry-After"""
+    params = {"birth_date": "1990-01-01", "days_before": 1200, "days_after": 0}
+    assert client.get("/biorhythm/range", params=params).status_code == 200
+    response = client.get("/biorhythm/range", params=params)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    # 健康检查不受限流影响
+    assert client.get("/health").status_code == 200
+
+def test_management_test_charges_each_endpoint(client):
+    """测试批量测试接口按各端点的消耗计费"""
+    call = {"endpoint": "/biorhythm/range", "method": "GET",
+            "params": {"birth_date": "1990-01-01", "days_before": 300, "days_after": 0}}
+    response = client.post("/api/management/test", json={"endpoints": [call] * 3})
+    assert response.status_code == 200
+    assert response.json()["success"] == True
+    response = client.post("/api/management/test", json={"endpoints": [call] * 3})
+    assert response.status_code == 429
+
+def test_internal_requests_are_not_charged(service):
+    """测试进程内的嵌套调用不计费，外部客户端照常计费"""
+    def request(client):
+        return Request({"type": "http", "client": client, "headers": []})
+
+    cost = service.rate_limiter.burst
+    for _ in range(3):
+        assert service.charge_client(request(INTERNAL_CLIENT), cost) is None
+    assert service.charge_client(request(("203.0.113.9", 1234)), cost) is None
+    assert service.charge_client(request(("203.0.113.9", 1234)), cost).status_code == 429
+
+def test_load_shedding(client, service):
+    """测试事件循环延迟过高时返回503"""
+    service.metrics_sampler.loop_lag = 10.0
+    response = client.get("/maya/today")
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+    service.metrics_sampler.loop_lag = 0.0
+    assert client.get("/maya/today").status_code == 200
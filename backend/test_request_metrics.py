@@ -0,0 +1,36 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils.request_metrics import Histogram
+
+def test_histogram_buckets_are_cumulative():
+    """测试直方图桶上限包含边界值且累计计数正确"""
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [2, 3, 4]
+    assert histogram.count == 4
+
+def test_metrics_endpoint(client):
+    """测试/metrics按路由模板和状态码导出指标"""
+    client.get("/api/maya/date", params={"date": "2024-01-01"})
+    client.get("/maya/date", params={"date": "2024-01-01"})
+    client.get("/api/docs/not-exist")
+    client.get("/no-such-path")
+    client.request("PROPFIND", "/maya/today")
+    
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    # 别名请求计入规范路径
+    assert 'http_requests_total{method="GET",route="/maya/date",status="200"} 2' in text
+    assert 'route="/api/docs/{doc_id}",status="404"' in text
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/maya/date",status="200",le="+Inf"} 2' in text
+    assert 'cache_hit_ratio{cache="http_response"} 0.5' in text
+    # 进行中请求数与直方图使用同一路由模板标签，非标准方法归为OTHER
+    assert 'http_requests_in_flight{route="/api/docs/{doc_id}"} 0' in text
+    assert 'http_requests_in_flight{route="unmatched"} 0' in text
+    assert 'http_requests_total{method="OTHER",route="/maya/today",status="405"} 1' in text
+    assert "PROPFIND" not in text
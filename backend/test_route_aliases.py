@@ -0,0 +1,35 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils.route_aliases import ROUTE_TABLE, CANONICAL_PATHS, strip_cache_busting_params
+
+def test_route_table_does_not_shadow_canonical_paths():
+    """测试别名表不覆盖真实路径"""
+    for path in CANONICAL_PATHS:
+        assert path not in ROUTE_TABLE
+    assert ROUTE_TABLE["/biorhy/today"] == "/biorhythm/today"
+    assert ROUTE_TABLE["/api/"] == "/"
+
+def test_strip_cache_busting_params():
+    """测试去除缓存破坏参数"""
+    assert strip_cache_busting_params("date=2024-01-01&_=1700000000") == ("date=2024-01-01", True)
+    assert strip_cache_busting_params("date=2024-01-01") == ("date=2024-01-01", False)
+    assert strip_cache_busting_params("") == ("", False)
+
+def test_alias_paths_are_served(client, service):
+    """测试别名路径返回与规范路径相同的结果"""
+    canonical = client.get("/maya/date", params={"date": "2024-01-01"})
+    alias = client.get("/api/maya/date", params={"date": "2024-01-01", "_": "123"})
+    assert alias.status_code == 200
+    assert alias.json() == canonical.json()
+    # 缓存键忽略了缓存破坏参数，第二次请求命中缓存
+    assert service.response_cache.hits == 1
+
+def test_route_stats(client):
+    """测试别名和404统计"""
+    client.get("/biorhy/today", params={"birth_date": "1990-01-01"})
+    client.get("/not-a-route")
+    stats = client.get("/api/management/routes").json()["stats"]
+    assert stats["alias_hits"]["/biorhy/today"] == 1
+    assert stats["misses_total"] == 1
+    assert stats["top_miss_paths"]["/not-a-route"] == 1
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置加载模块测试
+"""
+
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import ConfigLoader, DEFAULT_CONFIG_PATH
+
+class TestConfigLoader(unittest.TestCase):
+    """配置加载器测试类"""
+    
+    def setUp(self):
+        """测试前准备：复制一份配置文件"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'app_config.json')
+        shutil.copy(DEFAULT_CONFIG_PATH, self.path)
+        self.loader = ConfigLoader(self.path)
+        
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+        
+    def write_config(self, update=None, raw=None):
+        """改写配置文件并推后修改时间"""
+        if raw is None:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            data.update(update or {})
+            raw = json.dumps(data, ensure_ascii=False)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(raw)
+        mtime = self.loader.snapshot.mtime_ns / 1e9 + 10
+        os.utime(self.path, (mtime, mtime))
+        
+    def test_views_are_frozen(self):
+        """测试配置视图只读"""
+        snapshot = self.loader.snapshot
+        self.assertEqual(snapshot.biorhythm.cycles['physical'], 23)
+        self.assertIsInstance(snapshot.dress.weekday_names, tuple)
+        with self.assertRaises(TypeError):
+            snapshot.section('biorhythm')['max_history'] = 10
+        with self.assertRaises(AttributeError):
+            snapshot.biorhythm.max_history = 10
+            
+    def test_reload_swaps_derived_and_notifies(self):
+        """测试配置变化时派生数据随新配置替换并通知回调"""
+        self.loader.register_derived('max_history', lambda s: s.biorhythm.max_history * 2)
+        notified = []
+        self.loader.on_reload(notified.append)
+        self.assertFalse(self.loader.check())
+        
+        self.write_config({"biorhythm": {"cycles": {"physical": 23, "emotional": 28, "intellectual": 33}, "max_history": 5}})
+        self.assertTrue(self.loader.check())
+        snapshot = self.loader.snapshot
+        self.assertEqual(snapshot.version, 2)
+        self.assertEqual(snapshot.derived('max_history'), 10)
+        self.assertEqual(notified, [snapshot])
+        
+    def test_invalid_config_keeps_previous(self):
+        """测试配置文件无效时保留旧配置"""
+        previous = self.loader.snapshot
+        self.write_config(raw="{invalid")
+        self.assertFalse(self.loader.reload())
+        self.assertIs(self.loader.snapshot, previous)
+        self.assertEqual(self.loader.failed_reloads, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享状态存储测试
+"""
+
+import unittest
+import os
+import sys
+import time
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.shared_store import SharedStore
+
+class TestSharedStore(unittest.TestCase):
+    """共享状态存储测试类"""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = SharedStore(os.path.join(self.tmp_dir.name, 'state.db'))
+        
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+        
+    def test_push_recent_moves_to_front_and_trims(self):
+        """测试最近列表去重、置顶和截断"""
+        for value in ["a", "b", "c", "a", "d"]:
+            self.store.push_recent("history", value, 3)
+        self.assertEqual(self.store.get_recent("history"), ["d", "a", "c"])
+        self.assertEqual(self.store.get_recent("other"), [])
+        
+    def test_push_recent_later_does_not_wait_for_lock(self):
+        """测试后台写入在其他连接持有写锁时立即返回，锁释放后写入完成"""
+        self.store.push_recent("history", "a", 3)
+        other = SharedStore(self.store.path)
+        conn = other._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        start = time.perf_counter()
+        self.store.push_recent_later("history", "b", 3)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        conn.execute("COMMIT")
+        self.store.wait_pending(5)
+        self.assertEqual(self.store.get_recent("history"), ["b", "a"])
+        other.close()
+        
+    def test_tokens(self):
+        """测试token保存、过期和删除"""
+        self.store.save_token("t1", "admin", 60)
+        self.store.save_token("t2", "admin", -1)
+        self.assertEqual(self.store.get_token_user("t1"), "admin")
+        self.assertIsNone(self.store.get_token_user("t2"))
+        self.assertTrue(self.store.revoke_token("t1"))
+        self.assertIsNone(self.store.get_token_user("t1"))
+        
+    @unittest.skipUnless(hasattr(os, "fork"), "需要fork支持")
+    def test_state_is_shared_across_processes(self):
+        """测试子进程写入的历史记录在父进程中可见"""
+        self.store.push_recent("history", "parent", 5)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self.store.push_recent("history", "child", 5)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(self.store.get_recent("history"), ["child", "parent"])
+
+if __name__ == '__main__':
+    unittest.main()
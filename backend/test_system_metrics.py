@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+系统指标采样测试
+"""
+
+import unittest
+import os
+import sys
+import time
+import asyncio
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.system_metrics import SystemMetricsSampler
+
+class TestSystemMetricsSampler(unittest.TestCase):
+    """系统指标采样器测试类"""
+    
+    def test_ring_buffer_is_bounded(self):
+        """测试环形缓冲区只保留最近的采样"""
+        sampler = SystemMetricsSampler(history_size=3)
+        for _ in range(5):
+            sampler.sample()
+        self.assertEqual(len(sampler.history()), 3)
+        self.assertIs(sampler.latest(), sampler.history()[-1])
+        self.assertIn("cpu_percent", sampler.latest())
+        
+    def test_run_measures_event_loop_lag(self):
+        """测试后台循环能测量到事件循环阻塞"""
+        sampler = SystemMetricsSampler(interval=0.05, lag_probe_interval=0.01)
+        
+        async def scenario():
+            task = asyncio.create_task(sampler.run())
+            await asyncio.sleep(0.02)
+            # 阻塞事件循环
+            time.sleep(0.2)
+            await asyncio.sleep(0.1)
+            task.cancel()
+        
+        asyncio.run(scenario())
+        max_lag = max(s["event_loop_lag_ms"] for s in sampler.history())
+        self.assertGreater(max_lag, 100)
+
+if __name__ == '__main__':
+    unittest.main()
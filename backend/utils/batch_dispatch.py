@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量查询模块
+按路由函数名解析子查询，通过进程内客户端并发执行，合并为一个响应
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from utils.internal_client import dispatch_many
+
+# 单次批量请求的子查询数量上限
+MAX_BATCH_SIZE = 20
+
+# 允许批量调用的数据查询接口（路由函数名），管理和系统接口不经批量接口暴露
+BATCH_ROUTE_NAMES = frozenset({
+    "api_get_today_biorhythm", "api_get_date_biorhythm", "api_get_biorhythm_range", "api_get_biorhythm_history",
+    "api_get_today_maya", "api_get_date_maya", "api_get_maya_range", "api_maya_history",
+    "api_get_today_dress", "api_get_date_dress", "api_get_dress_range",
+    "api_get_day"
+})
+
+def build_batch_routes(routes: Iterable, allowed: Iterable[str] = BATCH_ROUTE_NAMES) -> Dict[str, str]:
+    """
+    构建可批量调用的路由表
+
+    只收录允许列表中、不带路径参数的GET接口，按路由函数名索引
+
+    Args:
+        routes: 应用的路由列表(app.routes)
+        allowed: 允许批量调用的路由函数名
+
+    Returns:
+        dict: {路由函数名: 路径}
+    """
+    allowed = set(allowed)
+    table = {}
+    for route in routes:
+        name = getattr(route, "name", None)
+        methods = getattr(route, "methods", None) or ()
+        path = getattr(route, "path", "")
+        if name in allowed and "GET" in methods and "{" not in path:
+            table[name] = path
+    return table
+
+def _route_name(item: Any) -> Optional[str]:
+    """取子查询的路由函数名，缺失或不是字符串时返回None"""
+    name = item.get("route") if isinstance(item, dict) else None
+    return name if isinstance(name, str) else None
+
+def resolve_batch_items(items: List[Dict[str, Any]], route_table: Dict[str, str]) -> Tuple[List[Dict[str, Any]], List[Optional[str]]]:
+    """
+    将子查询解析为进程内调用
+
+    Returns:
+        tuple: (可执行的调用列表, 与items等长的错误信息列表，None表示可执行)
+    """
+    calls = []
+    errors = []
+    for item in items:
+        name = _route_name(item)
+        if name is None:
+            errors.append("route必须是字符串")
+            continue
+        path = route_table.get(name)
+        if path is None:
+            errors.append(f"未知的路由: {name}")
+            continue
+        params = item.get("params") or {}
+        if not isinstance(params, dict):
+            errors.append("params必须是对象")
+            continue
+        errors.append(None)
+        calls.append({"endpoint": path, "method": "GET", "params": params})
+    return calls, errors
+
+def batch_cost(items: List[Dict[str, Any]], route_table: Dict[str, str],
+               cost_fn: Callable[[str, str], float]) -> float:
+    """
+    计算批量请求中各子查询的消耗之和
+
+    子查询在进程内执行，不经过限流中间件，由批量接口按此消耗统一计费
+    """
+    total = 0.0
+    for item in items:
+        name = _route_name(item)
+        if name not in route_table:
+            continue
+        params = item.get("params") if isinstance(item.get("params"), dict) else {}
+        total += cost_fn(route_table[name], urlencode(params))
+    return total
+
+def calls_cost(calls: List[Any], cost_fn: Callable[[str, str], float]) -> float:
+    """
+    计算进程内调用列表的消耗之和
+
+    调用不经过限流中间件，由发起调用的接口按此消耗统一计费；参数按查询串计算消耗
+    """
+    total = 0.0
+    for call in calls:
+        call = call if isinstance(call, dict) else {}
+        params = call.get("params") if isinstance(call.get("params"), dict) else {}
+        total += cost_fn(str(call.get("endpoint", "")), urlencode(params))
+    return total
+
+async def run_batch(client, items: List[Dict[str, Any]], route_table: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    并发执行批量子查询
+
+    Args:
+        client: 进程内调用客户端
+        items: [{"id": ..., "route": 路由函数名, "params": {...}}]
+        route_table: build_batch_routes构建的路由表
+
+    Returns:
+        list: 与items顺序一致的结果，每项包含id、route、status和data
+    """
+    calls, errors = resolve_batch_items(items, route_table)
+    responses = iter(await dispatch_many(client, calls))
+
+    results = []
+    for index, (item, error) in enumerate(zip(items, errors)):
+        item = item if isinstance(item, dict) else {}
+        result = {"id": item.get("id", index), "route": item.get("route")}
+        if error is not None:
+            result.update({"status": 400, "error": error})
+        else:
+            outcome = next(responses)
+            if outcome["success"]:
+                response = outcome["response"]
+                result.update({
+                    "status": response["status_code"],
+                    "data": response["data"],
+                    "duration_ms": response["duration_ms"]
+                })
+            else:
+                result.update({"status": 500, "error": outcome["error"]})
+        results.append(result)
+    return results
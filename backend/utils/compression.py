@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+响应压缩工具模块
+按Accept-Encoding协商gzip/brotli压缩，小于阈值的响应不压缩；
+预计算数据的压缩结果可以缓存复用，同一内容每种编码只压缩一次
+"""
+
+import gzip
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from utils.internal_client import is_internal_request
+
+try:
+    import brotli
+except ImportError:  # brotli为可选依赖，也兼容brotlicffi
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+HAS_BROTLI = brotli is not None
+
+# 服务端偏好顺序，客户端权重相同时优先使用靠前的编码
+SUPPORTED_ENCODINGS = ("br", "gzip")
+
+# 值得压缩的内容类型
+COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/javascript", b"application/xml")
+
+def available_encodings() -> Tuple[str, ...]:
+    """当前环境可用的压缩编码"""
+    return tuple(e for e in SUPPORTED_ENCODINGS if e != "br" or HAS_BROTLI)
+
+def parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+    """
+    解析Accept-Encoding请求头
+
+    Returns:
+        dict: {编码: 权重}，无效的权重按0处理
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    return weights
+
+def is_compressible(content_type: bytes) -> bool:
+    """内容类型是否值得压缩"""
+    return content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+def encoding_headers(encoding: Optional[str]) -> Dict[str, str]:
+    """按编码生成响应头；内容随Accept-Encoding变化，始终带Vary"""
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return headers
+
+class Compressor:
+    """
+    压缩配置与编码协商
+
+    统计累计的压缩次数和字节数，计数不加锁，只用于观察压缩率
+    """
+
+    def __init__(self, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5,
+                 encodings: Optional[Iterable[str]] = None):
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        allowed = available_encodings()
+        self.encodings = tuple(e for e in (SUPPORTED_ENCODINGS if encodings is None else encodings) if e in allowed)
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """
+        选择响应使用的编码
+
+        Returns:
+            str: 客户端接受且权重最高的编码，权重相同时按服务端偏好；不压缩时返回None
+        """
+        if not accept_encoding or not self.encodings:
+            return None
+        weights = parse_accept_encoding(accept_encoding)
+        wildcard = weights.get("*", 0.0)
+        best, best_weight = None, 0.0
+        for encoding in self.encodings:
+            weight = weights.get(encoding, wildcard)
+            if weight > best_weight:
+                best, best_weight = encoding, weight
+        return best
+
+    def encoding_for(self, scope) -> Optional[str]:
+        """按请求协商编码；进程内调用由调用方直接读取内容，不做压缩"""
+        if is_internal_request(scope):
+            return None
+        for name, value in scope.get("headers", ()):
+            if name == b"accept-encoding":
+                return self.negotiate(value.decode("latin-1"))
+        return None
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        """按指定编码压缩"""
+        if encoding == "br":
+            data = brotli.compress(body, quality=self.brotli_quality)
+        elif encoding == "gzip":
+            # mtime=0：相同内容的压缩结果保持一致
+            data = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        else:
+            raise ValueError(f"不支持的压缩编码: {encoding}")
+        self.compressed += 1
+        self.bytes_in += len(body)
+        self.bytes_out += len(data)
+        return data
+
+    def snapshot(self) -> Dict:
+        """导出压缩统计"""
+        return {
+            "encodings": list(self.encodings),
+            "minimum_size": self.minimum_size,
+            "compressed": self.compressed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None
+        }
+
+class CompressedVariants:
+    """同一响应体的各编码版本，每种编码只在首次请求时压缩"""
+
+    __slots__ = ("body", "_variants")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._variants: Dict[str, bytes] = {}
+
+    def get(self, encoding: Optional[str], compressor: Compressor) -> Tuple[bytes, Optional[str]]:
+        """
+        获取指定编码的内容
+
+        Returns:
+            tuple: (内容, 实际使用的编码)，小于压缩阈值时返回原始内容和None
+        """
+        if encoding is None or len(self.body) < compressor.minimum_size:
+            return self.body, None
+        data = self._variants.get(encoding)
+        if data is None:
+            # 并发时可能重复压缩一次，结果相同，后写入的覆盖即可
+            data = self._variants[encoding] = compressor.compress(self.body, encoding)
+        return data, encoding
+
+class VariantCache:
+    """
+    按键缓存CompressedVariants的LRU缓存，可以在线程池中使用
+
+    超过max_body_size的响应体不缓存，防止超大区间查询占满内存
+    """
+
+    def __init__(self, max_entries: int = 32, max_body_size: int = 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_body_size = max_body_size
+        self._entries: "OrderedDict[Hashable, CompressedVariants]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: Hashable, build: Callable[[], bytes]) -> CompressedVariants:
+        """获取缓存项，未命中时调用build生成响应体"""
+        with self._lock:
+            variants = self._entries.get(key)
+            if variants is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return variants
+            self.misses += 1
+        # 在锁外生成响应体，避免阻塞其他区间的查询
+        variants = CompressedVariants(build())
+        if len(variants.body) > self.max_body_size:
+            return variants
+        with self._lock:
+            self._entries[key] = variants
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return variants
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class CompressionMiddleware:
+    """
+    响应压缩中间件
+
+    只压缩一次性发送、内容类型可压缩且不小于压缩阈值的响应；
+    已带Content-Encoding的响应（如缓存中预先压缩的内容）原样转发。
+    超过offload_threshold的响应体在线程池中压缩，避免阻塞事件循环
+    """
+
+    def __init__(self, app, compressor: Compressor, offload_threshold: int = 256 * 1024):
+        self.app = app
+        self.compressor = compressor
+        self.offload_threshold = offload_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.compressor.encoding_for(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            body = message.get("body", b"")
+            headers = start_message.get("headers", [])
+            if message.get("more_body", False) or not self._should_compress(headers, body):
+                # 流式响应或不需要压缩的响应：补发响应头后原样转发
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= self.offload_threshold:
+                loop = asyncio.get_running_loop()
+                data = await loop.run_in_executor(None, self.compressor.compress, body, encoding)
+            else:
+                data = self.compressor.compress(body, encoding)
+            await send({**start_message, "headers": self._compressed_headers(headers, encoding, len(data))})
+            await send({"type": "http.response.body", "body": data})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, headers, body: bytes) -> bool:
+        """判断响应是否需要压缩"""
+        if len(body) < self.compressor.minimum_size:
+            return False
+        content_type = b""
+        for name, value in headers:
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        return is_compressible(content_type)
+
+    @staticmethod
+    def _compressed_headers(headers, encoding: str, length: int):
+        """生成压缩后的响应头"""
+        result = []
+        vary = None
+        for name, value in headers:
+            if name == b"content-length":
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                # 压缩后的内容与原ETag不再逐字节相同，降级为弱ETag
+                value = b"W/" + value
+            if name == b"vary":
+                vary = value
+                continue
+            result.append((name, value))
+        if vary is None:
+            vary = b"Accept-Encoding"
+        elif b"accept-encoding" not in vary.lower():
+            vary = vary + b", Accept-Encoding"
+        result.extend([
+            (b"content-encoding", encoding.encode("ascii")),
+            (b"content-length", str(length).encode("ascii")),
+            (b"vary", vary),
+        ])
+        return result
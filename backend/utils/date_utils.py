@@ -1,4 +1,7 @@
 import datetime
+from functools import lru_cache
+
+WEEKDAY_NAMES = ("星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日")
 
 def get_date_str(date_obj=None):
     """获取日期字符串，格式为YYYY-MM-DD"""
@@ -15,8 +18,7 @@ def get_weekday(date_input=None):
     elif isinstance(date_input, str):
         date_input = datetime.datetime.strptime(date_input, "%Y-%m-%d")
     
-    weekdays = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
-    return weekdays[date_input.weekday()]
+    return WEEKDAY_NAMES[date_input.weekday()]
 
 def normalize_date_string(date_str: str) -> str:
     """标准化日期字符串，确保格式为YYYY-MM-DD"""
@@ -34,7 +36,7 @@ def parse_date(date_input):
     if date_input is None:
         return datetime.datetime.now().date()
     elif isinstance(date_input, str):
-        return datetime.datetime.strptime(date_input, "%Y-%m-%d").date()
+        return _parse_date_string(date_input)
     elif isinstance(date_input, datetime.datetime):
         return date_input.date()
     elif isinstance(date_input, datetime.date):
@@ -46,4 +48,50 @@ def get_date_range(current_date, days_before, days_after):
     """获取日期范围"""
     start_date = current_date - datetime.timedelta(days=days_before)
     end_date = current_date + datetime.timedelta(days=days_after)
-    return start_date, end_date
\ No newline at end of file
+    return start_date, end_date
+
+def iter_dates(start_date, end_date):
+    """逐日遍历[start_date, end_date]区间内的日期"""
+    one_day = datetime.timedelta(days=1)
+    current = start_date
+    while current <= end_date:
+        yield current
+        current += one_day
+
+def seconds_until_midnight(now=None):
+    """计算距离下一个午夜的秒数"""
+    if now is None:
+        now = datetime.datetime.now()
+    next_midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min)
+    return (next_midnight - now).total_seconds()
+
+@lru_cache(maxsize=4096)
+def _parse_date_string(date_str):
+    """解析YYYY-MM-DD格式的日期字符串，结果按字符串缓存"""
+    return datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
+
+class DateContext:
+    """
+    日期的公共计算结果
+
+    星期、一年中的第几天等只依赖日期的值在各服务之间共享，每个日期只计算一次
+    """
+    
+    __slots__ = ("date", "datetime", "date_str", "weekday", "weekday_name", "day_of_year")
+    
+    def __init__(self, date):
+        self.date = date
+        self.datetime = datetime.datetime.combine(date, datetime.time.min)
+        self.date_str = date.strftime("%Y-%m-%d")
+        self.weekday = date.weekday()
+        self.weekday_name = WEEKDAY_NAMES[self.weekday]
+        self.day_of_year = date.timetuple().tm_yday
+
+@lru_cache(maxsize=4096)
+def _build_date_context(date):
+    """按日期缓存DateContext"""
+    return DateContext(date)
+
+def get_date_context(date_input=None):
+    """获取日期的公共计算结果，支持字符串、date和datetime"""
+    return _build_date_context(parse_date(date_input))
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP缓存工具模块
+为按日期确定结果的接口提供强ETag、条件请求(304)和Cache-Control支持；
+配置压缩时缓存项同时保存各编码的压缩结果
+"""
+
+import os
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, date
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+from urllib.parse import parse_qsl
+
+from utils.compression import CompressedVariants, Compressor, is_compressible
+from utils.date_utils import normalize_date_string, seconds_until_midnight
+
+logger = logging.getLogger(__name__)
+
+# 结果只由查询参数决定的接口，以及参与缓存键计算的参数。
+# 带birth_date的接口（/biorhythm/date、/api/day）会记录查询历史，命中缓存或由浏览器、代理缓存应答时
+# 不会经过服务，历史记录就不再更新，因此不在此列
+CACHEABLE_ROUTES = {
+    "/maya/date": ("date",),
+    "/dress/date": ("date",),
+}
+
+# 过去日期的响应只会因配置热加载而改变，缓存一天后由客户端按ETag重新验证
+PAST_DATE_CACHE_CONTROL = "public, max-age=86400"
+
+class CachedResponse:
+    """缓存的响应内容"""
+
+    __slots__ = ("etag", "body", "content_type", "variants")
+
+    def __init__(self, etag: bytes, body: bytes, content_type: bytes):
+        self.etag = etag
+        self.body = body
+        self.content_type = content_type
+        # 各编码的压缩结果，首次按该编码发送时生成
+        self.variants = CompressedVariants(body)
+
+class ResponseCache:
+    """按请求键缓存响应内容的LRU缓存"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # 每次清空加一，中间件据此重新计算Last-Modified
+        self.generation = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """获取缓存项并更新其最近使用顺序"""
+        entries = self._entries
+        entry = entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: CachedResponse, generation: Optional[int] = None):
+        """
+        写入缓存项，超出容量时淘汰最久未使用的项
+
+        generation为开始处理请求时的缓存代数；与当前代数不一致说明处理期间配置已重新加载，
+        结果基于旧配置，不写入缓存
+        """
+        if generation is not None and generation != self.generation:
+            return
+        entries = self._entries
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存；整体替换而不是原地清空，可以在配置检测线程中调用"""
+        self._entries = OrderedDict()
+        self.generation += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+def compute_etag(body: bytes) -> bytes:
+    """根据响应内容计算强ETag"""
+    return b'"' + hashlib.sha256(body).hexdigest()[:32].encode('ascii') + b'"'
+
+def variant_etag(etag: bytes, encoding: Optional[str]) -> bytes:
+    """压缩版本的ETag，不同编码的内容使用不同的强ETag"""
+    if encoding is None:
+        return etag
+    return etag[:-1] + b"-" + encoding.encode("ascii") + b'"'
+
+def etag_matches(if_none_match: str, etag: bytes) -> bool:
+    """
+    判断If-None-Match请求头是否与ETag匹配
+
+    Args:
+        if_none_match: If-None-Match请求头的值
+        etag: 当前响应的ETag
+
+    Returns:
+        bool: 是否匹配
+    """
+    if if_none_match.strip() == "*":
+        return True
+    etag_value = etag.decode('ascii')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # 弱比较：忽略W/前缀
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag_value:
+            return True
+    return False
+
+def cache_control_for(target_date: date, today: Optional[date] = None) -> str:
+    """
+    根据目标日期生成Cache-Control
+
+    过去日期的结果只随配置变化，缓存一天；今天及以后的日期缓存到今天午夜
+    """
+    if today is None:
+        today = datetime.now().date()
+    if target_date < today:
+        return PAST_DATE_CACHE_CONTROL
+    return f"public, max-age={max(int(seconds_until_midnight()), 1)}"
+
+def build_cache_key(path: str, query_string: str) -> Optional[Tuple[str, date]]:
+    """
+    生成规范化的缓存键
+
+    只保留参与计算的参数并统一日期格式，返回(缓存键, 目标日期)；
+    参数缺失或日期无效时返回None
+    """
+    param_names = CACHEABLE_ROUTES.get(path)
+    if param_names is None:
+        return None
+
+    query = dict(parse_qsl(query_string))
+    values = []
+    for name in param_names:
+        value = query.get(name)
+        if not value:
+            return None
+        values.append(f"{name}={normalize_date_string(value)}")
+
+    try:
+        target_date = datetime.strptime(normalize_date_string(query["date"]), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+    return f"{path}?{'&'.join(values)}", target_date
+
+def _last_modified_timestamp(paths) -> float:
+    """取数据来源文件中最新的修改时间"""
+    timestamps = [os.path.getmtime(p) for p in paths if os.path.exists(p)]
+    return max(timestamps) if timestamps else datetime.now().timestamp()
+
+class ConditionalCacheMiddleware:
+    """
+    条件请求缓存中间件
+
+    对按日期确定结果的GET接口计算强ETag，命中If-None-Match时直接返回304，
+    不再调用服务；同时缓存响应内容，并根据日期输出Cache-Control和Last-Modified。
+    传入compressor时按Accept-Encoding发送缓存的压缩版本，外层压缩中间件不再重复压缩
+    """
+
+    def __init__(self, app, cache: Optional[ResponseCache] = None, source_files=(),
+                 compressor: Optional[Compressor] = None):
+        self.app = app
+        self.cache = cache if cache is not None else ResponseCache()
+        self.compressor = compressor
+        self.source_files = tuple(source_files)
+        self._refresh_last_modified()
+
+    def _refresh_last_modified(self):
+        """根据数据来源文件重新计算Last-Modified"""
+        self.generation = self.cache.generation
+        self.last_modified_ts = int(_last_modified_timestamp(self.source_files))
+        self.last_modified = formatdate(self.last_modified_ts, usegmt=True).encode('ascii')
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        cache_key = build_cache_key(scope["path"], scope.get("query_string", b"").decode("latin-1"))
+        if cache_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        key, target_date = cache_key
+        if self.generation != self.cache.generation:
+            # 缓存因配置变化被清空，数据来源的修改时间也随之变化
+            self._refresh_last_modified()
+        headers = dict(scope["headers"])
+        if_none_match = headers.get(b"if-none-match", b"").decode("latin-1")
+        cache_headers = [
+            (b"cache-control", cache_control_for(target_date).encode('ascii')),
+            (b"last-modified", self.last_modified),
+        ]
+        if self.compressor is not None:
+            cache_headers.append((b"vary", b"Accept-Encoding"))
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            # 只有If-Modified-Since时，数据来源未变化即可判定未修改；
+            # 只对已缓存的键生效，未缓存的键参数还没有经过服务校验
+            if_modified_since = headers.get(b"if-modified-since")
+            if not if_none_match and if_modified_since and self._not_modified_since(if_modified_since):
+                await self._send_not_modified(send, entry.etag, cache_headers)
+                return
+            await self._respond(scope, send, entry, if_none_match, cache_headers)
+            return
+
+        # 缓存未命中：调用服务并收集响应
+        generation = self.cache.generation
+        start_message = None
+        body_parts = []
+
+        async def capture(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                body_parts.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        body = b"".join(body_parts)
+
+        if start_message is None or start_message["status"] != 200:
+            # 错误响应原样返回，不做缓存
+            if start_message is not None:
+                await send(start_message)
+                await send({"type": "http.response.body", "body": body})
+            return
+
+        response_headers = dict(start_message.get("headers", []))
+        entry = CachedResponse(
+            compute_etag(body),
+            body,
+            response_headers.get(b"content-type", b"application/json")
+        )
+        self.cache.put(key, entry, generation)
+        await self._respond(scope, send, entry, if_none_match, cache_headers)
+
+    async def _respond(self, scope, send, entry: CachedResponse, if_none_match: str, cache_headers):
+        """按协商的编码发送缓存项，If-None-Match匹配原始或压缩版本的ETag时返回304"""
+        encoding = None
+        if self.compressor is not None and is_compressible(entry.content_type):
+            encoding = self.compressor.encoding_for(scope)
+        body, encoding = entry.variants.get(encoding, self.compressor)
+        etag = variant_etag(entry.etag, encoding)
+
+        if if_none_match and (etag_matches(if_none_match, etag) or etag_matches(if_none_match, entry.etag)):
+            await self._send_not_modified(send, etag, cache_headers)
+        else:
+            await self._send_body(send, body, entry.content_type, etag, encoding, cache_headers)
+
+    def _not_modified_since(self, if_modified_since: bytes) -> bool:
+        """判断If-Modified-Since是否不早于数据最后修改时间"""
+        try:
+            since = parsedate_to_datetime(if_modified_since.decode("latin-1"))
+        except (TypeError, ValueError):
+            return False
+        return since.timestamp() >= self.last_modified_ts
+
+    async def _send_body(self, send, body: bytes, content_type: bytes, etag: bytes,
+                         encoding: Optional[str], cache_headers):
+        """发送缓存的完整响应"""
+        headers = [
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode('ascii')),
+            (b"etag", etag),
+        ]
+        if encoding is not None:
+            headers.append((b"content-encoding", encoding.encode('ascii')))
+        await send({"type": "http.response.start", "status": 200, "headers": headers + cache_headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _send_not_modified(self, send, etag: Optional[bytes], cache_headers):
+        """发送304响应"""
+        headers = list(cache_headers)
+        if etag is not None:
+            headers.append((b"etag", etag))
+        await send({"type": "http.response.start", "status": 304, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内调用模块
+通过ASGI传输层直接调用本应用的接口，不经过TCP回环和端口映射
+"""
+
+import time
+import asyncio
+from typing import Any, Dict, List, Optional
+
+# 进程内请求的客户端地址，中间件据此识别内部调用
+INTERNAL_CLIENT = ("in-process", 0)
+
+# 进程内请求使用的基础URL，主机名只用于构造请求，不会真正解析
+INTERNAL_BASE_URL = "http://in-process"
+
+SUPPORTED_METHODS = ("GET", "POST", "PUT", "DELETE")
+
+def create_internal_client(app, timeout: float = 30.0) -> "httpx.AsyncClient":
+    """
+    创建进程内调用客户端
+
+    Args:
+        app: ASGI应用
+        timeout: 单次调用超时时间（秒）
+
+    Returns:
+        httpx.AsyncClient: 请求直接交给app处理的客户端
+    """
+    # httpx只在创建客户端时需要，延迟导入以缩短启动时间
+    import httpx
+    
+    # raise_app_exceptions=False：接口异常以500响应返回，而不是在调用方抛出
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False, client=INTERNAL_CLIENT)
+    return httpx.AsyncClient(transport=transport, base_url=INTERNAL_BASE_URL, timeout=timeout)
+
+def is_internal_request(scope) -> bool:
+    """判断请求是否来自进程内调用"""
+    client = scope.get("client")
+    return client is not None and client[0] == INTERNAL_CLIENT[0]
+
+def _decode_body(response: "httpx.Response") -> Any:
+    """按Content-Type解析响应内容"""
+    if response.headers.get('content-type', '').startswith('application/json'):
+        try:
+            return response.json()
+        except ValueError:
+            pass
+    return response.text
+
+async def dispatch(client: "httpx.AsyncClient", method: str, endpoint: str,
+                   params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    进程内调用一个接口
+
+    GET/DELETE的参数作为查询参数，POST/PUT的参数作为JSON请求体
+
+    Args:
+        client: create_internal_client创建的客户端
+        method: HTTP方法
+        endpoint: 接口路径
+        params: 请求参数
+
+    Returns:
+        dict: 包含status_code、headers、data和duration_ms的调用结果
+
+    Raises:
+        ValueError: 不支持的HTTP方法
+    """
+    method = method.upper()
+    if method not in SUPPORTED_METHODS:
+        raise ValueError(f"不支持的HTTP方法: {method}")
+
+    params = params or {}
+    start_time = time.perf_counter()
+    if method in ("GET", "DELETE"):
+        response = await client.request(method, endpoint, params=params)
+    else:
+        response = await client.request(method, endpoint, json=params)
+    duration = time.perf_counter() - start_time
+
+    return {
+        "status_code": response.status_code,
+        "headers": dict(response.headers),
+        "data": _decode_body(response),
+        "duration_ms": round(duration * 1000, 3)
+    }
+
+async def dispatch_many(client: "httpx.AsyncClient", calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    并发调用多个接口，结果与calls顺序一致；单个调用失败不影响其他调用
+
+    Args:
+        client: create_internal_client创建的客户端
+        calls: [{"endpoint": ..., "method": ..., "params": ...}]
+
+    Returns:
+        list: 每个调用的结果，失败的调用包含error字段
+    """
+    async def run(call):
+        endpoint = call.get('endpoint', '')
+        method = call.get('method', 'GET')
+        params = call.get('params', {})
+        result = {"endpoint": endpoint, "method": method, "request_params": params}
+        try:
+            result["response"] = await dispatch(client, method, endpoint, params)
+            result["success"] = True
+        except Exception as e:
+            result["success"] = False
+            result["error"] = str(e)
+        return result
+
+    return list(await asyncio.gather(*(run(call) for call in calls)))
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON响应模块
+基于json_utils.dumps的响应类，作为应用的默认响应类
+"""
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from utils.json_utils import dumps
+
+class FastJSONResponse(JSONResponse):
+    """
+    使用dumps序列化的JSON响应
+
+    作为应用默认响应类；接口直接返回该类的实例时还可以跳过FastAPI的jsonable_encoder，
+    适合只包含基本类型的大响应
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class RawJSONResponse(JSONResponse):
+    """内容已经是编码好的JSON字节串的响应"""
+
+    def render(self, content: bytes) -> bytes:
+        return content
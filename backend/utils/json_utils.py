@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON序列化工具模块
+优先使用orjson序列化响应，未安装时回退到标准库json；支持拼接预先编码好的JSON片段
+"""
+
+import json
+import datetime
+from typing import Any, Iterable
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+def _default(obj: Any) -> Any:
+    """标准库json的回退编码，日期与orjson一样输出ISO格式"""
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(obj: Any) -> bytes:
+    """将对象编码为紧凑的UTF-8 JSON字节串，中文不转义"""
+    if orjson is not None:
+        # OPT_NON_STR_KEYS：与标准库一致，允许非字符串的字典键
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+def dumps_str(obj: Any) -> str:
+    """将对象编码为紧凑的JSON字符串，用于按行输出的协议"""
+    return dumps(obj).decode("utf-8")
+
+def join_array(fragments: Iterable[bytes]) -> bytes:
+    """将预先编码好的JSON片段拼接为JSON数组"""
+    return b"[" + b",".join(fragments) + b"]"
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志工具模块
+提供基于队列的非阻塞日志管道、JSON行格式的访问日志和按路由采样
+"""
+
+import json
+import queue
+import random
+import logging
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+
+class JsonLinesFormatter(logging.Formatter):
+    """将访问日志格式化为单行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"time": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds')}
+        access = getattr(record, "access", None)
+        if access:
+            entry.update(access)
+        else:
+            entry["message"] = record.getMessage()
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+class AccessLogSampler:
+    """
+    访问日志采样器
+
+    按路由配置采样率，未配置的路由使用默认采样率；
+    错误响应和慢请求始终记录
+    """
+
+    def __init__(self, default_rate: float = 1.0, route_rates: Optional[Dict[str, float]] = None,
+                 slow_threshold: float = 1.0):
+        self.default_rate = default_rate
+        self.route_rates = dict(route_rates or {})
+        self.slow_threshold = slow_threshold
+
+    def should_log(self, path: str, status_code: int, duration: float) -> bool:
+        """判断本次请求是否需要写入访问日志"""
+        if status_code >= 500 or duration >= self.slow_threshold:
+            return True
+        rate = self.route_rates.get(path, self.default_rate)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        return random.random() < rate
+
+class LocalQueueHandler(QueueHandler):
+    """
+    轻量的队列处理器
+
+    标准QueueHandler会在请求线程中格式化并复制每条记录；这里只合并消息参数，
+    其余格式化工作交给后台写入线程
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # 异常信息在入队前转为文本，避免跨线程持有traceback
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def exclude_logger(name: str):
+    """生成排除指定日志记录器的过滤函数"""
+    return lambda record: record.name != name
+
+def start_queue_logging(handlers: List[logging.Handler]) -> Tuple[LocalQueueHandler, QueueListener]:
+    """
+    启动队列日志管道
+
+    请求路径上只把日志记录放入内存队列，由后台线程负责格式化和写入磁盘
+
+    Args:
+        handlers: 实际写日志的处理器
+
+    Returns:
+        tuple: (放入日志记录器的队列处理器, 后台写入线程QueueListener)
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = LocalQueueHandler(log_queue)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return queue_handler, listener
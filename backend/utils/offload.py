@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+计算任务卸载模块
+将大区间的同步计算放到有界线程池或进程池中执行，避免阻塞事件循环；
+池满时拒绝新任务，由接口返回503和Retry-After
+"""
+
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ExecutorSaturatedError(Exception):
+    """执行池已满，无法接收新任务"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"计算任务过多，请{retry_after}秒后重试")
+        self.retry_after = retry_after
+
+class OffloadExecutor:
+    """
+    有界计算执行器
+
+    计算规模不超过inline_threshold的任务直接在当前线程执行；更大的任务交给执行池，
+    正在执行和排队的任务总数不超过max_workers + max_queue，超出时抛出ExecutorSaturatedError。
+    计数只在事件循环线程中修改，不需要加锁
+    """
+
+    def __init__(self, mode: str = "thread", max_workers: int = 4, max_queue: int = 16,
+                 inline_threshold: int = 60, retry_after: int = 1):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"不支持的执行池类型: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.inline_threshold = inline_threshold
+        self.retry_after = retry_after
+        self.pending = 0
+        self.inline_calls = 0
+        self.offloaded_calls = 0
+        self.rejected_calls = 0
+        self._pool: Optional[Executor] = None
+
+    @property
+    def capacity(self) -> int:
+        """同时执行和排队的任务上限"""
+        return self.max_workers + self.max_queue
+
+    def _get_pool(self) -> Executor:
+        """首次使用时创建执行池"""
+        if self._pool is None:
+            if self.mode == "process":
+                # 进程池只能执行可序列化的模块级纯函数，不能修改主进程中的状态
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="offload")
+        return self._pool
+
+    async def run(self, size: int, func: Callable, *args, **kwargs) -> Any:
+        """
+        执行计算任务
+
+        Args:
+            size: 计算规模，例如区间天数
+            func: 同步计算函数
+            *args, **kwargs: 传给计算函数的参数
+
+        Returns:
+            计算函数的返回值
+
+        Raises:
+            ExecutorSaturatedError: 执行池已满
+        """
+        if size <= self.inline_threshold:
+            self.inline_calls += 1
+            return func(*args, **kwargs)
+
+        if self.pending >= self.capacity:
+            self.rejected_calls += 1
+            logger.warning(f"计算执行池已满 | 进行中: {self.pending} | 拒绝规模为{size}的任务")
+            raise ExecutorSaturatedError(self.retry_after)
+
+        self.pending += 1
+        self.offloaded_calls += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), partial(func, *args, **kwargs))
+        finally:
+            self.pending -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出执行池状态"""
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "inline_threshold": self.inline_threshold,
+            "pending": self.pending,
+            "inline_calls": self.inline_calls,
+            "offloaded_calls": self.offloaded_calls,
+            "rejected_calls": self.rejected_calls
+        }
+
+    def recycle(self):
+        """
+        替换执行池，之后的任务在新建的执行池中执行
+
+        旧执行池中正在执行的任务照常完成；进程池的工作进程在配置重新加载后需要重建
+        """
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def shutdown(self):
+        """关闭执行池，不等待正在执行的任务"""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
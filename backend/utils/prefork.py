@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程服务模块
+父进程预先加载应用和预计算数据并绑定端口，再fork出多个工作进程共享同一个监听socket；
+预加载的数据通过写时复制在工作进程间共享
+"""
+
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 工作进程异常退出后重新启动前的等待时间（秒），避免启动失败时疯狂重启
+RESTART_DELAY = 1.0
+
+def supports_prefork() -> bool:
+    """当前平台是否支持fork"""
+    return hasattr(os, "fork")
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """创建供所有工作进程共享的监听socket"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def _run_worker(app, sock: socket.socket, log_level: str, on_worker_start: Optional[Callable[[], None]]):
+    """工作进程入口：在继承的socket上运行uvicorn"""
+    import uvicorn
+
+    # 恢复默认信号处理，由uvicorn负责优雅退出
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if on_worker_start is not None:
+        on_worker_start()
+
+    config = uvicorn.Config(app, log_level=log_level, access_log=False)
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+def serve_prefork(app, host: str, port: int, workers: int, log_level: str = "info",
+                  on_worker_start: Optional[Callable[[], None]] = None):
+    """
+    以多个工作进程运行应用
+
+    Args:
+        app: 已在父进程中创建好的ASGI应用
+        host: 监听地址
+        port: 监听端口
+        workers: 工作进程数量
+        log_level: uvicorn日志级别
+        on_worker_start: 工作进程启动后、开始处理请求前调用，用于重建不能跨fork的资源（线程、连接等）
+    """
+    sock = bind_socket(host, port)
+    # 把预加载的对象移出GC追踪，避免GC在工作进程中写对象头而破坏写时复制
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                _run_worker(app, sock, log_level, on_worker_start)
+            except BaseException:
+                logger.exception(f"工作进程{slot}异常退出")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        children[pid] = slot
+        logger.info(f"工作进程{slot}已启动 | PID: {pid}")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for slot in range(workers):
+        spawn(slot)
+
+    # 监控工作进程，异常退出的进程自动重启
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is None:
+            continue
+        if not stopping:
+            logger.warning(f"工作进程{slot}已退出 | PID: {pid} | 状态: {status}，准备重启")
+            time.sleep(RESTART_DELAY)
+            if not stopping:
+                spawn(slot)
+
+    sock.close()
+    logger.info("所有工作进程已退出")
+    sys.stdout.flush()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+限流工具模块
+按客户端IP的令牌桶限流，区间类接口按区间大小计费；事件循环延迟过高时整体降载
+"""
+
+import ipaddress
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from utils.internal_client import is_internal_request
+
+# 按days_before和days_after计算区间大小的接口
+RANGE_ROUTES = frozenset(("/biorhythm/range", "/maya/range", "/dress/range", "/biorhythm"))
+
+class TokenBucket:
+    """令牌桶"""
+
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+class RateLimiter:
+    """
+    按客户端的令牌桶限流器
+
+    每个客户端以rate个/秒的速度补充令牌，最多积累burst个；桶的数量不超过max_clients，
+    超出时淘汰最久未访问的桶。只在事件循环线程中使用，不需要加锁
+    """
+
+    def __init__(self, rate: float = 10.0, burst: float = 40.0, max_clients: int = 10000,
+                 route_costs: Optional[Dict[str, float]] = None, range_days_per_token: float = 30.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.route_costs = dict(route_costs or {})
+        self.range_days_per_token = range_days_per_token
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.rejected = 0
+        self.evicted = 0
+
+    def request_cost(self, path: str, query_string: str) -> float:
+        """
+        计算请求消耗的令牌数
+
+        基础消耗按路由配置（默认1）；区间类接口每range_days_per_token天额外消耗1个令牌，
+        单次消耗不超过burst，超大区间会一次耗尽令牌桶
+        """
+        cost = self.route_costs.get(path, 1.0)
+        if path in RANGE_ROUTES and query_string:
+            query = dict(parse_qsl(query_string))
+            try:
+                days = abs(int(query.get("days_before", 0))) + abs(int(query.get("days_after", 0)))
+            except ValueError:
+                days = 0
+            cost += days / self.range_days_per_token
+        return min(cost, self.burst)
+
+    def acquire(self, client_id: str, cost: float, now: Optional[float] = None) -> Tuple[bool, float]:
+        """
+        尝试为客户端扣除令牌
+
+        Returns:
+            tuple: (是否允许, 需要等待的秒数)
+        """
+        if now is None:
+            now = time.monotonic()
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = self._buckets[client_id] = TokenBucket(self.burst, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._buckets.move_to_end(client_id)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate)
+            bucket.updated_at = now
+
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            return True, 0.0
+        self.rejected += 1
+        return False, (cost - bucket.tokens) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def snapshot(self) -> Dict:
+        """导出限流统计"""
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tracked_clients": len(self._buckets),
+            "max_clients": self.max_clients,
+            "rejected": self.rejected,
+            "evicted": self.evicted
+        }
+
+class LoadShedder:
+    """事件循环延迟超过阈值时拒绝新请求"""
+
+    def __init__(self, lag_source: Callable[[], float], max_loop_lag: float = 0.5, retry_after: int = 1):
+        self.lag_source = lag_source
+        self.max_loop_lag = max_loop_lag
+        self.retry_after = retry_after
+        self.shed = 0
+
+    def should_shed(self) -> bool:
+        """当前是否需要降载"""
+        if self.lag_source() > self.max_loop_lag:
+            self.shed += 1
+            return True
+        return False
+
+def rate_limit_enabled(config: Dict) -> bool:
+    """是否启用限流，环境变量RATE_LIMIT_ENABLED优先于配置，压测时可以用它关闭限流"""
+    override = os.getenv('RATE_LIMIT_ENABLED')
+    if override is not None:
+        return override.lower() == 'true'
+    return config.get('enabled', True)
+
+def parse_trusted_proxies(proxies: Iterable[str]) -> Tuple:
+    """解析可信代理的地址或网段"""
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+def _is_trusted_proxy(address: str, trusted_proxies: Tuple) -> bool:
+    """地址是否属于可信代理"""
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+def client_id_from_scope(scope, trusted_proxies: Tuple = ()) -> str:
+    """
+    获取客户端标识
+
+    只有直连地址属于可信代理时才读取代理头：优先使用X-Real-IP（nginx以$remote_addr覆盖，客户端无法伪造），
+    否则从X-Forwarded-For最右侧向左跳过可信代理，取第一个不可信的地址；
+    最左侧的值由客户端自行填写，不能作为标识
+    """
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if not trusted_proxies or not _is_trusted_proxy(peer, trusted_proxies):
+        return peer
+
+    forwarded_for = None
+    for name, value in scope.get("headers", ()):
+        if name == b"x-real-ip":
+            real_ip = value.decode("latin-1").strip()
+            if real_ip:
+                return real_ip
+        elif name == b"x-forwarded-for":
+            forwarded_for = value.decode("latin-1")
+    if forwarded_for:
+        for hop in reversed(forwarded_for.split(",")):
+            hop = hop.strip()
+            if hop and not _is_trusted_proxy(hop, trusted_proxies):
+                return hop
+    return peer
+
+class RateLimitMiddleware:
+    """
+    限流和降载中间件
+
+    需放在CORS中间件之内，使429/503响应同样带有CORS头，浏览器能读到Retry-After；
+    进程内调用和exempt_paths中的路径不受限制
+    """
+
+    def __init__(self, app, limiter: RateLimiter, shedder: Optional[LoadShedder] = None,
+                 exempt_paths: Iterable[str] = (), trusted_proxies: Tuple = ()):
+        self.app = app
+        self.limiter = limiter
+        self.shedder = shedder
+        self.exempt_paths = frozenset(exempt_paths)
+        self.trusted_proxies = trusted_proxies
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] == "OPTIONS"
+                or scope["path"] in self.exempt_paths or is_internal_request(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        if self.shedder is not None and self.shedder.should_shed():
+            await self._reject(send, 503, "服务繁忙，请稍后重试", self.shedder.retry_after)
+            return
+
+        cost = self.limiter.request_cost(scope["path"], scope.get("query_string", b"").decode("latin-1"))
+        allowed, wait = self.limiter.acquire(client_id_from_scope(scope, self.trusted_proxies), cost)
+        if not allowed:
+            await self._reject(send, 429, "请求过于频繁，请稍后重试", math.ceil(wait))
+            return
+
+        await self.app(scope, receive, send)
+
+    async def _reject(self, send, status: int, message: str, retry_after: int):
+        """发送限流响应"""
+        retry_after = max(retry_after, 1)
+        body = json.dumps({"error": message, "retry_after": retry_after}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(retry_after).encode("ascii")),
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求指标模块
+按路由和状态码统计请求延迟直方图、请求数和进行中请求数，并输出Prometheus文本格式
+"""
+
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from starlette.routing import Match
+
+# 延迟直方图的桶上限（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 未匹配任何路由的请求统一归到该标签下，避免随机路径撑大指标数量
+UNMATCHED_ROUTE = "unmatched"
+
+# 方法标签只取标准HTTP方法，其余方法归为OTHER，避免客户端随意构造的方法名撑大指标数量
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"})
+OTHER_METHOD = "OTHER"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class Histogram:
+    """
+    固定桶的直方图
+
+    创建时预分配各桶计数，记录时只做一次二分查找和整数自增
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # 最后一个位置对应+Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """记录一次观测值"""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        """返回Prometheus要求的累计桶计数"""
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+def _escape_label(value: str) -> str:
+    """转义标签值中的特殊字符"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class RequestMetrics:
+    """
+    请求指标收集器
+
+    只在事件循环线程中更新，因此不需要加锁；每个(方法, 路由, 状态码)组合在首次出现时
+    创建一个直方图，路由使用路由模板而不是原始路径，方法只取标准方法，指标数量有上限
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.routes = ()
+        self.caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        self.started_at = time.time()
+
+    def set_routes(self, routes: Iterable):
+        """登记应用的路由，用于在进入路由之前确定请求的路由模板"""
+        self.routes = tuple(routes)
+
+    def register_cache(self, name: str, stats: Callable[[], Tuple[int, int]]):
+        """
+        登记需要统计命中率的缓存
+
+        Args:
+            name: 缓存名称
+            stats: 返回(命中次数, 未命中次数)的函数
+        """
+        self.caches[name] = stats
+
+    def route_label(self, scope) -> str:
+        """
+        获取请求的路由模板标签
+
+        按路由器相同的规则匹配：优先完全匹配，其次只有方法不符的路由，都不匹配时归为unmatched
+        """
+        partial = None
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", UNMATCHED_ROUTE)
+            if match == Match.PARTIAL and partial is None:
+                partial = getattr(route, "path", UNMATCHED_ROUTE)
+        return partial or UNMATCHED_ROUTE
+
+    @staticmethod
+    def method_label(method: str) -> str:
+        """获取请求的方法标签，非标准方法归为OTHER"""
+        return method if method in KNOWN_METHODS else OTHER_METHOD
+
+    def observe(self, method: str, route: str, status: int, duration: float):
+        """记录一次请求"""
+        key = (method, route, str(status))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+        histogram.observe(duration)
+
+    def render(self) -> str:
+        """导出Prometheus文本格式"""
+        lines = [
+            "# HELP http_request_duration_seconds 请求处理耗时",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        bounds = [repr(float(b)) for b in self.buckets] + ["+Inf"]
+        for (method, route, status), histogram in sorted(self.histograms.items()):
+            labels = f'method="{method}",route="{_escape_label(route)}",status="{status}"'
+            for bound, count in zip(bounds, histogram.cumulative()):
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum!r}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        lines.append("# HELP http_requests_total 请求总数")
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route, status), histogram in sorted(self.histograms.items()):
+            labels = f'method="{method}",route="{_escape_label(route)}",status="{status}"'
+            lines.append(f"http_requests_total{{{labels}}} {histogram.count}")
+
+        lines.append("# HELP http_requests_in_flight 正在处理的请求数")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        for route, count in sorted(self.in_flight.items()):
+            lines.append(f'http_requests_in_flight{{route="{_escape_label(route)}"}} {count}')
+
+        cache_stats = []
+        for name, stats in sorted(self.caches.items()):
+            hits, misses = stats()
+            cache_stats.append((name, hits, misses))
+        lines.append("# HELP cache_hits_total 缓存命中次数")
+        lines.append("# TYPE cache_hits_total counter")
+        for name, hits, _ in cache_stats:
+            lines.append(f'cache_hits_total{{cache="{name}"}} {hits}')
+        lines.append("# HELP cache_misses_total 缓存未命中次数")
+        lines.append("# TYPE cache_misses_total counter")
+        for name, _, misses in cache_stats:
+            lines.append(f'cache_misses_total{{cache="{name}"}} {misses}')
+        lines.append("# HELP cache_hit_ratio 缓存命中率")
+        lines.append("# TYPE cache_hit_ratio gauge")
+        for name, hits, misses in cache_stats:
+            total = hits + misses
+            lines.append(f'cache_hit_ratio{{cache="{name}"}} {hits / total if total else 0.0!r}')
+
+        lines.append("# HELP process_start_time_seconds 进程启动时间")
+        lines.append("# TYPE process_start_time_seconds gauge")
+        lines.append(f"process_start_time_seconds {self.started_at!r}")
+        return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """
+    请求指标中间件
+
+    需放在路由别名中间件之内，使统计看到的是改写后的规范路径
+    """
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        # 路由模板在进入路由之前确定，进行中请求数和直方图使用同一标签
+        route = metrics.route_label(scope)
+        method = metrics.method_label(scope["method"])
+        metrics.in_flight[route] = metrics.in_flight.get(route, 0) + 1
+        status_code = 500
+        start_time = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight[route] -= 1
+            metrics.observe(method, route, status_code, time.perf_counter() - start_time)
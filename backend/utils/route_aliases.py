@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+路由别名工具模块
+统一维护规范路径与前端探测使用的兼容路径，并规范化缓存破坏参数
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+# 前端在连接失败时依次尝试的路径前缀
+ALIAS_PREFIXES = ("/api", "/backend", "/biorhy", "/dress_info")
+
+# 可以通过别名访问的规范路径
+CANONICAL_PATHS = (
+    "/health",
+    "/biorhythm",
+    "/biorhythm/history",
+    "/biorhythm/today",
+    "/biorhythm/date",
+    "/biorhythm/range",
+    "/maya/today",
+    "/maya/date",
+    "/maya/range",
+    "/dress/today",
+    "/dress/date",
+    "/dress/range",
+)
+
+# 生物节律专用路径的简写形式
+SHORTHAND_ALIASES = {
+    "/biorhy/today": "/biorhythm/today",
+    "/biorhy/date": "/biorhythm/date",
+    "/biorhy/range": "/biorhythm/range",
+    "/biorhy/history": "/biorhythm/history",
+}
+
+# 前端附加的缓存破坏参数，不影响响应内容
+CACHE_BUSTING_PARAMS = frozenset(("_", "t", "ts", "timestamp", "nocache", "cacheBust"))
+
+# 记录的未命中路径种类上限，防止被随机路径撑满内存
+MAX_TRACKED_MISS_PATHS = 256
+
+def build_route_table() -> Dict[str, str]:
+    """
+    构建别名路径到规范路径的映射表
+
+    Returns:
+        dict: {别名路径: 规范路径}
+    """
+    table = {}
+    for prefix in ALIAS_PREFIXES:
+        # 连接探测：/api/ 等同于根路径
+        table[prefix] = "/"
+        table[prefix + "/"] = "/"
+        for path in CANONICAL_PATHS:
+            table[prefix + path] = path
+    table["/biorhythm/"] = "/"
+    table.update(SHORTHAND_ALIASES)
+    # 别名不能覆盖真实存在的路径
+    for path in CANONICAL_PATHS:
+        table.pop(path, None)
+    return table
+
+ROUTE_TABLE = build_route_table()
+
+def strip_cache_busting_params(query_string: str) -> Tuple[str, bool]:
+    """
+    去除查询字符串中的缓存破坏参数
+
+    Returns:
+        tuple: (规范化后的查询字符串, 是否去除了参数)
+    """
+    if not query_string:
+        return query_string, False
+    pairs = parse_qsl(query_string, keep_blank_values=True)
+    kept = [(k, v) for k, v in pairs if k not in CACHE_BUSTING_PARAMS]
+    if len(kept) == len(pairs):
+        return query_string, False
+    return urlencode(kept), True
+
+class RouteStats:
+    """别名命中、未命中(404)和缓存破坏参数的统计"""
+
+    def __init__(self):
+        self.alias_hits: Counter = Counter()
+        self.miss_paths: Counter = Counter()
+        self.total_misses = 0
+        self.cache_busting_stripped = 0
+
+    def record_miss(self, path: str):
+        """记录一次404，未命中路径种类超过上限后只计总数"""
+        self.total_misses += 1
+        if path in self.miss_paths or len(self.miss_paths) < MAX_TRACKED_MISS_PATHS:
+            self.miss_paths[path] += 1
+
+    def snapshot(self) -> Dict:
+        """导出统计数据"""
+        return {
+            "alias_hits_total": sum(self.alias_hits.values()),
+            "alias_hits": dict(self.alias_hits.most_common()),
+            "misses_total": self.total_misses,
+            "top_miss_paths": dict(self.miss_paths.most_common(20)),
+            "cache_busting_stripped": self.cache_busting_stripped
+        }
+
+class RouteAliasMiddleware:
+    """
+    路由别名中间件
+
+    将别名路径改写为规范路径，去除缓存破坏参数，使后续的路由和缓存只看到规范请求；
+    同时统计别名访问和404探测
+    """
+
+    def __init__(self, app, stats: RouteStats, route_table: Dict[str, str] = None):
+        self.app = app
+        self.stats = stats
+        self.route_table = route_table if route_table is not None else ROUTE_TABLE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        canonical = self.route_table.get(path)
+        query_string, stripped = strip_cache_busting_params(scope.get("query_string", b"").decode("latin-1"))
+
+        if canonical is not None or stripped:
+            scope = dict(scope)
+            if canonical is not None:
+                self.stats.alias_hits[path] += 1
+                scope["path"] = canonical
+                scope["raw_path"] = canonical.encode("latin-1")
+            if stripped:
+                self.stats.cache_busting_stripped += 1
+                scope["query_string"] = query_string.encode("latin-1")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] == 404:
+                self.stats.record_miss(path)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
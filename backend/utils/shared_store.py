@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享状态存储模块
+基于本地SQLite(WAL模式)保存查询历史和登录token，供多个工作进程共享
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 默认数据库位置
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'shared_state.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recent_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    list_key TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recent_items_key ON recent_items (list_key, id);
+CREATE TABLE IF NOT EXISTS tokens (
+    token TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+class SharedStore:
+    """
+    多进程共享的状态存储
+
+    每个进程、每个线程使用各自的连接；连接在首次使用时创建，fork出的工作进程
+    不会复用父进程的连接。请求路径上的写入交给每个进程一个的后台写入线程，
+    等待其他进程的写锁不会阻塞事件循环
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._schema_ready = False
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._writer_pid = None
+        self._writer_lock = threading.Lock()
+        self._last_write: Optional[Future] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前进程、当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # isolation_level=None：由各方法显式控制事务
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._schema_ready or self.path == ":memory:":
+            conn.executescript(SCHEMA)
+            self._schema_ready = True
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def push_recent(self, list_key: str, value: str, limit: int):
+        """
+        将值放到最近列表的开头，已存在的值先移除，列表长度不超过limit
+
+        Args:
+            list_key: 列表名称
+            value: 要记录的值
+            limit: 列表最大长度
+        """
+        conn = self._connect()
+        # BEGIN IMMEDIATE：多个进程同时写入时串行执行，保证删除、插入和截断的原子性
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM recent_items WHERE list_key = ? AND value = ?", (list_key, value))
+            conn.execute("INSERT INTO recent_items (list_key, value) VALUES (?, ?)", (list_key, value))
+            conn.execute(
+                "DELETE FROM recent_items WHERE list_key = ? AND id NOT IN "
+                "(SELECT id FROM recent_items WHERE list_key = ? ORDER BY id DESC LIMIT ?)",
+                (list_key, list_key, limit)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def push_recent_later(self, list_key: str, value: str, limit: int) -> Future:
+        """
+        在后台写入线程中执行push_recent，调用方不等待写入完成
+
+        写入只用于记录历史，失败时记录日志，不影响调用方的请求
+        """
+        future = self._get_writer().submit(self._push_recent_quietly, list_key, value, limit)
+        self._last_write = future
+        return future
+
+    def _push_recent_quietly(self, list_key: str, value: str, limit: int):
+        try:
+            self.push_recent(list_key, value, limit)
+        except sqlite3.Error as e:
+            logger.warning(f"写入最近列表失败: {list_key} | {e}")
+
+    def _get_writer(self) -> ThreadPoolExecutor:
+        """获取当前进程的后台写入线程，fork出的工作进程重新创建"""
+        with self._writer_lock:
+            if self._writer is None or self._writer_pid != os.getpid():
+                # 单线程执行，同一进程内的写入按提交顺序完成
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-store-writer")
+                self._writer_pid = os.getpid()
+            return self._writer
+
+    def wait_pending(self, timeout: Optional[float] = None):
+        """等待当前进程已提交的后台写入完成"""
+        future = self._last_write
+        if future is not None and self._writer_pid == os.getpid():
+            future.result(timeout)
+
+    def get_recent(self, list_key: str) -> List[str]:
+        """获取最近列表，最新的在前"""
+        rows = self._connect().execute(
+            "SELECT value FROM recent_items WHERE list_key = ? ORDER BY id DESC", (list_key,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def save_token(self, token: str, username: str, ttl: float):
+        """保存登录token，ttl秒后过期"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 顺带清理已过期的token
+            conn.execute("DELETE FROM tokens WHERE expires_at < ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO tokens (token, username, expires_at) VALUES (?, ?, ?)",
+                (token, username, now + ttl)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_token_user(self, token: str) -> Optional[str]:
+        """获取有效token对应的用户名，token不存在或已过期时返回None"""
+        row = self._connect().execute(
+            "SELECT username FROM tokens WHERE token = ? AND expires_at >= ?", (token, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def revoke_token(self, token: str) -> bool:
+        """删除token，返回token是否存在"""
+        cursor = self._connect().execute("DELETE FROM tokens WHERE token = ?", (token,))
+        return cursor.rowcount > 0
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+# 创建全局共享存储实例，可通过环境变量指定数据库位置
+shared_store = SharedStore(os.getenv('SHARED_STORE_PATH', DEFAULT_STORE_PATH))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+系统指标采样模块
+后台按固定间隔采集CPU、内存、磁盘和事件循环延迟，保存在环形缓冲区中
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class SystemMetricsSampler:
+    """
+    系统指标后台采样器
+
+    接口只读取最近的采样结果，不再在请求中阻塞等待CPU统计
+    """
+
+    def __init__(self, interval: float = 5.0, history_size: int = 60, disk_path: str = '/',
+                 lag_probe_interval: float = 0.25):
+        self.interval = interval
+        self.disk_path = disk_path
+        self.lag_probe_interval = lag_probe_interval
+        self.samples: deque = deque(maxlen=history_size)
+        # 最近一次探测到的事件循环延迟（秒）
+        self.loop_lag = 0.0
+
+    def sample(self, loop_lag: float = 0.0) -> Dict[str, Any]:
+        """采集一次系统指标并写入环形缓冲区"""
+        # psutil只在采样时需要，延迟导入以缩短启动时间
+        import psutil
+
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+        sample = {
+            "timestamp": time.time(),
+            # interval=None：返回距上次调用以来的CPU占用，不阻塞
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "memory_total": memory.total,
+            "memory_available": memory.available,
+            "memory_percent": memory.percent,
+            "disk_total": disk.total,
+            "disk_used": disk.used,
+            "disk_free": disk.free,
+            "disk_percent": (disk.used / disk.total) * 100 if disk.total else 0.0,
+            "event_loop_lag_ms": round(loop_lag * 1000, 3)
+        }
+        self.samples.append(sample)
+        return sample
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """获取最近一次采样"""
+        return self.samples[-1] if self.samples else None
+
+    def history(self) -> List[Dict[str, Any]]:
+        """获取环形缓冲区中的全部采样，按时间先后排列"""
+        return list(self.samples)
+
+    async def run(self):
+        """
+        后台采样循环
+
+        以较短的间隔探测事件循环延迟（实际唤醒时间与预期时间之差），
+        每个采样周期记录期间的最大延迟
+        """
+        loop = asyncio.get_running_loop()
+        max_lag = 0.0
+        next_sample = loop.time()
+        while True:
+            if loop.time() >= next_sample:
+                try:
+                    self.sample(max_lag)
+                except Exception as e:
+                    logger.error(f"系统指标采样失败: {str(e)}")
+                max_lag = 0.0
+                next_sample = loop.time() + self.interval
+            expected = loop.time() + self.lag_probe_interval
+            await asyncio.sleep(self.lag_probe_interval)
+            self.loop_lag = max(0.0, loop.time() - expected)
+            max_lag = max(max_lag, self.loop_lag)
@@ -1,5 +1,8 @@
 import React, { useState, useEffect } from 'react';
 
+// 使用环境变量配置的API基础URL，如果没有配置则使用默认值
+const apiBaseUrl = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5001';
+
 const ApiDocsViewer = () => {
   const [docs, setDocs] = useState([]);
   const [selectedDoc, setSelectedDoc] = useState(null);
@@ -7,13 +10,28 @@ const ApiDocsViewer = () => {
   const [error, setError] = useState(null);
   const [viewMode, setViewMode] = useState('json'); // 'json' or 'swagger'
 
+  // 文档列表只包含摘要，选中时再获取包含openApiSpec的完整文档
+  const selectDoc = async (doc) => {
+    setSelectedDoc(doc);
+    setViewMode('json'); // 默认显示JSON视图
+    if (doc.openApiSpec) {
+      return;
+    }
+    try {
+      const response = await fetch(`${apiBaseUrl}/api/docs/${encodeURIComponent(doc.id)}`);
+      if (response.ok) {
+        const fullDoc = await response.json();
+        setSelectedDoc((current) => (current?.id === doc.id ? fullDoc : current));
+      }
+    } catch (err) {
+      console.error('获取API文档详情失败:', err);
+    }
+  };
+
   // 获取API文档列表
   useEffect(() => {
     const fetchDocs = async () => {
       try {
-        // 使用环境变量配置的API基础URL，如果没有配置则使用默认值
-        const apiBaseUrl = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5001';
-        
         // 首先尝试获取自定义API文档
         try {
           const response = await fetch(`${apiBaseUrl}/api/docs`);
@@ -100,10 +118,7 @@ const ApiDocsViewer = () => {
                       ? 'bg-indigo-100 text-indigo-800 dark:bg-indigo-900/50 dark:text-indigo-200'
                       : 'hover:bg-gray-100 dark:hover:bg-gray-700/50 dark:text-gray-300'
                   }`}
-                  onClick={() => {
-                    setSelectedDoc(doc);
-                    setViewMode('json'); // 默认显示JSON视图
-                  }}
+                  onClick={() => selectDoc(doc)}
                 >
                   <div className="font-medium text-gray-900 dark:text-white">{doc.title}</div>
                   <div className="text-xs text-gray-500 dark:text-gray-400">版本: {doc.version}</div>
@@ -179,7 +194,7 @@ const ApiDocsViewer = () => {
                         onClick={() => {
                           // 打开Swagger UI页面
                           const apiBaseUrl = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5001';
-                          window.open(`${apiBaseUrl}/api/docs`, '_blank');
+                          window.open(`${apiBaseUrl}/api/swagger`, '_blank');
                         }}
                       >
                         在新窗口中打开Swagger UI
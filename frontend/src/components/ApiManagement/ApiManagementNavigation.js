@@ -26,7 +26,15 @@ const ApiManagementNavigation = () => {
       if (savedToken) {
         // 验证token是否仍然有效
         try {
-          // 这里可以添加一个API调用来验证token
+          const apiBaseUrl = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5001';
+          const response = await fetch(`${apiBaseUrl}/api/management/verify`, {
+            headers: {
+              'Authorization': `Bearer ${savedToken}`
+            }
+          });
+          if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+          }
           setIsLoggedIn(true);
           setToken(savedToken);
         } catch (err) {
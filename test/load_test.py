@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+统一后端服务压测脚本
+按配置的接口权重，以固定并发（闭环）或固定请求速率（开环）压测本地实例，
+输出每个接口的p50/p95/p99延迟、吞吐量和错误率（JSON格式），便于对比不同版本
+
+示例:
+    python test/load_test.py --concurrency 32 --duration 30
+    python test/load_test.py --rps 200 --duration 60 --mix maya_range=3,dress_range=3,health=1
+    python test/load_test.py --output after.json --compare before.json
+
+注意: 服务默认按客户端IP限流，压测本机时超出的请求会返回429。429单独统计，不计入错误和延迟；
+429占比超过--max-rate-limited（默认5%）时报告测量的是限流器而不是服务，脚本以退出码2失败。
+测量原始吞吐量时以环境变量关闭限流启动服务:
+    RATE_LIMIT_ENABLED=false python backend/app.py
+或在config/app_config.json中调高rate_limit.rate和rate_limit.burst
+"""
+
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+def random_date(rng: random.Random, start_year: int, end_year: int) -> str:
+    """生成区间内的随机日期字符串"""
+    start = date(start_year, 1, 1)
+    days = (date(end_year, 12, 31) - start).days
+    return (start + timedelta(days=rng.randint(0, days))).strftime("%Y-%m-%d")
+
+def birth_date(rng: random.Random) -> str:
+    return random_date(rng, 1960, 2005)
+
+def target_date(rng: random.Random) -> str:
+    return random_date(rng, 2000, 2030)
+
+def range_params(rng: random.Random, max_days: int = 30) -> Dict[str, int]:
+    return {"days_before": rng.randint(0, max_days), "days_after": rng.randint(0, max_days)}
+
+# 压测的接口：名称 -> (HTTP方法, 路径, 请求参数生成函数)
+# GET请求的参数作为查询参数，POST请求的参数作为JSON请求体
+ROUTES: Dict[str, tuple] = {
+    "health": ("GET", "/health", lambda rng: {}),
+    "biorhythm_today": ("GET", "/biorhythm/today", lambda rng: {"birth_date": birth_date(rng)}),
+    "biorhythm_date": ("GET", "/biorhythm/date", lambda rng: {"birth_date": birth_date(rng), "date": target_date(rng)}),
+    "biorhythm_range": ("GET", "/biorhythm/range", lambda rng: {"birth_date": birth_date(rng), **range_params(rng)}),
+    "biorhythm_history": ("GET", "/biorhythm/history", lambda rng: {}),
+    "maya_today": ("GET", "/maya/today", lambda rng: {}),
+    "maya_date": ("GET", "/maya/date", lambda rng: {"date": target_date(rng)}),
+    "maya_range": ("GET", "/maya/range", lambda rng: range_params(rng)),
+    "maya_birth_info": ("POST", "/api/maya/birth-info", lambda rng: {"birth_date": birth_date(rng)}),
+    "maya_history": ("GET", "/api/maya/history", lambda rng: {}),
+    "dress_today": ("GET", "/dress/today", lambda rng: {}),
+    "dress_date": ("GET", "/dress/date", lambda rng: {"date": target_date(rng)}),
+    "dress_range": ("GET", "/dress/range", lambda rng: range_params(rng)),
+    "day": ("GET", "/api/day", lambda rng: {"birth_date": birth_date(rng), "date": target_date(rng)}),
+    "batch": ("POST", "/api/batch", lambda rng: {"requests": [
+        {"id": "maya", "route": "api_get_maya_date", "params": {"date": target_date(rng)}},
+        {"id": "dress", "route": "api_get_dress_date", "params": {"date": target_date(rng)}},
+    ]}),
+    "status": ("GET", "/api/management/status", lambda rng: {}),
+    "metrics": ("GET", "/metrics", lambda rng: {}),
+}
+
+# 默认权重：以前端页面的常用查询为主，管理接口占少量比例
+DEFAULT_MIX = {
+    "health": 1,
+    "biorhythm_today": 3,
+    "biorhythm_date": 2,
+    "biorhythm_range": 3,
+    "biorhythm_history": 1,
+    "maya_today": 3,
+    "maya_date": 2,
+    "maya_range": 2,
+    "maya_birth_info": 1,
+    "maya_history": 1,
+    "dress_today": 3,
+    "dress_date": 2,
+    "dress_range": 2,
+    "day": 2,
+    "batch": 1,
+    "status": 0.5,
+    "metrics": 0.5,
+}
+
+def parse_mix(spec: Optional[str]) -> Dict[str, float]:
+    """
+    解析接口权重，格式为"名称=权重,名称=权重"
+
+    Raises:
+        ValueError: 接口名称未知或权重无效
+    """
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise ValueError(f"未知的接口: {name}，可用接口: {', '.join(ROUTES)}")
+        mix[name] = float(weight) if weight else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"权重不能为负数: {item}")
+    if not any(mix.values()):
+        raise ValueError("至少需要一个权重大于0的接口")
+    return mix
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """按最近秩法计算百分位数，输入需已排序"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+class EndpointStats:
+    """单个接口的压测统计"""
+
+    __slots__ = ("latencies", "status_counts", "exceptions", "bytes_received", "rate_limited")
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.status_counts: Dict[str, int] = {}
+        self.exceptions: Dict[str, int] = {}
+        self.bytes_received = 0
+        self.rate_limited = 0
+
+    def record(self, latency: float, status: Optional[int] = None, error: Optional[str] = None, size: int = 0):
+        """记录一次请求，被限流（429）的请求只计数，不计入延迟"""
+        if error is not None:
+            self.exceptions[error] = self.exceptions.get(error, 0) + 1
+        else:
+            key = str(status)
+            self.status_counts[key] = self.status_counts.get(key, 0) + 1
+            if status == 429:
+                self.rate_limited += 1
+                return
+            self.bytes_received += size
+        self.latencies.append(latency)
+
+    @property
+    def errors(self) -> int:
+        """异常和状态码不小于400的请求数，不含被限流的请求"""
+        failed = sum(count for status, count in self.status_counts.items() if int(status) >= 400 and status != "429")
+        return failed + sum(self.exceptions.values())
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        """汇总统计，延迟单位为毫秒；延迟和吞吐量只统计未被限流的请求"""
+        latencies = sorted(self.latencies)
+        total = len(latencies) + self.rate_limited
+
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "requests": total,
+            "errors": self.errors,
+            "error_rate": round(self.errors / total, 4) if total else 0.0,
+            "rate_limited": self.rate_limited,
+            "rate_limited_rate": round(self.rate_limited / total, 4) if total else 0.0,
+            "throughput_rps": round(len(latencies) / duration, 2) if duration else 0.0,
+            "latency_ms": {
+                "min": ms(latencies[0]) if latencies else None,
+                "p50": ms(percentile(latencies, 50)),
+                "p95": ms(percentile(latencies, 95)),
+                "p99": ms(percentile(latencies, 99)),
+                "max": ms(latencies[-1]) if latencies else None,
+                "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            },
+            "status_counts": dict(sorted(self.status_counts.items())),
+            "exceptions": self.exceptions,
+            "bytes_received": self.bytes_received,
+        }
+
+class LoadTester:
+    """
+    异步压测器
+
+    闭环模式下concurrency个协程各自连续发送请求；开环模式下按rps均匀调度请求，
+    延迟从计划发送时间开始计算，服务变慢时排队时间同样计入延迟（避免协调遗漏）
+    """
+
+    def __init__(self, base_url: str, mix: Dict[str, float], concurrency: int = 16,
+                 rps: Optional[float] = None, timeout: float = 10.0, seed: int = 42):
+        self.base_url = base_url.rstrip("/")
+        self.names = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.names]
+        self.concurrency = concurrency
+        self.rps = rps
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, EndpointStats] = {name: EndpointStats() for name in self.names}
+        self.recording = False
+        self.dropped = 0
+
+    def next_request(self):
+        """按权重随机选择下一个请求"""
+        name = self.rng.choices(self.names, weights=self.weights)[0]
+        method, path, make_params = ROUTES[name]
+        return name, method, path, make_params(self.rng)
+
+    async def send(self, client: httpx.AsyncClient, scheduled_at: Optional[float] = None):
+        """发送一个请求并记录结果"""
+        name, method, path, params = self.next_request()
+        start = scheduled_at if scheduled_at is not None else time.perf_counter()
+        try:
+            if method == "GET":
+                response = await client.get(path, params=params)
+            else:
+                response = await client.request(method, path, json=params)
+            latency = time.perf_counter() - start
+            if self.recording:
+                self.stats[name].record(latency, response.status_code, size=len(response.content))
+        except httpx.HTTPError as e:
+            if self.recording:
+                self.stats[name].record(time.perf_counter() - start, error=type(e).__name__)
+
+    async def closed_loop(self, client: httpx.AsyncClient, deadline: float):
+        """闭环：请求完成后立即发送下一个"""
+        async def worker():
+            while time.perf_counter() < deadline:
+                await self.send(client)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def open_loop(self, client: httpx.AsyncClient, deadline: float):
+        """开环：按固定速率发送，进行中的请求超过concurrency时丢弃并计数"""
+        interval = 1.0 / self.rps
+        in_flight = set()
+        next_at = time.perf_counter()
+        while next_at < deadline:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= self.concurrency:
+                if self.recording:
+                    self.dropped += 1
+            else:
+                task = asyncio.create_task(self.send(client, scheduled_at=next_at))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            next_at += interval
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+    async def run(self, duration: float, warmup: float = 0.0) -> Dict[str, Any]:
+        """预热后压测duration秒，返回JSON格式的报告"""
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits) as client:
+            phase = self.open_loop if self.rps else self.closed_loop
+            if warmup > 0:
+                await phase(client, time.perf_counter() + warmup)
+            self.recording = True
+            started = time.perf_counter()
+            await phase(client, started + duration)
+            elapsed = time.perf_counter() - started
+
+        overall = EndpointStats()
+        for stats in self.stats.values():
+            overall.latencies.extend(stats.latencies)
+            for status, count in stats.status_counts.items():
+                overall.status_counts[status] = overall.status_counts.get(status, 0) + count
+            for error, count in stats.exceptions.items():
+                overall.exceptions[error] = overall.exceptions.get(error, 0) + count
+            overall.bytes_received += stats.bytes_received
+            overall.rate_limited += stats.rate_limited
+
+        return {
+            "config": {
+                "base_url": self.base_url,
+                "mode": "open" if self.rps else "closed",
+                "concurrency": self.concurrency,
+                "target_rps": self.rps,
+                "duration": duration,
+                "warmup": warmup,
+                "mix": dict(zip(self.names, self.weights)),
+            },
+            "elapsed": round(elapsed, 3),
+            "dropped": self.dropped,
+            "summary": overall.summary(elapsed),
+            "endpoints": {name: stats.summary(elapsed) for name, stats in self.stats.items()},
+        }
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """对比两次压测的p95延迟和吞吐量，比值大于1表示当前版本的数值更大"""
+    def ratio(new, old):
+        return round(new / old, 3) if new is not None and old else None
+
+    result = {}
+    for name, stats in current["endpoints"].items():
+        old = baseline.get("endpoints", {}).get(name)
+        if old is None:
+            continue
+        result[name] = {
+            "p95_ratio": ratio(stats["latency_ms"]["p95"], old["latency_ms"]["p95"]),
+            "throughput_ratio": ratio(stats["throughput_rps"], old["throughput_rps"]),
+            "error_rate": [old["error_rate"], stats["error_rate"]],
+        }
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='统一后端服务压测')
+    parser.add_argument('--base-url', default='http://localhost:5000', help='服务地址 (默认: http://localhost:5000)')
+    parser.add_argument('--duration', type=float, default=30, help='压测时长，秒 (默认: 30)')
+    parser.add_argument('--warmup', type=float, default=5, help='预热时长，秒，不计入统计 (默认: 5)')
+    parser.add_argument('--concurrency', type=int, default=16, help='并发数，开环模式下为进行中请求的上限 (默认: 16)')
+    parser.add_argument('--rps', type=float, default=None, help='目标请求速率，指定后使用开环模式')
+    parser.add_argument('--mix', default=None, help='接口权重，如 maya_range=3,health=1 (默认: 全部接口)')
+    parser.add_argument('--timeout', type=float, default=10, help='单个请求超时，秒 (默认: 10)')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子 (默认: 42)')
+    parser.add_argument('--output', default=None, help='报告输出文件')
+    parser.add_argument('--compare', default=None, help='用于对比的历史报告文件')
+    parser.add_argument('--max-rate-limited', type=float, default=0.05,
+                        help='允许的429占比，超过时以退出码2失败 (默认: 0.05)')
+    parser.add_argument('--list-routes', action='store_true', help='列出可用接口后退出')
+    args = parser.parse_args()
+
+    if args.list_routes:
+        for name, (method, path, _) in ROUTES.items():
+            print(f"{name:<20} {method:<5} {path}")
+        return 0
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    tester = LoadTester(args.base_url, mix, concurrency=args.concurrency, rps=args.rps,
+                        timeout=args.timeout, seed=args.seed)
+    report = asyncio.run(tester.run(args.duration, args.warmup))
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            report["comparison"] = compare_reports(report, json.load(f))
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    print(output)
+    if not report["summary"]["requests"]:
+        return 1
+    rate_limited = report["summary"]["rate_limited_rate"]
+    if rate_limited > args.max_rate_limited:
+        print(f"错误: {rate_limited:.1%}的请求被限流(429)，结果反映的是限流器而不是服务性能；"
+              f"请以RATE_LIMIT_ENABLED=false启动服务或调高rate_limit配置后重新压测", file=sys.stderr)
+        return 2
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())